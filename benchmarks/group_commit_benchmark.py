@@ -0,0 +1,82 @@
+"""Пропускная способность `POST /api/id/` с групповой фиксацией и без неё.
+
+Запросы отправляются из нескольких потоков в файловую базу SQLite, чтобы
+каждая фиксация действительно записывалась на диск.
+
+Запуск из корня проекта:
+
+    python benchmarks/group_commit_benchmark.py [--clients 16] [--requests 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+_database = Path(tempfile.mkdtemp()) / 'group_commit.sqlite3'
+os.environ['DATABASE_URI'] = f'sqlite:///{_database}'
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+os.environ['CLICK_FLUSH_INTERVAL'] = '0'
+
+from yacut import app, db  # noqa: E402
+from yacut.group_commit import group_committer  # noqa: E402
+
+
+def run_clients(clients, requests, prefix):
+    barrier = threading.Barrier(clients + 1)
+    failures = []
+
+    def client(number):
+        test_client = app.test_client()
+        barrier.wait()
+        for index in range(requests):
+            response = test_client.post('/api/id/', json={
+                'url': f'https://example.com/{prefix}/{number}/{index}',
+            })
+            if response.status_code != 201:
+                failures.append(response.status_code)
+
+    threads = [
+        threading.Thread(target=client, args=(number,))
+        for number in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, failures
+
+
+def measure(name, clients, requests, group_commit):
+    app.config['GROUP_COMMIT_ENABLED'] = group_commit
+    batches = group_committer.batches
+    elapsed, failures = run_clients(clients, requests, name)
+    total = clients * requests
+    line = (
+        f'{name:>10}: {total / elapsed:8.0f} запросов/с, '
+        f'ошибок {len(failures)}'
+    )
+    if group_commit:
+        count = group_committer.batches - batches
+        line += f', транзакций {count} (в среднем {total / count:.1f})'
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+    with app.app_context():
+        db.create_all()
+    measure('commit', args.clients, args.requests, group_commit=False)
+    measure('group', args.clients, args.requests, group_commit=True)
+
+
+if __name__ == '__main__':
+    main()
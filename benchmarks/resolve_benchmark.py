@@ -0,0 +1,75 @@
+"""Сравнение `URLMap.find` и `URLMap.resolve` на пути переадресации.
+
+Кэши отключены, чтобы измерять именно обращение к базе данных. Каждый вызов
+завершается `db.session.remove()`, как в конце обычного запроса.
+
+Запуск из корня проекта:
+
+    python benchmarks/resolve_benchmark.py [--rows 10000] [--lookups 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DATABASE_URI', 'sqlite:///:memory:')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+os.environ['REDIRECT_CACHE_SIZE'] = '0'
+os.environ['SHARED_CACHE_PATH'] = ''
+
+from sqlalchemy import insert  # noqa: E402
+
+from yacut import app, db  # noqa: E402
+from yacut.models import URLMap  # noqa: E402
+
+
+def find_original(short):
+    return URLMap.find(short).original
+
+
+def measure(name, lookup, shorts):
+    for short in shorts[:100]:
+        lookup(short)
+        db.session.remove()
+    started = time.perf_counter()
+    for short in shorts:
+        lookup(short)
+        db.session.remove()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    for short in shorts[:1000]:
+        lookup(short)
+        db.session.remove()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f'{name:>8}: {elapsed / len(shorts) * 1e6:8.1f} мкс/вызов, '
+        f'пик памяти {peak / 1024:8.1f} КБ'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--lookups', type=int, default=20_000)
+    args = parser.parse_args()
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(URLMap), [
+            {'original': f'https://example.com/{index}', 'short': f'b{index}'}
+            for index in range(args.rows)
+        ])
+        db.session.commit()
+        shorts = [
+            f'b{random.randrange(args.rows)}' for _ in range(args.lookups)
+        ]
+        measure('find', find_original, shorts)
+        measure('resolve', URLMap.resolve, shorts)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Время загрузки файлов на Я.Диск при разном `UPLOAD_CONCURRENCY`.
+
+API Диска заменяется мок-сервером из тестов, который отвечает на каждый
+запрос с задержкой `--latency` секунд, как удалённый сервис.
+
+Запуск из корня проекта:
+
+    python benchmarks/upload_concurrency_benchmark.py [--files 16]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ['DATABASE_URI'] = 'sqlite://'
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+os.environ['DISK_TOKEN'] = 'benchmark'
+
+from aiohttp.test_utils import TestServer  # noqa: E402
+
+from tests.yandex_disk_mock_server import create_mock_app  # noqa: E402
+from yacut import app, db, services  # noqa: E402
+from yacut.upstream import upstream  # noqa: E402
+
+
+def start_mock_server(latency):
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    mock_app, state = create_mock_app(latency)
+    server = TestServer(mock_app)
+    asyncio.run_coroutine_threadsafe(server.start_server(), loop).result()
+    return server, state
+
+
+def measure(files, concurrency, state):
+    app.config['UPLOAD_CONCURRENCY'] = concurrency
+    state.max_active = 0
+    connections = upstream.connections_created
+    started = time.perf_counter()
+    with app.app_context():
+        services.upload_files_to_yandex_disk(
+            services.FileToUpload(f'{index}.txt', BytesIO(f'{index}'.encode()))
+            for index in range(files)
+        )
+    elapsed = time.perf_counter() - started
+    print(
+        f'{concurrency:>3} одновременно: {elapsed:6.2f} с, '
+        f'{files / elapsed:6.1f} файлов/с, '
+        f'запросов в работе до {state.max_active}, '
+        f'новых соединений {upstream.connections_created - connections}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+    server, state = start_mock_server(args.latency)
+    services.YANDEX_API_BASE_URL = str(server.make_url('')).rstrip('/')
+    with app.app_context():
+        db.create_all()
+    for concurrency in (1, 2, 4, 8):
+        measure(args.files, concurrency, state)
+    upstream.stop()
+
+
+if __name__ == '__main__':
+    main()
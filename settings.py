@@ -1,7 +1,141 @@
 import os
+import tempfile
 
 
 class Config(object):
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URI')
+    # URI для ASGI-точки входа; по умолчанию выводится из DATABASE_URI
+    ASYNC_DATABASE_URI = os.getenv('ASYNC_DATABASE_URI')
     SECRET_KEY = os.getenv('SECRET_KEY')
     DISK_TOKEN = os.getenv('DISK_TOKEN')
+    # Кэш коротких ссылок в памяти процесса (0 — кэш выключен)
+    REDIRECT_CACHE_SIZE = int(os.getenv('REDIRECT_CACHE_SIZE', 10_000))
+    REDIRECT_CACHE_TTL = float(os.getenv('REDIRECT_CACHE_TTL', 0)) or None
+    # Разделяемый между процессами кэш в mmap-файле (пустой путь — выключен)
+    SHARED_CACHE_PATH = os.getenv('SHARED_CACHE_PATH', '')
+    SHARED_CACHE_SLOTS = int(os.getenv('SHARED_CACHE_SLOTS', 16_384))
+    # Фильтр Блума существующих коротких ссылок
+    SHORT_FILTER_ENABLED = (
+        os.getenv('SHORT_FILTER_ENABLED', 'true').lower() == 'true'
+    )
+    SHORT_FILTER_CAPACITY = int(os.getenv('SHORT_FILTER_CAPACITY', 1_000_000))
+    SHORT_FILTER_ERROR_RATE = float(
+        os.getenv('SHORT_FILTER_ERROR_RATE', 0.01)
+    )
+    # Файл фильтра, общего для процессов хоста; по умолчанию лежит рядом
+    # с разделяемым кэшем, без него у каждого процесса свой фильтр
+    SHORT_FILTER_PATH = os.getenv(
+        'SHORT_FILTER_PATH',
+        SHARED_CACHE_PATH + '.filter' if SHARED_CACHE_PATH else '',
+    )
+    # Не реже чем раз в столько секунд фильтр подгружает ссылки, созданные
+    # другими хостами; в фоне, если синхронизация в фоне не выключена
+    SHORT_FILTER_SYNC_INTERVAL = float(
+        os.getenv('SHORT_FILTER_SYNC_INTERVAL', 1.0)
+    )
+    SHORT_FILTER_BACKGROUND_SYNC = (
+        os.getenv('SHORT_FILTER_BACKGROUND_SYNC', 'true').lower() == 'true'
+    )
+    # Отложенная запись счётчиков переходов
+    CLICK_FLUSH_INTERVAL = float(os.getenv('CLICK_FLUSH_INTERVAL', 5.0))
+    CLICK_FLUSH_BATCH_SIZE = int(os.getenv('CLICK_FLUSH_BATCH_SIZE', 500))
+    CLICK_QUEUE_SIZE = int(os.getenv('CLICK_QUEUE_SIZE', 100_000))
+    # Код переадресации: 301/308 кэшируются браузерами и CDN, 302/307 — нет
+    REDIRECT_STATUS_CODE = int(os.getenv('REDIRECT_STATUS_CODE', 302))
+    REDIRECT_MAX_AGE = int(os.getenv('REDIRECT_MAX_AGE', 86_400))
+    # Прогрев кэша последними и популярными ссылками при запуске
+    CACHE_WARMUP_ON_STARTUP = (
+        os.getenv('CACHE_WARMUP_ON_STARTUP', 'false').lower() == 'true'
+    )
+    CACHE_WARMUP_LIMIT = int(os.getenv('CACHE_WARMUP_LIMIT', 1000))
+    CACHE_WARMUP_CHUNK_SIZE = int(os.getenv('CACHE_WARMUP_CHUNK_SIZE', 500))
+    CACHE_WARMUP_TIME_BUDGET = float(
+        os.getenv('CACHE_WARMUP_TIME_BUDGET', 2.0)
+    )
+    # Генерация коротких ссылок: random или sequence (счётчик в базе данных)
+    SHORT_ID_MODE = os.getenv('SHORT_ID_MODE', 'random')
+    SHORT_ID_BLOCK_SIZE = int(os.getenv('SHORT_ID_BLOCK_SIZE', 1000))
+    SHORT_ID_PERMUTE = (
+        os.getenv('SHORT_ID_PERMUTE', 'true').lower() == 'true'
+    )
+    # Ключ перестановки; после выдачи первых ссылок его лучше не менять
+    SHORT_ID_KEY = os.getenv('SHORT_ID_KEY', '')
+    # Максимальное число ссылок в одном запросе POST /api/ids/
+    BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', 1000))
+    # Возвращать существующую короткую ссылку для уже известного URL
+    DEDUPLICATE_URLS = os.getenv('DEDUPLICATE_URLS', 'false').lower() == 'true'
+    # Объединение одновременных POST /api/id/ в одну транзакцию
+    GROUP_COMMIT_ENABLED = (
+        os.getenv('GROUP_COMMIT_ENABLED', 'false').lower() == 'true'
+    )
+    GROUP_COMMIT_WINDOW = float(os.getenv('GROUP_COMMIT_WINDOW', 0.005))
+    GROUP_COMMIT_MAX_BATCH = int(os.getenv('GROUP_COMMIT_MAX_BATCH', 100))
+    # Запас свободных коротких ссылок, пополняемый в фоне; 0 — отключён
+    SHORT_POOL_SIZE = int(os.getenv('SHORT_POOL_SIZE', 0))
+    SHORT_POOL_BATCH_SIZE = int(os.getenv('SHORT_POOL_BATCH_SIZE', 100))
+    # Фоновое удаление истёкших ссылок: период в секундах (0 — отключено)
+    # и число ссылок, удаляемых одной транзакцией
+    EXPIRY_PURGE_INTERVAL = float(os.getenv('EXPIRY_PURGE_INTERVAL', 0))
+    EXPIRY_PURGE_BATCH_SIZE = int(os.getenv('EXPIRY_PURGE_BATCH_SIZE', 500))
+    # Шардирование таблицы url_map: URI баз данных шардов через запятую;
+    # пусто — ссылки хранятся в основной базе
+    URL_MAP_SHARD_URIS = [
+        uri.strip() for uri in os.getenv('URL_MAP_SHARDS', '').split(',')
+        if uri.strip()
+    ]
+    URL_MAP_SHARDS = [
+        f'url_map_{number}' for number in range(len(URL_MAP_SHARD_URIS))
+    ]
+    # Реплики основной базы для чтения ссылок при переадресации
+    URL_MAP_REPLICA_URIS = [
+        uri.strip() for uri in os.getenv('URL_MAP_REPLICAS', '').split(',')
+        if uri.strip()
+    ]
+    URL_MAP_REPLICAS = [
+        f'replica_{number}' for number in range(len(URL_MAP_REPLICA_URIS))
+    ]
+    SQLALCHEMY_BINDS = dict(zip(
+        URL_MAP_SHARDS + URL_MAP_REPLICAS,
+        URL_MAP_SHARD_URIS + URL_MAP_REPLICA_URIS,
+    ))
+    # Сколько секунд после создания ссылка читается с основной базы
+    # и через сколько секунд повторно пробовать сбойную реплику
+    REPLICA_FALLBACK_WINDOW = float(os.getenv('REPLICA_FALLBACK_WINDOW', 5))
+    REPLICA_RETRY_INTERVAL = float(os.getenv('REPLICA_RETRY_INTERVAL', 30))
+    # Сколько файлов одной формы загружаются на Яндекс Диск одновременно;
+    # значения меньше 1 заменяются на 1, иначе загрузка не начнётся
+    UPLOAD_CONCURRENCY = max(1, int(os.getenv('UPLOAD_CONCURRENCY', 4)))
+    # Размер порции при отправке файла на Яндекс Диск, в байтах
+    UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 64 * 1024))
+    # Максимальный размер тела запроса в байтах (0 — без ограничения)
+    MAX_CONTENT_LENGTH = (
+        int(os.getenv('MAX_CONTENT_LENGTH', 100 * 1024 * 1024)) or None
+    )
+    # Пул соединений общей сессии aiohttp для запросов к API Яндекс Диска:
+    # лимиты соединений (0 — без ограничения), время жизни простаивающего
+    # соединения и кэша DNS в секундах (0 — кэш выключен)
+    UPSTREAM_CONNECTION_LIMIT = int(
+        os.getenv('UPSTREAM_CONNECTION_LIMIT', 100)
+    )
+    UPSTREAM_CONNECTION_LIMIT_PER_HOST = int(
+        os.getenv('UPSTREAM_CONNECTION_LIMIT_PER_HOST', 0)
+    )
+    UPSTREAM_KEEPALIVE_TIMEOUT = float(
+        os.getenv('UPSTREAM_KEEPALIVE_TIMEOUT', 60)
+    )
+    UPSTREAM_DNS_CACHE_TTL = int(os.getenv('UPSTREAM_DNS_CACHE_TTL', 300))
+    # Фоновые задачи загрузки файлов: форма сохраняет файлы в каталог
+    # UPLOAD_SPOOL_DIR и сразу возвращает номер задачи
+    UPLOAD_JOBS_ENABLED = (
+        os.getenv('UPLOAD_JOBS_ENABLED', 'false').lower() == 'true'
+    )
+    UPLOAD_SPOOL_DIR = os.getenv(
+        'UPLOAD_SPOOL_DIR',
+        os.path.join(tempfile.gettempdir(), 'yacut_uploads'),
+    )
+    # Число потоков-обработчиков в процессе (0 — задачи разбирают другие
+    # процессы), период опроса очереди и время, после которого
+    # незавершённая задача выдаётся снова, в секундах
+    UPLOAD_JOB_WORKERS = int(os.getenv('UPLOAD_JOB_WORKERS', 2))
+    UPLOAD_JOB_POLL_INTERVAL = float(os.getenv('UPLOAD_JOB_POLL_INTERVAL', 1))
+    UPLOAD_JOB_TIMEOUT = float(os.getenv('UPLOAD_JOB_TIMEOUT', 600))
@@ -5,6 +5,7 @@ from random import choice
 
 import pytest
 from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
 from io import BytesIO
 from PIL import Image
 
@@ -17,6 +18,10 @@ _user_environment = os.environ.copy()
 _tmp_db_uri = 'sqlite:///:memory:'
 os.environ['DATABASE_URI'] = _tmp_db_uri
 os.environ['DISK_TOKEN'] = 'y0_nbfoiu3445tno35_fd09v854bn2_cs0e8hrb4k'
+# Счётчики переходов в тестах сбрасываются только явно
+os.environ['CLICK_FLUSH_INTERVAL'] = '0'
+# Фильтр Блума в тестах синхронизируется только в потоке запроса
+os.environ['SHORT_FILTER_BACKGROUND_SYNC'] = 'false'
 
 PY_URL = 'https://www.python.org'
 TEST_BASE_URL = 'http://localhost'
@@ -26,7 +31,9 @@ pytest_plugins = [
 ]
 
 try:
-    from yacut import app, db
+    from yacut import app, db, redirect_cache, short_filter
+    from yacut.clicks import click_counter
+    from yacut.upstream import upstream
     from yacut.models import URLMap  # noqa
 except NameError as exc:
     raise AssertionError(
@@ -70,6 +77,42 @@ def _app():
         yield app
         db.drop_all()
         db.session.close()
+        redirect_cache.clear()
+        short_filter.clear()
+        click_counter.clear()
+        # Следующий тест может подменить aiohttp.ClientSession
+        upstream.stop()
+
+
+@pytest.fixture
+def file_db(_app, tmp_path):
+    """Подменяет базу в памяти файловой, чтобы писатели шли параллельно."""
+    engine = create_engine(
+        f'sqlite:///{tmp_path / "race.sqlite3"}',
+        connect_args={'timeout': 30},
+    )
+    db.metadata.create_all(engine)
+    engines = db.engines
+    memory_engine = engines[None]
+    db.session.remove()
+    engines[None] = engine
+    yield engine
+    db.session.remove()
+    engines[None] = memory_engine
+    engine.dispose()
+
+
+@pytest.fixture
+def queries(_app):
+    """Собирает SQL-запросы, отправленные в основную базу во время теста."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
 
 
 @pytest.fixture
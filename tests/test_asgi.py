@@ -0,0 +1,125 @@
+import asyncio
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from tests.conftest import PY_URL
+from yacut import db
+from yacut.asgi import RedirectApplication, to_async_database_uri
+from yacut.models import URLMap, cache_set
+
+
+async def call(application, path, method='GET', headers=()):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await application({
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': b'',
+        'headers': list(headers),
+    }, receive, send)
+    start, body = messages
+    return start['status'], dict(start['headers']), body['body']
+
+
+@pytest.fixture
+def asgi_app(_app, tmp_path):
+    uri = f'sqlite:///{tmp_path / "asgi.sqlite3"}'
+    engine = create_engine(uri)
+    db.metadata.create_all(engine, tables=[URLMap.__table__])
+    with engine.begin() as connection:
+        connection.execute(insert(URLMap).values(original=PY_URL, short='py'))
+    engine.dispose()
+    return RedirectApplication(_app, to_async_database_uri(uri))
+
+
+async def test_redirect(asgi_app):
+    status, headers, _ = await call(asgi_app, '/py')
+    await asgi_app.shutdown()
+    assert status == HTTPStatus.FOUND, (
+        'ASGI-приложение должно переадресовывать по существующей '
+        'короткой ссылке.'
+    )
+    assert headers[b'location'] == PY_URL.encode()
+
+
+async def test_permanent_redirect_capped_by_expiry(asgi_app, monkeypatch):
+    monkeypatch.setitem(asgi_app.flask_app.config, 'REDIRECT_STATUS_CODE',
+                        HTTPStatus.PERMANENT_REDIRECT)
+    expires_at = datetime.utcnow() + timedelta(seconds=60)
+    cache_set('soon', (None, PY_URL, 'soon', None, expires_at))
+    status, headers, _ = await call(asgi_app, '/soon')
+    await asgi_app.shutdown()
+    assert status == HTTPStatus.PERMANENT_REDIRECT
+    max_age = int(headers[b'cache-control'].split(b'max-age=')[1])
+    assert 0 < max_age <= 60, (
+        'ASGI-приложение не должно разрешать кэшировать переадресацию '
+        'дольше срока действия ссылки.'
+    )
+
+
+async def test_api_lookup(asgi_app):
+    status, _, body = await call(asgi_app, '/api/id/py/')
+    missing_status, _, missing_body = await call(asgi_app, '/api/id/nope/')
+    await asgi_app.shutdown()
+    assert status == HTTPStatus.OK
+    assert body == b'{"url":"https://www.python.org"}\n'
+    assert missing_status == HTTPStatus.NOT_FOUND
+
+
+async def test_api_conditional_get(asgi_app):
+    _, headers, _ = await call(asgi_app, '/api/id/py/')
+    status, _, body = await call(
+        asgi_app, '/api/id/py/', headers=[(b'if-none-match', headers[b'etag'])]
+    )
+    await asgi_app.shutdown()
+    assert status == HTTPStatus.NOT_MODIFIED
+    assert body == b''
+
+
+def test_responses_match_flask(asgi_app, client):
+    async def scenario():
+        try:
+            return [
+                await call(asgi_app, path)
+                for path in ('/missing', '/api/id/missing/', '/api/other/')
+            ]
+        finally:
+            await asgi_app.shutdown()
+
+    for path, (status, _, body) in zip(
+        ('/missing', '/api/id/missing/', '/api/other/'),
+        asyncio.run(scenario()),
+    ):
+        response = client.get(path)
+        assert status == response.status_code, (
+            f'Статус ответа ASGI-приложения на `{path}` должен совпадать '
+            'со статусом Flask-приложения.'
+        )
+        assert body == response.data, (
+            f'Тело ответа ASGI-приложения на `{path}` должно совпадать '
+            'с телом ответа Flask-приложения.'
+        )
+
+
+async def test_concurrent_resolves_share_filter_sync(asgi_app):
+    # Фильтр ещё не загружен: все запросы одновременно требуют
+    # синхронизации, и ни один не должен заблокировать цикл событий
+    asgi_app.engines = {
+        None: create_async_engine(asgi_app.database_uri)
+    }
+    originals = await asyncio.wait_for(asyncio.gather(*(
+        asgi_app.resolve(short) for short in ('py', 'no1', 'no2', 'py')
+    )), 5)
+    await asgi_app.shutdown()
+    assert originals == [PY_URL, None, None, PY_URL]
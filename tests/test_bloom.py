@@ -0,0 +1,135 @@
+import threading
+import time
+from http import HTTPStatus
+
+from sqlalchemy import insert
+
+from tests.conftest import PY_URL
+from yacut import db, short_filter
+from yacut.bloom import BloomFilter, SharedBloomFilter
+from yacut.models import (
+    ShortFilterSync,
+    URLMap,
+    shard_connections,
+    sync_short_filter,
+)
+
+
+def test_bloom_filter_error_rate():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f'key{index}' for index in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys), (
+        'Фильтр Блума не должен давать ложноотрицательных ответов.'
+    )
+    false_positives = sum(
+        f'other{index}' in bloom for index in range(10_000)
+    )
+    assert false_positives < 300
+
+
+def test_unknown_short_skips_database(
+    client, short_python_url, queries, monkeypatch
+):
+    monkeypatch.setitem(
+        client.application.config, 'SHORT_FILTER_SYNC_INTERVAL', 60
+    )
+    client.get('/warmup')
+    queries.clear()
+    for index in range(5):
+        response = client.get(f'/definitely-missing{index}')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+    assert not queries, (
+        'Запрос несуществующей короткой ссылки, отсеянной фильтром Блума, '
+        'не должен обращаться к базе данных.'
+    )
+    assert client.get('/py').status_code == HTTPStatus.FOUND
+
+
+def test_filter_syncs_rows_from_other_writers(_app, short_python_url,
+                                              monkeypatch):
+    monkeypatch.setitem(_app.config, 'SHORT_FILTER_SYNC_INTERVAL', 0)
+    assert URLMap.find('abc') is None
+    db.session.execute(insert(URLMap).values(original=PY_URL, short='abc'))
+    db.session.commit()
+    assert URLMap.find('abc') is not None, (
+        'Фильтр Блума должен подтягивать ссылки, созданные в обход '
+        'текущего процесса.'
+    )
+
+
+def test_sync_rereads_late_commits(_app):
+    db.session.execute(insert(URLMap), [
+        {'id': row_id, 'original': PY_URL, 'short': f'id{row_id}'}
+        for row_id in (1, 2, 4)
+    ])
+    db.session.commit()
+    sync_short_filter(shard_connections(), 1000)
+    count = short_filter.count
+    # Строка с id 3 стала видна после загрузки строки с id 4
+    db.session.execute(
+        insert(URLMap).values(id=3, original=PY_URL, short='id3')
+    )
+    db.session.commit()
+    sync_short_filter(shard_connections(), 1000)
+    assert 'id3' in short_filter, (
+        'Синхронизация должна перечитывать последние id, чтобы не терять '
+        'строки, зафиксированные не по порядку id.'
+    )
+    assert short_filter.count == count + 1, (
+        'Повторно прочитанные ссылки не должны увеличивать счётчик фильтра.'
+    )
+
+
+def test_shared_filter_visible_to_other_processes(tmp_path):
+    path = str(tmp_path / 'shorts.filter')
+    writer = SharedBloomFilter(path, 1000, 0.01)
+    reader = SharedBloomFilter(path, 1000, 0.01)
+    assert 'py' not in reader
+    writer.add('py')
+    assert 'py' in reader, (
+        'Ссылка, добавленная в общий фильтр одним процессом, должна сразу '
+        'быть видна другим.'
+    )
+    writer.reset(10_000)
+    assert 'py' in reader, (
+        'Перезагрузка фильтра одним процессом не должна стирать общие биты.'
+    )
+    reader.clear()
+    assert 'py' not in writer
+
+
+def test_background_sync_restarts_after_fork(monkeypatch):
+    synced = threading.Event()
+    sync = ShortFilterSync(synced.set, interval=0.01, enabled=True)
+    sync.ensure_started()
+    assert synced.wait(5), 'Фоновая синхронизация фильтра должна работать.'
+    first = sync._thread
+    monkeypatch.setattr('yacut.models.os.getpid', lambda: -1)
+    sync.ensure_started()
+    sync.stop()
+    assert sync._thread is not first, (
+        'После fork фоновая синхронизация должна запускаться заново.'
+    )
+
+
+def test_waiting_requests_share_filter_sync(_app, short_python_url,
+                                            queries):
+    requested_at = time.monotonic()
+    sync_short_filter(shard_connections(), 1000)
+    queries.clear()
+    sync_short_filter(shard_connections(), 1000, requested_at)
+    assert not queries, (
+        'Запрос, дождавшийся синхронизации фильтра другим потоком, '
+        'не должен синхронизировать фильтр повторно.'
+    )
+
+
+def test_metrics_expose_filter(client, short_python_url):
+    client.get('/py')
+    response = client.get('/api/metrics/')
+    assert response.status_code == HTTPStatus.OK
+    assert response.json['short_filter']['count'] == 1
+    assert 'hits' in response.json['redirect_cache']
+    assert short_filter.stats()['loaded']
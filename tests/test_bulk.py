@@ -0,0 +1,123 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from tests.conftest import PY_URL, TEST_BASE_URL
+from yacut import db
+from yacut.models import (
+    DUPLICATE_SHORT,
+    INVALID_SHORT,
+    INVALID_URL_FORMAT,
+    URLMap,
+)
+
+BULK_URL = '/api/ids/'
+
+
+def test_bulk_create_keeps_order(client, short_python_url):
+    response = client.post(BULK_URL, json=[
+        {'url': 'https://example.com/1'},
+        {'url': 'https://example.com/2', 'custom_id': 'two'},
+        {'url': 'https://example.com/3', 'custom_id': 'py'},
+        {'custom_id': 'nourl'},
+        {'url': 'not a url'},
+        {'url': 'https://example.com/6', 'custom_id': 'two'},
+    ])
+    assert response.status_code == HTTPStatus.CREATED
+    results = response.json
+    assert len(results) == 6, (
+        'Результат должен содержать элемент для каждой ссылки запроса.'
+    )
+    assert results[0]['short_link'].startswith(TEST_BASE_URL + '/')
+    assert results[1] == {
+        'url': 'https://example.com/2',
+        'short_link': f'{TEST_BASE_URL}/two',
+    }
+    assert results[2] == {
+        'url': 'https://example.com/3', 'message': DUPLICATE_SHORT,
+    }
+    assert 'message' in results[3]
+    assert results[4]['message'] == INVALID_URL_FORMAT
+    assert results[5]['message'] == DUPLICATE_SHORT, (
+        'Повтор идентификатора внутри одного запроса должен быть ошибкой.'
+    )
+    assert db.session.scalar(select(func.count(URLMap.id))) == 3
+    generated = results[0]['short_link'].rsplit('/', 1)[-1]
+    assert client.get('/' + generated).location == 'https://example.com/1'
+    assert client.get('/two').location == 'https://example.com/2'
+    assert URLMap.find('two').timestamp is not None
+
+
+def test_bulk_create_uses_few_queries(client, queries):
+    payload = [{'url': f'{PY_URL}/{index}'} for index in range(200)]
+    payload += [
+        {'url': PY_URL, 'custom_id': f'custom{index}'} for index in range(50)
+    ]
+    response = client.post(BULK_URL, json=payload)
+    assert response.status_code == HTTPStatus.CREATED
+    inserts = [query for query in queries if query.startswith('INSERT')]
+    assert len(inserts) == 1, (
+        'Все ссылки должны вставляться одним многострочным INSERT.'
+    )
+    assert len(queries) <= 5
+    assert db.session.scalar(select(func.count(URLMap.id))) == 250
+
+
+@pytest.mark.parametrize('payload', [None, {}, []])
+def test_bulk_create_requires_list(client, payload):
+    response = client.post(BULK_URL, json=payload)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert 'message' in response.json
+
+
+def test_bulk_create_limit(client):
+    client.application.config['BULK_MAX_ITEMS'] = 2
+    try:
+        response = client.post(BULK_URL, json=[{'url': PY_URL}] * 3)
+    finally:
+        client.application.config['BULK_MAX_ITEMS'] = 1000
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_bulk_create_all_failed(client):
+    response = client.post(BULK_URL, json=[{'url': 'bad'}])
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json == [{'url': 'bad', 'message': INVALID_URL_FORMAT}]
+
+
+def test_bulk_create_rechecks_past_stale_filter(client, short_python_url):
+    client.get('/py')
+    db.session.execute(insert(URLMap).values(original=PY_URL, short='abc'))
+    db.session.commit()
+    response = client.post(BULK_URL, json=[
+        {'url': 'https://example.com/1', 'custom_id': 'abc'},
+        {'url': 'https://example.com/2'},
+    ])
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json[0] == {
+        'url': 'https://example.com/1', 'message': DUPLICATE_SHORT,
+    }, (
+        'Идентификатор, пропущенный устаревшим фильтром Блума, должен '
+        'найтись повторной проверкой после конфликта вставки.'
+    )
+    assert 'short_link' in response.json[1]
+
+
+def test_bulk_create_rejects_wrong_types(client):
+    response = client.post(BULK_URL, json=[
+        {'url': 5},
+        {'url': PY_URL, 'custom_id': 7},
+        {'url': PY_URL, 'custom_id': 'ok'},
+    ])
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json[:2] == [
+        {'url': 5, 'message': INVALID_URL_FORMAT},
+        {'url': PY_URL, 'message': INVALID_SHORT},
+    ], (
+        'Поля неверного типа должны давать ошибку в элементе ответа, '
+        'а не ошибку сервера.'
+    )
+    assert response.json[2] == {
+        'url': PY_URL, 'short_link': f'{TEST_BASE_URL}/ok',
+    }
@@ -0,0 +1,76 @@
+from tests.conftest import PY_URL
+from yacut import db, redirect_cache
+from yacut.cache import LRUCache
+from yacut.models import URLMap
+
+
+class FakeTimer:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None, (
+        'При переполнении кэша должна вытесняться давно не используемая '
+        'запись.'
+    )
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_expiration():
+    timer = FakeTimer()
+    cache = LRUCache(maxsize=10, ttl=5, timer=timer)
+    cache.set('a', 1)
+    timer.now = 4
+    assert cache.get('a') == 1
+    timer.now = 5
+    assert cache.get('a') is None, (
+        'Запись кэша должна устаревать по истечении TTL.'
+    )
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_find_uses_cache(_app, short_python_url):
+    assert URLMap.find('py').original == PY_URL
+    assert redirect_cache.stats()['misses'] == 1
+    db.session.expunge_all()
+    url_map = URLMap.find('py')
+    assert redirect_cache.stats()['hits'] == 1, (
+        'Повторный поиск по короткой ссылке должен обслуживаться из кэша.'
+    )
+    assert url_map.original == PY_URL
+    assert url_map.id == short_python_url.id
+
+
+def test_create_replaces_cached_entry(_app):
+    redirect_cache.set('py', (1, 'https://stale.example', 'py', None))
+    URLMap.create(PY_URL, 'py', validate=False)
+    assert redirect_cache.get('py')[1] == PY_URL, (
+        'Создание записи должно обновлять кэш для её короткой ссылки.'
+    )
+
+
+def test_resolve_returns_plain_string(_app, short_python_url):
+    expected_id = short_python_url.id
+    db.session.expunge_all()
+    assert URLMap.resolve('py') == PY_URL
+    assert not list(db.session), (
+        '`URLMap.resolve` не должен загружать ORM-объекты в сессию.'
+    )
+    assert URLMap.resolve('py') == PY_URL
+    assert redirect_cache.stats()['hits'] == 1
+    assert URLMap.find('py').id == expected_id, (
+        'Неполная запись кэша, сохранённая `resolve`, не должна мешать '
+        '`find` возвращать полноценный объект.'
+    )
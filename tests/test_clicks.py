@@ -0,0 +1,115 @@
+from http import HTTPStatus
+
+import pytest
+
+from yacut.clicks import WriteBehindCounter, click_counter, pending_clicks
+from yacut.models import URLClick
+
+CLICKS_URL = '/api/id/{short}/clicks/'
+STATS_URL = '/api/id/{short}/stats/'
+
+
+def test_redirect_counts_without_writes(client, short_python_url):
+    for _ in range(3):
+        client.get('/py')
+    assert URLClick.get_clicks('py') == 0, (
+        'Переход по короткой ссылке не должен сразу записывать счётчик '
+        'в базу данных.'
+    )
+    assert pending_clicks('py') == 3
+    click_counter.flush()
+    client.get('/py')
+    click_counter.flush()
+    assert URLClick.get_clicks('py') == 4, (
+        'Накопленные переходы должны суммироваться в базе данных при '
+        'каждом сбросе.'
+    )
+
+
+def test_clicks_api(client, short_python_url):
+    client.get('/py')
+    click_counter.flush()
+    client.get('/py')
+    response = client.get(CLICKS_URL.format(short='py'))
+    assert response.status_code == HTTPStatus.OK
+    assert response.json == {'short': 'py', 'clicks': 2}, (
+        'API счётчика должно учитывать и сохранённые, и ещё не сброшенные '
+        'переходы.'
+    )
+    missing = client.get(CLICKS_URL.format(short='missing'))
+    assert missing.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.fixture
+def exit_hooks(monkeypatch):
+    hooks = []
+    monkeypatch.setattr('yacut.clicks.atexit.register', hooks.append)
+    return hooks
+
+
+def test_counter_bounds_and_batches(exit_hooks):
+    batches = []
+    counter = WriteBehindCounter(batches.append, 0, 2, 3)
+    for key in 'abcd':
+        counter.increment(key)
+    counter.increment('a')
+    assert counter.stats()['dropped'] == 1, (
+        'При переполнении очереди новые ключи должны отбрасываться.'
+    )
+    assert counter.flush() == 3
+    assert batches == [[('a', 2), ('b', 1)], [('c', 1)]]
+
+
+def test_failed_flush_keeps_deltas(exit_hooks):
+    def fail(batch):
+        raise RuntimeError
+
+    counter = WriteBehindCounter(fail, 0, 10, 10)
+    counter.increment('a')
+    with pytest.raises(RuntimeError):
+        counter.flush()
+    assert counter.pending('a') == 1
+
+
+def test_zero_interval_flushes_at_exit(exit_hooks):
+    batches = []
+    counter = WriteBehindCounter(batches.append, 0, 10, 10)
+    counter.increment('a')
+    counter.increment('a')
+    assert exit_hooks == [counter.stop], (
+        'При нулевом интервале сброса счётчики должны сохраняться '
+        'при завершении процесса.'
+    )
+    exit_hooks[0]()
+    assert batches == [[('a', 2)]]
+
+
+def test_stats_rollups(client, short_python_url):
+    for _ in range(2):
+        client.get('/py')
+        click_counter.flush()
+    for period in ('hour', 'day'):
+        response = client.get(
+            STATS_URL.format(short='py'), query_string={'period': period}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json['total'] == 2
+        buckets = response.json['buckets']
+        assert [bucket['clicks'] for bucket in buckets] == [2], (
+            f'Переходы за период `{period}` должны накапливаться в одном '
+            'интервале при нескольких сбросах.'
+        )
+    hour = client.get(
+        STATS_URL.format(short='py'), query_string={'period': 'hour'}
+    ).json['buckets'][0]['start']
+    assert hour.endswith(':00:00')
+
+
+@pytest.mark.parametrize('query', [
+    {'period': 'week'},
+    {'since': 'yesterday'},
+])
+def test_stats_invalid_query(client, short_python_url, query):
+    response = client.get(STATS_URL.format(short='py'), query_string=query)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert 'message' in response.json
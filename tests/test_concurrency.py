@@ -0,0 +1,145 @@
+import threading
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from wtforms import ValidationError
+
+from tests.conftest import PY_URL
+from yacut import db
+from yacut.models import (
+    DUPLICATE_SHORT,
+    URLMap,
+    _raise_if_duplicate_short,
+)
+
+WRITERS = 8
+
+
+def run_writers(app, target):
+    barrier = threading.Barrier(WRITERS)
+    outcomes = []
+
+    def writer(number):
+        with app.app_context():
+            barrier.wait()
+            try:
+                target(number)
+                outcomes.append('created')
+            except ValidationError as error:
+                outcomes.append(str(error))
+            except Exception as error:
+                outcomes.append(repr(error))
+
+    threads = [
+        threading.Thread(target=writer, args=(number,))
+        for number in range(WRITERS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def test_parallel_writers_same_custom_id(_app, file_db):
+    outcomes = run_writers(
+        _app, lambda number: URLMap.create(f'{PY_URL}/{number}', 'race')
+    )
+    assert outcomes.count('created') == 1, (
+        'Из параллельных запросов с одним идентификатором должен '
+        'выполниться ровно один.'
+    )
+    assert outcomes.count(DUPLICATE_SHORT) == WRITERS - 1, (
+        'Остальные запросы должны получить ошибку о занятом '
+        f'идентификаторе, а не исключение базы данных: {outcomes}'
+    )
+    assert db.session.scalar(select(func.count(URLMap.id))) == 1
+
+
+def test_parallel_writers_generated_ids(_app, file_db):
+    outcomes = run_writers(
+        _app, lambda number: URLMap.create(f'{PY_URL}/{number}')
+    )
+    assert outcomes == ['created'] * WRITERS
+    assert db.session.scalar(select(func.count(URLMap.id))) == WRITERS
+
+
+def test_generated_collision_retries(_app, short_python_url, monkeypatch):
+    candidates = iter(['py', 'py', 'fresh'])
+    monkeypatch.setattr(
+        URLMap, '_generate_candidate', staticmethod(lambda: next(candidates))
+    )
+    assert URLMap.create(PY_URL).short == 'fresh', (
+        'При совпадении сгенерированного идентификатора вставка должна '
+        'повторяться с новым кандидатом.'
+    )
+
+
+def test_create_is_single_statement(_app, queries):
+    URLMap.create(PY_URL, 'one')
+    URLMap.create(PY_URL)
+    inserts = [query for query in queries if query.startswith('INSERT')]
+    assert queries == inserts, (
+        'Создание ссылки не должно предварительно проверять занятость '
+        'отдельным запросом.'
+    )
+
+
+def test_uncommitted_duplicate_keeps_transaction(_app, short_python_url):
+    first = URLMap.create(PY_URL, 'first', commit=False)
+    with pytest.raises(ValidationError, match=DUPLICATE_SHORT):
+        URLMap.create(PY_URL, 'py', commit=False)
+    db.session.commit()
+    assert URLMap.find(first.short) is not None, (
+        'Ошибка одной вставки не должна откатывать остальные изменения '
+        'транзакции.'
+    )
+
+
+class DriverError(Exception):
+    """Ошибка драйвера СУБД с необязательной диагностикой psycopg."""
+
+    def __init__(self, message, constraint_name=None):
+        super().__init__(message)
+        if constraint_name is not None:
+            self.diag = type('Diag', (), {
+                'constraint_name': constraint_name,
+            })()
+
+
+@pytest.mark.parametrize('orig', [
+    DriverError('UNIQUE constraint failed: url_map.short'),
+    DriverError("Duplicate entry 'py' for key 'url_map.short'"),
+    DriverError("Duplicate entry 'py' for key 'short'"),
+    DriverError(
+        'duplicate key value violates unique constraint "url_map_short_key"',
+        constraint_name='url_map_short_key',
+    ),
+])
+def test_duplicate_short_detected(orig):
+    with pytest.raises(ValidationError, match=DUPLICATE_SHORT):
+        _raise_if_duplicate_short(IntegrityError('INSERT', {}, orig))
+
+
+@pytest.mark.parametrize('orig', [
+    DriverError('NOT NULL constraint failed: url_map.short'),
+    DriverError("Column 'short' cannot be null"),
+    DriverError('UNIQUE constraint failed: url_map.short_hash'),
+    DriverError(
+        'null value in column "short" violates not-null constraint',
+        constraint_name='',
+    ),
+    DriverError(
+        'duplicate key value violates unique constraint "url_map_pkey"',
+        constraint_name='url_map_pkey',
+    ),
+])
+def test_other_integrity_errors_not_duplicate(orig):
+    error = IntegrityError('INSERT', {}, orig)
+    with pytest.raises(IntegrityError) as raised:
+        _raise_if_duplicate_short(error)
+    assert raised.value is error, (
+        'Ошибки, не связанные с уникальностью `short`, не должны '
+        'выдаваться за занятый идентификатор.'
+    )
@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import func, insert, select
+
+from tests.conftest import PY_URL
+from yacut import db
+from yacut.models import URLMap, hash_url
+
+
+@pytest.fixture
+def dedup(_app):
+    _app.config['DEDUPLICATE_URLS'] = True
+    yield _app
+    _app.config['DEDUPLICATE_URLS'] = False
+
+
+def test_hash_is_filled(_app):
+    url_map = URLMap.create(PY_URL)
+    db.session.execute(insert(URLMap).values(original=PY_URL, short='core'))
+    assert url_map.original_hash == hash_url(PY_URL)
+    assert URLMap.find('core').original_hash == hash_url(PY_URL), (
+        'Хэш оригинальной ссылки должен заполняться и при вставке без ORM.'
+    )
+
+
+def test_dedup_returns_existing_short(dedup, client):
+    first = client.post('/api/id/', json={'url': PY_URL}).json
+    second = client.post('/api/id/', json={'url': PY_URL}).json
+    assert first['short_link'] == second['short_link'], (
+        'При включённой дедупликации повторное сокращение той же ссылки '
+        'должно вернуть существующую короткую ссылку.'
+    )
+    assert db.session.scalar(select(func.count(URLMap.id))) == 1
+
+
+def test_dedup_keeps_custom_ids(dedup, short_python_url):
+    assert URLMap.create(PY_URL, 'custom').short == 'custom'
+    assert URLMap.create(PY_URL + '/').short != short_python_url.short
+
+
+def test_dedup_disabled_by_default(_app, short_python_url):
+    assert URLMap.create(PY_URL).short != short_python_url.short
+
+
+def test_dedup_in_bulk_create(dedup, client, short_python_url):
+    response = client.post('/api/ids/', json=[
+        {'url': PY_URL},
+        {'url': PY_URL, 'custom_id': 'custom'},
+        {'url': PY_URL + '/new'},
+        {'url': PY_URL + '/new'},
+    ])
+    links = [item['short_link'] for item in response.json]
+    assert links[0].endswith('/' + short_python_url.short), (
+        'Пакетное создание должно учитывать дедупликацию ссылок.'
+    )
+    assert links[1].endswith('/custom')
+    assert links[2] == links[3]
+    assert db.session.scalar(select(func.count(URLMap.id))) == 3
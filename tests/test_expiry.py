@@ -0,0 +1,170 @@
+import os
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import delete, func, insert, select
+
+from tests.conftest import PY_URL
+from yacut import db, redirect_cache
+from yacut.expiry import ExpiryPurger, purge_expired_batch
+from yacut.models import EXPIRES_IN_PAST, URLClick, URLMap
+
+
+def add_links(count, expires_at):
+    db.session.execute(insert(URLMap), [
+        {'original': f'{PY_URL}/{index}', 'short': f'x{index}',
+         'expires_at': expires_at}
+        for index in range(count)
+    ])
+    db.session.commit()
+
+
+def count_links():
+    return db.session.scalar(select(func.count(URLMap.id)))
+
+
+def test_api_sets_expiry(client):
+    expires_at = (datetime.utcnow() + timedelta(hours=1)).replace(
+        microsecond=0
+    )
+    response = client.post('/api/id/', json={
+        'url': PY_URL, 'custom_id': 'soon',
+        'expires_at': expires_at.isoformat() + '+00:00',
+    })
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json['expires_at'] == expires_at.isoformat()
+    assert URLMap.find('soon').expires_at == expires_at
+
+
+@pytest.mark.parametrize('value, message', [
+    ('2000-01-01T00:00:00', EXPIRES_IN_PAST),
+    ('завтра', 'Недопустимый срок действия ссылки'),
+])
+def test_api_rejects_bad_expiry(client, value, message):
+    response = client.post('/api/id/', json={
+        'url': PY_URL, 'expires_at': value,
+    })
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json == {'message': message}
+
+
+def test_form_sets_expiry(client):
+    expires_at = (datetime.utcnow() + timedelta(days=1)).replace(
+        second=0, microsecond=0
+    )
+    client.post('/', data={
+        'original_link': PY_URL,
+        'custom_id': 'form',
+        'expires_at': expires_at.strftime('%Y-%m-%dT%H:%M'),
+    })
+    assert URLMap.find('form').expires_at == expires_at
+
+
+def test_form_rejects_past_expiry(client):
+    response = client.post('/', data={
+        'original_link': PY_URL,
+        'custom_id': 'old',
+        'expires_at': '2000-01-01T00:00',
+    })
+    assert EXPIRES_IN_PAST in response.data.decode('utf-8')
+    assert URLMap.find('old') is None
+
+
+def test_expired_link_is_not_resolved(client):
+    add_links(1, datetime.utcnow() - timedelta(seconds=1))
+    assert client.get('/x0').status_code == HTTPStatus.NOT_FOUND, (
+        'Переадресация по истёкшей ссылке должна возвращать 404.'
+    )
+    assert client.get('/api/id/x0/').status_code == HTTPStatus.NOT_FOUND
+
+
+def test_cached_link_expires(client, monkeypatch):
+    add_links(1, datetime.utcnow() + timedelta(minutes=5))
+    assert client.get('/x0').status_code == HTTPStatus.FOUND
+    assert redirect_cache.get('x0') is not None
+    later = datetime.utcnow() + timedelta(minutes=10)
+    monkeypatch.setattr(
+        'yacut.models.datetime',
+        type('frozen', (datetime,), {'utcnow': staticmethod(lambda: later)}),
+    )
+    assert client.get('/x0').status_code == HTTPStatus.NOT_FOUND, (
+        'Срок действия должен проверяться и для ссылки из кэша.'
+    )
+
+
+def test_recreated_link_replaces_expired_cache(client, monkeypatch):
+    add_links(1, datetime.utcnow() + timedelta(minutes=5))
+    assert client.get('/x0').status_code == HTTPStatus.FOUND
+    later = datetime.utcnow() + timedelta(minutes=10)
+    monkeypatch.setattr(
+        'yacut.models.datetime',
+        type('frozen', (datetime,), {'utcnow': staticmethod(lambda: later)}),
+    )
+    # Другой процесс удалил истёкшую ссылку и создал её заново, кэш этого
+    # процесса об этом не знает
+    db.session.execute(delete(URLMap))
+    db.session.execute(insert(URLMap).values(original=PY_URL, short='x0'))
+    db.session.commit()
+    response = client.get('/x0')
+    assert response.status_code == HTTPStatus.FOUND, (
+        'Истёкшая запись кэша должна перечитываться из базы данных.'
+    )
+    assert response.location == PY_URL
+
+
+def test_purge_deletes_in_batches(_app):
+    add_links(5, datetime.utcnow() - timedelta(minutes=1))
+    URLMap.create(PY_URL, 'alive')
+    URLMap.create(PY_URL, 'later', expires_at=(
+        datetime.utcnow() + timedelta(days=1)
+    ))
+    URLClick.add_clicks([('x0', 3)])
+    URLMap.resolve('x1')
+    assert len(purge_expired_batch(2)) == 2
+    purger = ExpiryPurger(interval=0, batch_size=2)
+    report = purger.purge()
+    assert report['purged'] == 3
+    assert count_links() == 2, (
+        'Бессрочные и ещё действующие ссылки удаляться не должны.'
+    )
+    assert URLClick.get_clicks('x0') == 0
+    assert redirect_cache.get('x1') is None, (
+        'Удалённые ссылки должны вычищаться из кэша.'
+    )
+    stats = purger.stats()
+    assert stats['purged'] == 3
+    assert stats['batches'] == 2
+    assert stats['lag_seconds'] >= 60
+
+
+def test_purger_starts_with_first_request(client, monkeypatch):
+    purger = ExpiryPurger(interval=60, batch_size=2)
+    monkeypatch.setattr('yacut.expiry.expiry_purger', purger)
+    assert purger._thread is None, (
+        'Удаление истёкших ссылок не должно запускаться при импорте.'
+    )
+    client.get('/')
+    try:
+        thread = purger._thread
+        assert thread is not None and thread.is_alive(), (
+            'Удаление истёкших ссылок должно запускаться первым запросом.'
+        )
+        client.get('/')
+        assert purger._thread is thread
+        monkeypatch.setattr(os, 'getpid', lambda: -1)
+        purger.start()
+        assert purger._thread is not thread, (
+            'После fork поток удаления должен запускаться заново.'
+        )
+    finally:
+        purger.stop()
+        thread.join()
+
+
+def test_purge_command(_app, cli_runner):
+    add_links(3, datetime.utcnow() - timedelta(minutes=1))
+    result = cli_runner.invoke(args=['urls', 'purge-expired'])
+    assert result.exit_code == 0
+    assert 'Удалено 3 истёкших ссылок' in result.output
+    assert count_links() == 0
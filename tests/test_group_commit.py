@@ -0,0 +1,181 @@
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import func, select
+
+from tests.conftest import PY_URL
+from yacut import db
+from yacut.group_commit import GroupCommitter, group_committer
+from yacut.models import (
+    DUPLICATE_SHORT,
+    INVALID_SHORT,
+    INVALID_URL_FORMAT,
+    URLMap,
+)
+
+CLIENTS = 10
+
+
+def submit_concurrently(submit, items):
+    barrier = threading.Barrier(len(items))
+    outcomes = [None] * len(items)
+
+    def worker(index):
+        barrier.wait()
+        try:
+            outcomes[index] = submit(items[index])
+        except Exception as error:
+            outcomes[index] = error
+
+    threads = [
+        threading.Thread(target=worker, args=(index,))
+        for index in range(len(items))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def test_committer_batches_and_routes_results():
+    batches = []
+
+    def apply(items):
+        batches.append(items)
+        return [
+            ValueError(item) if item % 2 else item * 10 for item in items
+        ]
+
+    committer = GroupCommitter(apply, window=0.05, max_batch=100)
+    outcomes = submit_concurrently(committer.submit, list(range(CLIENTS)))
+    assert len(batches) < CLIENTS, (
+        'Одновременные операции должны объединяться в общую пачку.'
+    )
+    for item, outcome in enumerate(outcomes):
+        if item % 2:
+            assert isinstance(outcome, ValueError)
+        else:
+            assert outcome == item * 10, (
+                'Каждый ожидающий поток должен получить свой результат.'
+            )
+
+
+def test_committer_respects_max_batch():
+    batches = []
+
+    def apply(items):
+        batches.append(len(items))
+        return items
+
+    committer = GroupCommitter(apply, window=0.05, max_batch=3)
+    submit_concurrently(committer.submit, list(range(CLIENTS)))
+    assert max(batches) <= 3
+    assert sum(batches) == CLIENTS
+
+
+def test_committer_failure_reaches_everyone():
+    def apply(items):
+        raise RuntimeError('сбой')
+
+    committer = GroupCommitter(apply, window=0.01, max_batch=100)
+    outcomes = submit_concurrently(committer.submit, [1, 2, 3])
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+
+
+def test_committer_does_not_wait_for_full_batch():
+    committer = GroupCommitter(lambda items: items, window=0.01,
+                               max_batch=100)
+    started = time.monotonic()
+    assert committer.submit('one') == 'one'
+    assert time.monotonic() - started < 1
+
+
+@pytest.fixture
+def group_mode(_app, file_db):
+    _app.config['GROUP_COMMIT_ENABLED'] = True
+    yield _app
+    _app.config['GROUP_COMMIT_ENABLED'] = False
+
+
+def test_api_group_commit(group_mode):
+    batches_before = group_committer.batches
+    payloads = [{'url': f'{PY_URL}/{index}'} for index in range(CLIENTS)]
+    payloads += [{'url': PY_URL, 'custom_id': 'same'}] * 2
+
+    def post(payload):
+        return group_mode.test_client().post('/api/id/', json=payload)
+
+    responses = submit_concurrently(post, payloads)
+    statuses = [response.status_code for response in responses]
+    assert statuses[:CLIENTS] == [HTTPStatus.CREATED] * CLIENTS
+    assert sorted(statuses[CLIENTS:]) == [
+        HTTPStatus.CREATED, HTTPStatus.BAD_REQUEST
+    ], (
+        'Из двух запросов с одинаковым идентификатором в одной пачке '
+        'должен выполниться только один.'
+    )
+    assert DUPLICATE_SHORT in [
+        response.json.get('message') for response in responses[CLIENTS:]
+    ]
+    assert group_committer.batches - batches_before < len(payloads)
+    assert db.session.scalar(
+        select(func.count(URLMap.id))
+    ) == CLIENTS + 1
+
+
+def test_api_group_commit_deduplicates(group_mode, monkeypatch):
+    monkeypatch.setitem(group_mode.config, 'DEDUPLICATE_URLS', True)
+    existing = URLMap.create(PY_URL)
+
+    def post(payload):
+        return group_mode.test_client().post('/api/id/', json=payload)
+
+    responses = submit_concurrently(
+        post, [{'url': PY_URL}] * 3 + [{'url': f'{PY_URL}/new'}] * 3
+    )
+    assert all(
+        response.status_code == HTTPStatus.CREATED for response in responses
+    )
+    links = [response.json['short_link'] for response in responses]
+    assert [link.rsplit('/', 1)[-1] for link in links[:3]] == [
+        existing.short
+    ] * 3, (
+        'При групповом коммите дедупликация должна возвращать '
+        'существующую короткую ссылку.'
+    )
+    assert len(set(links[3:])) == 1, (
+        'Одинаковые ссылки одной пачки должны получить одну запись.'
+    )
+    assert db.session.scalar(select(func.count(URLMap.id))) == 2
+
+
+def test_api_group_commit_isolates_bad_items(group_mode):
+    def post(payload):
+        return group_mode.test_client().post('/api/id/', json=payload)
+
+    responses = submit_concurrently(post, [
+        {'url': 'https://good.example'},
+        {'url': PY_URL, 'custom_id': 123},
+        {'url': 5},
+    ])
+    assert responses[0].status_code == HTTPStatus.CREATED, (
+        'Некорректный запрос не должен срывать остальные запросы пачки.'
+    )
+    assert [response.status_code for response in responses[1:]] == [
+        HTTPStatus.BAD_REQUEST
+    ] * 2
+
+
+def test_create_many_reports_wrong_types_per_item(_app):
+    results = URLMap.create_many([
+        (PY_URL, 7), (5, None), ('https://good.example', None),
+    ])
+    assert [str(result) for result in results[:2]] == [
+        INVALID_SHORT, INVALID_URL_FORMAT,
+    ], (
+        'Поля неверного типа должны давать ошибку своей позиции пакета.'
+    )
+    assert isinstance(results[2], str)
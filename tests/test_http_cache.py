@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+import pytest
+
+from tests.conftest import PY_URL
+from yacut.models import URLMap
+
+GET_ORIGINAL_LINK_URL = '/api/id/py/'
+
+
+def test_temporary_redirect_not_cached(client, short_python_url):
+    response = client.get('/py')
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.cache_control.no_cache, (
+        'Временная переадресация не должна кэшироваться.'
+    )
+
+
+@pytest.mark.parametrize('status', [
+    HTTPStatus.MOVED_PERMANENTLY, HTTPStatus.PERMANENT_REDIRECT
+])
+def test_permanent_redirect_cached(client, short_python_url, monkeypatch,
+                                   status):
+    monkeypatch.setitem(client.application.config, 'REDIRECT_STATUS_CODE',
+                        status)
+    monkeypatch.setitem(client.application.config, 'REDIRECT_MAX_AGE', 600)
+    response = client.get('/py')
+    assert response.status_code == status
+    assert response.location == short_python_url.original
+    assert response.cache_control.public
+    assert response.cache_control.max_age == 600, (
+        'Постоянная переадресация должна отдавать `Cache-Control: max-age` '
+        'из настроек.'
+    )
+
+
+def test_permanent_redirect_capped_by_expiry(client, monkeypatch):
+    monkeypatch.setitem(client.application.config, 'REDIRECT_STATUS_CODE',
+                        HTTPStatus.MOVED_PERMANENTLY)
+    monkeypatch.setitem(client.application.config, 'REDIRECT_MAX_AGE', 600)
+    URLMap.create(PY_URL, 'soon', expires_at=(
+        datetime.utcnow() + timedelta(seconds=60)
+    ))
+    response = client.get('/soon')
+    assert response.status_code == HTTPStatus.MOVED_PERMANENTLY
+    assert 0 < response.cache_control.max_age <= 60, (
+        'Постоянная переадресация не должна кэшироваться дольше срока '
+        'действия ссылки.'
+    )
+
+
+def test_lookup_conditional_get(client, short_python_url):
+    response = client.get(GET_ORIGINAL_LINK_URL)
+    etag = response.headers.get('ETag')
+    assert etag and not etag.startswith('W/'), (
+        'Ответ с оригинальной ссылкой должен содержать строгий `ETag`.'
+    )
+    cached = client.get(
+        GET_ORIGINAL_LINK_URL, headers={'If-None-Match': etag}
+    )
+    assert cached.status_code == HTTPStatus.NOT_MODIFIED, (
+        'При совпадении `If-None-Match` с `ETag` должен вернуться статус '
+        f'{HTTPStatus.NOT_MODIFIED.value}.'
+    )
+    assert not cached.data
+    stale = client.get(
+        GET_ORIGINAL_LINK_URL, headers={'If-None-Match': '"other"'}
+    )
+    assert stale.status_code == HTTPStatus.OK
@@ -0,0 +1,105 @@
+import json
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import event, insert
+
+from tests.conftest import TEST_BASE_URL
+from yacut import db
+from yacut.models import URLMap
+
+LIST_URL = '/api/ids/'
+EXPORT_URL = '/api/ids/export/'
+LINKS = 7
+
+
+@pytest.fixture
+def links(_app):
+    moment = datetime(2024, 1, 1)
+    # У части ссылок одинаковое время: порядок между ними задаёт id
+    db.session.execute(insert(URLMap), [
+        {'original': f'https://example.com/{index}', 'short': f'l{index}',
+         'timestamp': moment + timedelta(minutes=index // 2)}
+        for index in range(LINKS)
+    ])
+    db.session.commit()
+    return [f'l{index}' for index in range(LINKS)]
+
+
+def test_list_pages_through_all_links(client, links):
+    shorts, cursor, pages = [], None, 0
+    while True:
+        response = client.get(LIST_URL, query_string={
+            'limit': 3, **({'cursor': cursor} if cursor else {}),
+        })
+        assert response.status_code == HTTPStatus.OK
+        shorts += [item['short'] for item in response.json['items']]
+        pages += 1
+        cursor = response.json['next_cursor']
+        if cursor is None:
+            break
+    assert shorts == links, (
+        'Постраничный список должен вернуть все ссылки ровно по одному '
+        'разу в порядке (timestamp, id).'
+    )
+    assert pages == 3
+
+
+def test_list_item_format(client, links):
+    item = client.get(LIST_URL, query_string={'limit': 1}).json['items'][0]
+    assert item == {
+        'url': 'https://example.com/0',
+        'short': 'l0',
+        'short_link': f'{TEST_BASE_URL}/l0',
+        'timestamp': '2024-01-01T00:00:00',
+    }
+
+
+def test_list_uses_keyset_condition(client, links):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    cursor = client.get(
+        LIST_URL, query_string={'limit': 2}
+    ).json['next_cursor']
+    client.get(LIST_URL, query_string={'limit': 2, 'cursor': cursor})
+    event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    assert 'url_map.timestamp >' in statements[-1], (
+        'Следующая страница должна выбираться условием по ключу '
+        '(timestamp, id), а не смещением.'
+    )
+
+
+@pytest.mark.parametrize('query', [
+    {'cursor': 'not-a-cursor'}, {'limit': 0}, {'limit': 100_000},
+])
+def test_list_rejects_bad_parameters(client, query):
+    response = client.get(LIST_URL, query_string=query)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert 'message' in response.json
+
+
+def test_export_streams_ndjson(client, links):
+    response = client.get(EXPORT_URL)
+    assert response.status_code == HTTPStatus.OK
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed, (
+        'Выгрузка должна отдаваться генератором, а не собираться в памяти.'
+    )
+    lines = response.get_data(as_text=True).splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [record['short'] for record in records] == links
+
+
+def test_export_resumes_from_cursor(client, links):
+    cursor = client.get(
+        LIST_URL, query_string={'limit': 4}
+    ).json['next_cursor']
+    lines = client.get(
+        EXPORT_URL, query_string={'cursor': cursor}
+    ).get_data(as_text=True).splitlines()
+    assert [json.loads(line)['short'] for line in lines] == links[4:]
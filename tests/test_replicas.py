@@ -0,0 +1,102 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import create_engine, insert
+
+from tests.conftest import PY_URL
+from yacut import db, redirect_cache
+from yacut.models import URLMap, replica_router
+
+PRIMARY_URL = 'https://primary.example.com'
+
+
+@pytest.fixture
+def replicas(_app, tmp_path):
+    """Две реплики основной базы в файлах SQLite."""
+    keys = ['replica_0', 'replica_1']
+    for key in keys:
+        db.engines[key] = create_engine(f'sqlite:///{tmp_path / key}.sqlite3')
+        db.metadata.create_all(db.engines[key], tables=[URLMap.__table__])
+    replica_router.clear()
+    replica_router.replicas = keys
+    yield keys
+    replica_router.replicas = []
+    replica_router.clear()
+    for key in keys:
+        db.engines.pop(key).dispose()
+
+
+def add_link(engine, short, original):
+    with engine.begin() as connection:
+        connection.execute(insert(URLMap).values(
+            original=original, original_hash='', short=short
+        ))
+
+
+def redirect_location(client, short):
+    redirect_cache.clear()
+    return client.get(f'/{short}').headers.get('Location')
+
+
+def test_lookups_are_balanced_across_replicas(client, replicas):
+    add_link(db.engine, 'py', PRIMARY_URL)
+    for key in replicas:
+        add_link(db.engines[key], 'py', f'https://{key}.example.com')
+    locations = [redirect_location(client, 'py') for _ in range(4)]
+    assert locations == [
+        'https://replica_0.example.com',
+        'https://replica_1.example.com',
+    ] * 2, (
+        'Переадресация должна читать ссылку с реплик по очереди.'
+    )
+    assert client.get('/api/id/py/').json['url'] != PRIMARY_URL
+
+
+def test_new_link_is_read_from_primary(client, replicas):
+    response = client.post('/api/id/', json={'url': PY_URL})
+    short = response.json['short_link'].rsplit('/', 1)[-1]
+    primary_reads = replica_router.primary_reads
+    assert redirect_location(client, short) == PY_URL, (
+        'Только что созданная ссылка должна читаться с основной базы, '
+        'пока реплики её не получили.'
+    )
+    assert replica_router.primary_reads == primary_reads + 1
+
+
+def test_replica_miss_falls_back_to_primary(client, replicas):
+    # Ссылку создал другой процесс, и до реплик она ещё не дошла
+    add_link(db.engine, 'lag', PRIMARY_URL)
+    assert redirect_location(client, 'lag') == PRIMARY_URL
+    assert replica_router.fallbacks == 1
+
+
+def test_failed_replica_is_skipped(client, replicas, tmp_path):
+    db.engines['replica_0'].dispose()
+    db.engines['replica_0'] = create_engine(
+        f'sqlite:///{tmp_path / "missing" / "replica.sqlite3"}'
+    )
+    add_link(db.engine, 'py', PRIMARY_URL)
+    add_link(db.engines['replica_1'], 'py', PY_URL)
+    locations = [redirect_location(client, 'py') for _ in range(4)]
+    assert locations[0] == PRIMARY_URL, (
+        'При ошибке реплики ссылка должна читаться с основной базы.'
+    )
+    assert locations[1:] == [PY_URL] * 3, (
+        'Недоступная реплика должна пропускаться до истечения '
+        'REPLICA_RETRY_INTERVAL.'
+    )
+    stats = client.get('/api/metrics/').json['replicas']['replicas']
+    assert stats['replica_0'] == {
+        'healthy': False, 'reads': 1, 'failures': 1,
+    }
+
+
+def test_uniqueness_is_checked_on_primary(
+    client, replicas, duplicated_custom_id_msg
+):
+    add_link(db.engine, 'taken', PRIMARY_URL)
+    response = client.post(
+        '/api/id/', json={'url': PY_URL, 'custom_id': 'taken'}
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json['message'] == duplicated_custom_id_msg
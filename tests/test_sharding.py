@@ -0,0 +1,267 @@
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+
+from tests.conftest import PY_URL
+from tests.test_asgi import call
+from yacut import db, redirect_cache, short_filter
+from yacut.asgi import RedirectApplication
+from yacut.expiry import expiry_purger
+from yacut.models import URLMap
+from yacut.sharding import shard_for
+
+LINKS = 30
+
+
+@pytest.fixture
+def use_shards(_app, tmp_path):
+    """Включает шардирование `url_map` на `count` файловых баз SQLite."""
+    engines = db.engines
+
+    def use(count):
+        db.session.remove()
+        keys = [f'url_map_{number}' for number in range(count)]
+        for key in keys:
+            if key not in engines:
+                engines[key] = create_engine(
+                    f'sqlite:///{tmp_path / key}.sqlite3'
+                )
+                db.metadata.create_all(
+                    engines[key], tables=[URLMap.__table__]
+                )
+        _app.config['URL_MAP_SHARDS'] = keys
+        return keys
+
+    yield use
+    db.session.remove()
+    _app.config['URL_MAP_SHARDS'] = []
+    for key in [key for key in engines if key is not None]:
+        engines.pop(key).dispose()
+
+
+def shard_rows(key):
+    with db.engines[key].connect() as connection:
+        return dict(connection.execute(
+            select(URLMap.short, URLMap.original)
+        ).all())
+
+
+def assert_rows_in_owning_shards(keys, expected):
+    found = {}
+    for key in keys:
+        rows = shard_rows(key)
+        assert all(shard_for(short, keys) == key for short in rows), (
+            'Каждая ссылка должна храниться в шарде, выбранном по хэшу '
+            'короткой ссылки.'
+        )
+        found.update(rows)
+    assert found == expected
+
+
+def shorts_in_shard(key, keys, prefix):
+    return [
+        f'{prefix}{number}' for number in range(500)
+        if shard_for(f'{prefix}{number}', keys) == key
+    ]
+
+
+def forget_cached_links():
+    db.session.expunge_all()
+    redirect_cache.clear()
+    short_filter.clear()
+
+
+def test_links_are_stored_in_owning_shards(client, use_shards):
+    keys = use_shards(3)
+    expected = {}
+    for number in range(LINKS):
+        response = client.post('/api/id/', json={'url': f'{PY_URL}/{number}'})
+        assert response.status_code == HTTPStatus.CREATED
+        expected[response.json['short_link'].rsplit('/', 1)[-1]] = (
+            f'{PY_URL}/{number}'
+        )
+    assert_rows_in_owning_shards(keys, expected)
+    assert sum(1 for key in keys if shard_rows(key)) > 1
+    assert db.session.scalar(select(func.count(URLMap.id))) == 0, (
+        'При шардировании ссылки не должны попадать в основную базу.'
+    )
+
+
+def test_lookup_routes_to_owning_shard(client, use_shards):
+    use_shards(3)
+    URLMap.create(PY_URL, 'abc')
+    forget_cached_links()
+    assert client.get('/abc').headers['Location'] == PY_URL
+    assert client.get('/api/id/abc/').json == {'url': PY_URL}
+    assert client.get('/api/id/nope/').status_code == HTTPStatus.NOT_FOUND
+    forget_cached_links()
+    assert URLMap.find('abc').original == PY_URL
+
+
+async def test_asgi_resolves_from_owning_shard(_app, use_shards, monkeypatch):
+    keys = use_shards(3)
+    URLMap.create(PY_URL, 'abc')
+    forget_cached_links()
+    monkeypatch.setitem(_app.config, 'SQLALCHEMY_BINDS', {
+        key: str(db.engines[key].url) for key in keys
+    })
+    application = RedirectApplication(_app)
+    status, headers, _ = await call(application, '/abc')
+    missing_status, _, _ = await call(application, '/nope')
+    await application.shutdown()
+    assert status == HTTPStatus.FOUND
+    assert headers[b'location'] == PY_URL.encode()
+    assert missing_status == HTTPStatus.NOT_FOUND
+
+
+def test_duplicate_custom_short_rejected(
+    client, use_shards, duplicated_custom_id_msg
+):
+    use_shards(3)
+    URLMap.create(PY_URL, 'taken')
+    forget_cached_links()
+    response = client.post(
+        '/api/id/', json={'url': PY_URL, 'custom_id': 'taken'}
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json['message'] == duplicated_custom_id_msg
+
+
+def test_same_id_in_different_shards(_app, use_shards):
+    keys = use_shards(2)
+    first = shorts_in_shard(keys[0], keys, 'id')[0]
+    second = shorts_in_shard(keys[1], keys, 'id')[0]
+    URLMap.create(f'{PY_URL}/1', first)
+    URLMap.create(f'{PY_URL}/2', second)
+    forget_cached_links()
+    first_map, second_map = URLMap.find(first), URLMap.find(second)
+    assert first_map.id == second_map.id == 1
+    assert first_map is not second_map, (
+        'Записи разных шардов с одинаковым id не должны совпадать '
+        'в сессии.'
+    )
+    assert (first_map.original, second_map.original) == (
+        f'{PY_URL}/1', f'{PY_URL}/2'
+    )
+
+
+def test_bulk_create_fans_out(client, use_shards):
+    keys = use_shards(3)
+    URLMap.create(PY_URL, 'taken')
+    response = client.post('/api/ids/', json=[
+        {'url': f'{PY_URL}/{number}'} for number in range(LINKS)
+    ] + [{'url': PY_URL, 'custom_id': 'taken'}])
+    assert response.status_code == HTTPStatus.CREATED
+    results = response.json
+    assert 'message' in results[-1]
+    expected = {'taken': PY_URL}
+    for number, result in enumerate(results[:-1]):
+        expected[result['short_link'].rsplit('/', 1)[-1]] = (
+            f'{PY_URL}/{number}'
+        )
+    assert_rows_in_owning_shards(keys, expected)
+
+
+def test_listing_merges_shards(client, use_shards):
+    keys = use_shards(3)
+    moment = datetime(2024, 1, 1)
+    # В каждом шарде одинаковые id и одинаковое время создания
+    expected = []
+    for key in keys:
+        shorts = shorts_in_shard(key, keys, 's')[:3]
+        with db.engines[key].begin() as connection:
+            connection.execute(insert(URLMap), [
+                {'original': PY_URL, 'original_hash': '', 'short': short,
+                 'timestamp': moment}
+                for short in shorts
+            ])
+        expected += shorts
+    listed, cursor = [], None
+    while True:
+        page = client.get('/api/ids/', query_string={
+            'limit': 2, **({'cursor': cursor} if cursor else {}),
+        }).json
+        listed += [item['short'] for item in page['items']]
+        if (cursor := page['next_cursor']) is None:
+            break
+    assert listed == expected, (
+        'Постраничный список должен вернуть ссылки всех шардов ровно '
+        'по одному разу.'
+    )
+    exported = client.get('/api/ids/export/').get_data(as_text=True)
+    assert len(exported.splitlines()) == len(expected)
+
+
+def test_purge_expired_in_all_shards(_app, use_shards):
+    keys = use_shards(3)
+    for number in range(LINKS):
+        URLMap.create(f'{PY_URL}/{number}', f'e{number}')
+    for key in keys:
+        with db.engines[key].begin() as connection:
+            connection.execute(
+                URLMap.__table__.update().values(
+                    expires_at=datetime.utcnow() - timedelta(minutes=1)
+                )
+            )
+    assert expiry_purger.purge()['purged'] == LINKS
+    assert not any(shard_rows(key) for key in keys)
+
+
+def test_rebalance_after_adding_shard(_app, use_shards, cli_runner):
+    use_shards(2)
+    expected = {}
+    for number in range(LINKS):
+        short = URLMap.create(f'{PY_URL}/{number}').short
+        expected[short] = f'{PY_URL}/{number}'
+    keys = use_shards(3)
+    result = cli_runner.invoke(args=['urls', 'rebalance'])
+    assert result.exit_code == 0, result.output
+    assert f'Проверено {LINKS} записей' in result.output
+    assert_rows_in_owning_shards(keys, expected)
+    forget_cached_links()
+    assert all(
+        URLMap.resolve(short) == original
+        for short, original in expected.items()
+    )
+
+
+def test_rebalance_after_removing_shard(_app, use_shards, cli_runner):
+    use_shards(3)
+    expected = {}
+    for number in range(LINKS):
+        short = URLMap.create(f'{PY_URL}/{number}').short
+        expected[short] = f'{PY_URL}/{number}'
+    removed = str(db.engines['url_map_2'].url)
+    keys = use_shards(2)
+    result = cli_runner.invoke(
+        args=['urls', 'rebalance', '--source', removed]
+    )
+    assert result.exit_code == 0, result.output
+    assert_rows_in_owning_shards(keys, expected)
+    assert not shard_rows('url_map_2'), (
+        'Из убранного шарда должны быть перенесены все ссылки.'
+    )
+
+
+def test_rebalance_keeps_conflicting_rows(_app, use_shards, cli_runner):
+    keys = use_shards(2)
+    short = shorts_in_shard(keys[1], keys, 'c')[0]
+    for key, original in zip(keys, (f'{PY_URL}/old', f'{PY_URL}/new')):
+        with db.engines[key].begin() as connection:
+            connection.execute(insert(URLMap).values(
+                original=original, original_hash='', short=short
+            ))
+    result = cli_runner.invoke(args=['urls', 'rebalance'])
+    assert result.exit_code == 0
+    assert short in result.output
+    assert shard_rows(keys[0]) == {short: f'{PY_URL}/old'}, (
+        'Ссылка, занятая в целевом шарде другой записью, должна '
+        'остаться на месте.'
+    )
+
+
+def test_rebalance_requires_shards(cli_runner, _app):
+    result = cli_runner.invoke(args=['urls', 'rebalance'])
+    assert result.exit_code != 0
@@ -0,0 +1,91 @@
+import multiprocessing
+import struct
+from datetime import datetime
+
+import pytest
+
+from tests.conftest import PY_URL
+from yacut.models import _pack_row, _unpack_row
+from yacut.shared_cache import SharedCache
+
+KEY_SIZE = 16
+VALUE_SIZE = 128
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'shared.cache')
+
+
+def _write_in_child(path):
+    cache = SharedCache(path, 64, KEY_SIZE, VALUE_SIZE)
+    cache.set('child', b'from-child')
+    cache.close()
+
+
+def test_shared_between_instances(cache_path):
+    writer = SharedCache(cache_path, 64, KEY_SIZE, VALUE_SIZE)
+    reader = SharedCache(cache_path, 64, KEY_SIZE, VALUE_SIZE)
+    writer.set('py', b'value')
+    assert reader.get('py') == b'value', (
+        'Запись разделяемого кэша должна быть видна другим экземплярам, '
+        'открывшим тот же файл.'
+    )
+    writer.invalidate('py')
+    assert reader.get('py') is None
+
+
+def test_shared_between_processes(cache_path):
+    cache = SharedCache(cache_path, 64, KEY_SIZE, VALUE_SIZE)
+    process = multiprocessing.get_context('fork').Process(
+        target=_write_in_child, args=(cache_path,)
+    )
+    process.start()
+    process.join()
+    assert cache.get('child') == b'from-child', (
+        'Запись, сделанная другим процессом, должна читаться из '
+        'разделяемого кэша.'
+    )
+
+
+def test_survives_reopen_and_evicts(cache_path):
+    cache = SharedCache(cache_path, 4, KEY_SIZE, VALUE_SIZE)
+    for index in range(10):
+        assert cache.set(f'key{index}', b'x')
+    assert cache.get('key9') == b'x'
+    assert cache.set('big', b'x' * (VALUE_SIZE + 1)) is False
+    cache.close()
+    reopened = SharedCache(cache_path, 4, KEY_SIZE, VALUE_SIZE)
+    assert reopened.get('key9') == b'x', (
+        'После перезапуска процесса разделяемый кэш не должен быть пустым.'
+    )
+    resized = SharedCache(cache_path, 8, KEY_SIZE, VALUE_SIZE)
+    assert resized.get('key9') is None
+
+
+def test_torn_slot_is_overwritten(cache_path):
+    cache = SharedCache(cache_path, 64, KEY_SIZE, VALUE_SIZE)
+    cache.set('py', b'value')
+    index = next(cache._probe(b'py'))
+    offset = cache._offset(index)
+    # Процесс умер между записями заголовка: версия осталась нечётной
+    version = struct.unpack_from('<I', cache._map, offset)[0]
+    struct.pack_into('<I', cache._map, offset, version + 1)
+    cache.close()
+    reopened = SharedCache(cache_path, 64, KEY_SIZE, VALUE_SIZE)
+    assert reopened.get('py') is None
+    assert reopened.set('py', b'fresh'), (
+        'Слот с оборванной записью должен перезаписываться.'
+    )
+    assert reopened.get('py') == b'fresh'
+    reopened.invalidate('py')
+    assert reopened.get('py') is None
+
+def test_row_roundtrip():
+    row = (
+        7, PY_URL, 'py', datetime(2024, 1, 2, 3, 4, 5, 678901),
+        datetime(2030, 1, 1),
+    )
+    assert _unpack_row('py', _pack_row(row)) == row
+    unpacked = _unpack_row('py', _pack_row((1, PY_URL, 'py', None, None)))
+    assert unpacked[3] is None and unpacked[4] is None
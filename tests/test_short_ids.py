@@ -0,0 +1,77 @@
+import pytest
+
+from tests.conftest import PY_URL
+from yacut import db
+from yacut.constants import (
+    DEFAULT_SHORT_LENGTH,
+    SHORT_CHARS,
+    SHORT_SEQUENCE_NAME,
+)
+from yacut.models import ShortSequence, URLMap, sequence_allocator
+from yacut.short_ids import PERMUTATION_DOMAIN, encode_base62, permute
+
+
+@pytest.fixture
+def sequence_mode(_app):
+    _app.config.update(SHORT_ID_MODE='sequence', SHORT_ID_BLOCK_SIZE=10)
+    sequence_allocator.reset()
+    yield _app
+    _app.config.update(SHORT_ID_MODE='random', SHORT_ID_BLOCK_SIZE=1000)
+    sequence_allocator.reset()
+
+
+def test_encode_base62():
+    first, second, last = SHORT_CHARS[0], SHORT_CHARS[1], SHORT_CHARS[-1]
+    assert encode_base62(0) == first * 6
+    assert encode_base62(61) == first * 5 + last
+    assert encode_base62(62) == first * 4 + second + first
+    assert len(encode_base62(PERMUTATION_DOMAIN)) == DEFAULT_SHORT_LENGTH + 1
+
+
+def test_permute_is_bijection():
+    values = [permute(value, b'key') for value in range(5000)]
+    assert len(set(values)) == len(values), (
+        'Перестановка должна давать разные значения для разных номеров.'
+    )
+    assert all(0 <= value < PERMUTATION_DOMAIN for value in values)
+    assert values != list(range(5000))
+    assert values != [permute(value, b'other') for value in range(5000)]
+
+
+def test_sequence_shorts_are_unique(sequence_mode):
+    shorts = [URLMap.get_unique_short() for _ in range(35)]
+    assert len(set(shorts)) == len(shorts)
+    assert all(len(short) == DEFAULT_SHORT_LENGTH for short in shorts)
+    assert db.session.get(
+        ShortSequence, SHORT_SEQUENCE_NAME
+    ).next_value == 40, (
+        'Номера должны резервироваться в базе данных блоками.'
+    )
+
+
+def test_sequence_skips_taken_short(sequence_mode):
+    sequence_mode.config['SHORT_ID_PERMUTE'] = False
+    try:
+        URLMap.create(PY_URL, encode_base62(0))
+        assert URLMap.get_unique_short() == encode_base62(1)
+    finally:
+        sequence_mode.config['SHORT_ID_PERMUTE'] = True
+
+
+def test_sequence_create_is_single_insert(sequence_mode, queries):
+    URLMap.create(PY_URL)
+    for number in range(5):
+        queries.clear()
+        URLMap.create(f'{PY_URL}/{number}')
+        assert len(queries) == 1 and queries[0].startswith('INSERT'), (
+            'Внутри зарезервированного блока создание ссылки должно '
+            f'выполнять только INSERT, получено: {queries}'
+        )
+
+
+def test_api_uses_sequence(sequence_mode, client):
+    response = client.post('/api/id/', json={'url': PY_URL})
+    assert response.status_code == 201
+    assert len(response.json['short_link'].rsplit('/', 1)[-1]) == (
+        DEFAULT_SHORT_LENGTH
+    )
@@ -0,0 +1,96 @@
+import time
+
+from sqlalchemy import event
+
+from tests.conftest import PY_URL
+from yacut import db
+from yacut.models import URLMap, short_pool
+from yacut.short_ids import ShortPool
+
+
+def make_pool(size=4, batch_size=2):
+    counter = iter(range(10_000))
+    return ShortPool(
+        lambda count: [f's{next(counter)}' for _ in range(count)],
+        size,
+        batch_size,
+    )
+
+
+def test_pool_pops_in_order():
+    pool = make_pool()
+    pool.refill()
+    assert pool.stats()['depth'] == 4
+    assert pool.stats()['refills'] == 2, (
+        'Запас должен пополняться пачками по `batch_size`.'
+    )
+    assert pool.pop() == 's0'
+    assert pool.pop() == 's1'
+
+
+def test_pool_refills_in_background():
+    pool = make_pool()
+    assert pool.pop() is None, (
+        'Пустой запас должен сразу возвращать None, не дожидаясь пополнения.'
+    )
+    deadline = time.monotonic() + 5
+    while pool.stats()['depth'] < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stats = pool.stats()
+    assert stats['depth'] == 4
+    assert stats['dry_pops'] == 1
+
+
+def test_disabled_pool():
+    pool = make_pool(size=0)
+    assert pool.pop() is None
+    assert pool.stats()['refills'] == 0
+
+
+def test_pool_reset_after_fork():
+    pool = make_pool()
+    pool.refill()
+    pool._pid = -1
+    assert pool.pop() is None, (
+        'После fork запас родительского процесса использовать нельзя.'
+    )
+
+
+def test_create_takes_short_from_pool(_app):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    short_pool.size = 5
+    try:
+        short_pool.refill()
+        pooled = list(short_pool._shorts)
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        url_map = URLMap.create(PY_URL)
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    finally:
+        short_pool.size = 0
+        short_pool.clear()
+    assert url_map.short == pooled[0]
+    assert all(statement.startswith('INSERT') for statement in statements)
+
+
+def test_take_unique_shorts_prefers_pool(_app, queries):
+    short_pool.size = 3
+    try:
+        short_pool.refill()
+        pooled = list(short_pool._shorts)
+        queries.clear()
+        taken = URLMap.take_unique_shorts(2)
+        assert taken == pooled[:2]
+        assert not queries, (
+            'Идентификаторы из запаса должны выдаваться без обращения '
+            'к базе данных.'
+        )
+        more = URLMap.take_unique_shorts(4)
+    finally:
+        short_pool.size = 0
+        short_pool.clear()
+    assert more[0] == pooled[2]
+    assert len(set(taken + more)) == 6
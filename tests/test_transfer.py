@@ -0,0 +1,114 @@
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+from tests.conftest import PY_URL
+from yacut import db
+from yacut.models import DUPLICATE_SHORT, URLMap
+from yacut.transfer import FORMAT_CSV, import_urls, read_records
+
+
+def count_links():
+    return db.session.scalar(select(func.count(URLMap.id)))
+
+
+def write_ndjson(path, records):
+    path.write_text(
+        ''.join(json.dumps(record) + '\n' for record in records),
+        encoding='utf-8',
+    )
+
+
+def test_import_ndjson(_app, cli_runner, tmp_path, short_python_url):
+    source = tmp_path / 'links.ndjson'
+    write_ndjson(source, [
+        {'original': 'https://example.com/1', 'short': 'one'},
+        {'original': 'https://example.com/2'},
+        {'original': 'not a url', 'short': 'bad'},
+        {'original': 'https://example.com/4', 'short': 'py'},
+        {'original': 'https://example.com/5', 'short': 'one'},
+        {'original': 'https://example.com/6', 'short': 'bad short!'},
+    ])
+    result = cli_runner.invoke(args=[
+        'urls', 'import', str(source), '--chunk-size', '2',
+    ])
+    assert result.exit_code == 0, result.output
+    assert 'Импортировано 2 записей, отклонено 4' in result.output
+    assert f'Запись 4: {DUPLICATE_SHORT}' in result.output, (
+        'Импорт должен сообщать номер и причину отклонения записи.'
+    )
+    assert 'записей/с' in result.output
+    assert count_links() == 3
+    assert URLMap.find('one').original == 'https://example.com/1'
+    assert not (tmp_path / 'links.ndjson.checkpoint').exists(), (
+        'После успешного импорта контрольная точка должна удаляться.'
+    )
+
+
+def test_import_resumes_from_checkpoint(_app, cli_runner, tmp_path):
+    source = tmp_path / 'links.csv'
+    source.write_text(
+        'original,short\n'
+        + ''.join(f'https://example.com/{index},s{index}\n'
+                  for index in range(5)),
+        encoding='utf-8',
+    )
+    (tmp_path / 'links.csv.checkpoint').write_text('3')
+    result = cli_runner.invoke(args=['urls', 'import', str(source)])
+    assert result.exit_code == 0, result.output
+    assert 'Продолжение импорта с записи 4' in result.output
+    assert sorted(db.session.scalars(select(URLMap.short))) == ['s3', 's4']
+
+
+def test_import_saves_checkpoint_after_each_chunk(_app, tmp_path):
+    records = [
+        {'original': f'https://example.com/{index}'} for index in range(5)
+    ]
+    checkpoints = []
+    import_urls(records, 2, on_chunk=lambda report: checkpoints.append(
+        report['processed']
+    ))
+    assert checkpoints == [2, 4, 5]
+    assert count_links() == 5
+
+
+def test_import_interrupted_keeps_committed_chunks(_app, tmp_path):
+    def records():
+        yield {'original': 'https://example.com/1'}
+        yield {'original': 'https://example.com/2'}
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        import_urls(records(), 2)
+    assert count_links() == 2
+
+
+@pytest.mark.parametrize('file_format', ['csv', 'ndjson'])
+def test_export_round_trip(_app, cli_runner, tmp_path, file_format):
+    for index in range(5):
+        URLMap.create(f'{PY_URL}/{index}', f'e{index}')
+    target = tmp_path / f'links.{file_format}'
+    result = cli_runner.invoke(args=[
+        'urls', 'export', str(target), '--chunk-size', '2',
+    ])
+    assert result.exit_code == 0, result.output
+    assert 'Выгружено 5 записей' in result.output
+    with open(target, encoding='utf-8', newline='') as stream:
+        records = list(read_records(stream, file_format))
+    if file_format != FORMAT_CSV:
+        records = [json.loads(record) for record in records]
+    assert [record['short'] for record in records] == [
+        f'e{index}' for index in range(5)
+    ]
+    db.session.execute(URLMap.__table__.delete())
+    db.session.commit()
+    cli_runner.invoke(args=['urls', 'import', str(target)])
+    assert count_links() == 5
+    assert URLMap.find('e3').original == f'{PY_URL}/3'
+
+
+def test_export_to_stdout(_app, cli_runner, short_python_url):
+    result = cli_runner.invoke(args=['urls', 'export', '--format', 'ndjson'])
+    assert result.exit_code == 0
+    assert '"short": "py"' in result.output
@@ -0,0 +1,81 @@
+import asyncio
+import importlib
+from io import BytesIO
+
+import pytest
+
+import settings
+from tests.conftest import generate_png_bytes
+from tests.yandex_disk_mock_server import intercept_requests
+from yacut.services import (
+    FileToUpload,
+    YandexDiskServiceError,
+    upload_files_to_yandex_disk,
+)
+
+LATENCY = 0.02
+
+
+async def upload_streams(app, server, monkeypatch, streams):
+    await intercept_requests(server, monkeypatch)
+    files = [FileToUpload(name, stream) for name, stream in streams.items()]
+
+    def run():
+        with app.app_context():
+            return upload_files_to_yandex_disk(files)
+
+    return await asyncio.get_running_loop().run_in_executor(None, run)
+
+
+async def upload(app, server, monkeypatch, names, concurrency):
+    monkeypatch.setitem(app.config, 'UPLOAD_CONCURRENCY', concurrency)
+    return await upload_streams(app, server, monkeypatch, {
+        # Содержимое различается, иначе одинаковые файлы загрузятся один раз
+        name: BytesIO(generate_png_bytes() + name.encode()) for name in names
+    })
+
+
+@pytest.mark.parametrize('concurrency', [1, 3])
+async def test_uploads_are_bounded_and_ordered(
+    _app, mock_server_factory, monkeypatch, concurrency
+):
+    server, state = mock_server_factory(latency=LATENCY)
+    names = [f'{index}.png' for index in range(6)]
+    results = await upload(_app, server, monkeypatch, names, concurrency)
+    assert [result.filename for result in results] == names, (
+        'Результаты загрузки должны идти в порядке файлов формы.'
+    )
+    assert len({result.short for result in results}) == len(names)
+    assert state.max_active == concurrency, (
+        'Одновременно должно загружаться не больше `UPLOAD_CONCURRENCY` '
+        'файлов.'
+    )
+
+
+async def test_failed_upload_cancels_the_rest(
+    _app, mock_server_factory, monkeypatch
+):
+    server, state = mock_server_factory(
+        latency=LATENCY, fail_names={'b.png'}
+    )
+    with pytest.raises(YandexDiskServiceError):
+        await upload(
+            _app, server, monkeypatch, ['a.png', 'b.png', 'c.png', 'd.png'], 1
+        )
+    assert state.uploaded == ['a.png'], (
+        'После ошибки загрузки одного файла остальные загрузки должны '
+        'отменяться.'
+    )
+
+
+@pytest.mark.parametrize('value', ['0', '-2'])
+def test_concurrency_is_at_least_one(monkeypatch, value):
+    monkeypatch.setenv('UPLOAD_CONCURRENCY', value)
+    try:
+        assert importlib.reload(settings).Config.UPLOAD_CONCURRENCY == 1, (
+            'При `UPLOAD_CONCURRENCY` меньше 1 загрузка должна идти по '
+            'одному файлу, а не зависать.'
+        )
+    finally:
+        monkeypatch.undo()
+        importlib.reload(settings)
@@ -0,0 +1,77 @@
+import asyncio
+import re
+from datetime import datetime, timedelta
+from hashlib import sha256
+from io import BytesIO
+
+from sqlalchemy import select, update
+
+from tests.conftest import generate_png_bytes
+from tests.yandex_disk_mock_server import intercept_requests
+from yacut import db
+from yacut.models import URLMap
+
+FILES_URL = '/files'
+
+
+async def submit(client, files):
+    def post():
+        response = client.post(FILES_URL, data={'files': [
+            (BytesIO(content), name) for name, content in files
+        ]})
+        return re.findall(r'<a href="http://localhost/(\w+)">', (
+            response.get_data(as_text=True)
+        ))
+
+    return await asyncio.get_running_loop().run_in_executor(None, post)
+
+
+async def test_same_content_is_not_uploaded_again(
+    client, mock_server_factory, monkeypatch
+):
+    server, state = mock_server_factory()
+    await intercept_requests(server, monkeypatch)
+    content = generate_png_bytes()
+    first, = await submit(client, [('a.png', content)])
+    second, = await submit(client, [('b.png', content)])
+    assert state.uploaded == ['a.png'], (
+        'Файл с уже загруженным содержимым не должен повторно '
+        'отправляться на Яндекс Диск.'
+    )
+    assert first != second, (
+        'Для повторно загруженного файла должна создаваться новая '
+        'короткая ссылка.'
+    )
+    assert URLMap.resolve(first) == URLMap.resolve(second)
+    assert db.session.scalars(select(URLMap.content_digest)).all() == [
+        sha256(content).hexdigest()
+    ] * 2
+
+
+async def test_duplicates_in_one_form_uploaded_once(
+    client, mock_server_factory, monkeypatch
+):
+    server, state = mock_server_factory()
+    await intercept_requests(server, monkeypatch)
+    content = generate_png_bytes()
+    shorts = await submit(client, [('a.png', content), ('b.png', content)])
+    assert len(set(shorts)) == 2
+    assert state.uploaded == ['a.png']
+    assert URLMap.resolve(shorts[0]) == URLMap.resolve(shorts[1])
+
+
+async def test_expired_link_content_is_uploaded_again(
+    client, mock_server_factory, monkeypatch
+):
+    server, state = mock_server_factory()
+    await intercept_requests(server, monkeypatch)
+    content = generate_png_bytes()
+    await submit(client, [('a.png', content)])
+    db.session.execute(update(URLMap).values(
+        expires_at=datetime.utcnow() - timedelta(minutes=1)
+    ))
+    db.session.commit()
+    await submit(client, [('b.png', content)])
+    assert state.uploaded == ['a.png', 'b.png'], (
+        'Содержимое, ссылка на которое истекла, должно загружаться заново.'
+    )
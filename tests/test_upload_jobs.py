@@ -0,0 +1,171 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from io import BytesIO
+
+import pytest
+
+from tests.conftest import generate_png_bytes
+from tests.yandex_disk_mock_server import intercept_requests
+from yacut import db
+from yacut.models import UploadJob, URLMap
+from yacut.upload_jobs import UploadJobWorkers, upload_workers
+
+FILES_URL = '/files'
+
+
+@pytest.fixture
+def upload_jobs(_app, tmp_path, monkeypatch):
+    """Включает фоновые задачи загрузки без потоков-обработчиков."""
+    monkeypatch.setitem(_app.config, 'UPLOAD_JOBS_ENABLED', True)
+    monkeypatch.setitem(_app.config, 'UPLOAD_SPOOL_DIR', str(tmp_path))
+    return tmp_path
+
+
+def submit(client, *names):
+    response = client.post(FILES_URL, data={'files': [
+        (BytesIO(generate_png_bytes() + name.encode()), name)
+        for name in names
+    ]})
+    assert response.status_code == HTTPStatus.ACCEPTED, (
+        'В режиме фоновых задач форма должна сразу отвечать статусом '
+        f'{HTTPStatus.ACCEPTED.value}.'
+    )
+    return db.session.scalars(
+        db.select(UploadJob).order_by(UploadJob.created_at.desc())
+    ).first()
+
+
+def job_status(client, job_id):
+    # Запросы тестового клиента выполняются в контексте приложения теста,
+    # а задачу обработчик меняет в своей сессии
+    db.session.expire_all()
+    return client.get(f'/api/jobs/{job_id}/').json
+
+
+async def test_job_uploads_files(
+    client, upload_jobs, mock_server_factory, monkeypatch
+):
+    server, state = mock_server_factory()
+    await intercept_requests(server, monkeypatch)
+    job = submit(client, 'a.png', 'b.png')
+    assert not state.uploaded, (
+        'Файлы должны загружаться на Яндекс Диск в фоне, а не при '
+        'обработке формы.'
+    )
+    assert len(list((upload_jobs / job.id).iterdir())) == 2
+    queued = job_status(client, job.id)
+    assert (queued['status'], queued['files']) == ('queued', 2)
+    assert upload_workers.run_pending() == 1
+    done = job_status(client, job.id)
+    assert done['status'] == 'done'
+    assert [item['filename'] for item in done['items']] == ['a.png', 'b.png']
+    short = done['items'][0]['short_link'].rsplit('/', 1)[-1]
+    assert URLMap.resolve(short).startswith(f'http://{server.host}')
+    assert state.uploaded == ['a.png', 'b.png']
+    assert not (upload_jobs / job.id).exists(), (
+        'После выполнения задачи её файлы должны удаляться.'
+    )
+
+
+async def test_failed_job_reports_error(
+    client, upload_jobs, mock_server_factory, monkeypatch
+):
+    server, _ = mock_server_factory(fail_names={'a.png'})
+    await intercept_requests(server, monkeypatch)
+    job = submit(client, 'a.png')
+    upload_workers.run_pending()
+    failed = job_status(client, job.id)
+    assert failed['status'] == 'failed'
+    assert 'Недостаточно свободного места' in failed['message']
+    assert 'items' not in failed
+    assert not (upload_jobs / job.id).exists()
+
+
+def test_job_is_claimed_once(client, upload_jobs):
+    job = submit(client, 'a.png')
+    timeout = upload_workers.timeout
+    assert UploadJob.claim_next(timeout) == job.id
+    assert UploadJob.claim_next(timeout) is None, (
+        'Выполняемая задача не должна выдаваться второму обработчику.'
+    )
+    job = db.session.get(UploadJob, job.id)
+    job.started_at = datetime.utcnow() - timedelta(seconds=timeout + 1)
+    db.session.commit()
+    assert UploadJob.claim_next(timeout) == job.id, (
+        'Задача, брошенная упавшим обработчиком, должна выдаваться снова '
+        'после `UPLOAD_JOB_TIMEOUT`.'
+    )
+
+
+def test_unknown_job(client):
+    response = client.get('/api/jobs/missing/')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json == {'message': 'Задача загрузки не найдена'}
+
+
+async def test_workers_pick_up_new_jobs(
+    client, file_db, upload_jobs, mock_server_factory, monkeypatch
+):
+    server, state = mock_server_factory()
+    await intercept_requests(server, monkeypatch)
+    monkeypatch.setattr(upload_workers, 'workers', 1)
+    upload_workers.start()
+    try:
+        job = submit(client, 'a.png')
+        deadline = time.monotonic() + 5
+        while job_status(client, job.id)['status'] != 'done':
+            assert time.monotonic() < deadline, (
+                'Обработчик должен выполнить новую задачу без ожидания '
+                'периода опроса очереди.'
+            )
+            await asyncio.sleep(0.01)
+    finally:
+        upload_workers.stop()
+    assert state.uploaded == ['a.png']
+
+
+def test_workers_start_with_first_request(client, upload_jobs, monkeypatch):
+    workers = UploadJobWorkers(1, 60, 600, enabled=True)
+    monkeypatch.setattr('yacut.upload_jobs.upload_workers', workers)
+    assert not workers.stats()['workers'], (
+        'Обработчики задач не должны запускаться при импорте приложения.'
+    )
+    client.get('/')
+    try:
+        assert workers.stats()['workers'] == 1, (
+            'Обработчики задач должны запускаться первым запросом процесса.'
+        )
+    finally:
+        workers.stop()
+
+
+def test_disabled_workers_do_not_start(client, monkeypatch):
+    workers = UploadJobWorkers(1, 60, 600, enabled=False)
+    monkeypatch.setattr('yacut.upload_jobs.upload_workers', workers)
+    client.get('/')
+    assert not workers.stats()['workers'], (
+        'Без UPLOAD_JOBS_ENABLED обработчики задач запускаться не должны.'
+    )
+
+
+def test_workers_restart_after_fork(_app, upload_jobs, monkeypatch):
+    workers = UploadJobWorkers(1, 60, 600, enabled=True)
+    workers.ensure_started()
+    try:
+        parent_threads = list(workers._threads)
+        workers.ensure_started()
+        assert workers._threads == parent_threads, (
+            'Повторный вызов не должен создавать новые потоки.'
+        )
+        monkeypatch.setattr(os, 'getpid', lambda: -1)
+        workers.ensure_started()
+        assert workers._threads != parent_threads, (
+            'После fork обработчики задач должны запускаться заново.'
+        )
+    finally:
+        workers.stop()
+        for thread in parent_threads:
+            thread.join()
@@ -0,0 +1,55 @@
+import os
+import threading
+from http import HTTPStatus
+from io import BytesIO
+
+from tests.test_upload_concurrency import upload_streams
+from yacut.upstream import upstream
+
+CHUNK_SIZE = 1024
+
+
+class RecordingStream(BytesIO):
+    """Поток, запоминающий размер самого большого чтения и читавшие его
+    потоки выполнения."""
+
+    largest_read = 0
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.readers = set()
+
+    def read(self, size=-1):
+        self.readers.add(threading.current_thread())
+        chunk = super().read(size)
+        self.largest_read = max(self.largest_read, len(chunk))
+        return chunk
+
+
+async def test_file_is_sent_in_chunks(_app, mock_server_factory, monkeypatch):
+    server, state = mock_server_factory()
+    content = os.urandom(CHUNK_SIZE * 10 + 7)
+    stream = RecordingStream(content)
+    monkeypatch.setitem(_app.config, 'UPLOAD_CHUNK_SIZE', CHUNK_SIZE)
+    await upload_streams(_app, server, monkeypatch, {'big.png': stream})
+    assert state.contents['big.png'] == content, (
+        'Файл должен передаваться на Яндекс Диск без изменений.'
+    )
+    assert stream.largest_read == CHUNK_SIZE, (
+        'Файл должен читаться порциями по `UPLOAD_CHUNK_SIZE` байт, '
+        'а не целиком.'
+    )
+    assert upstream._thread not in stream.readers, (
+        'Файл не должен читаться в потоке цикла событий: блокирующее '
+        'чтение с диска задерживает все остальные запросы к Яндекс Диску.'
+    )
+
+
+def test_too_large_request_rejected(client, monkeypatch):
+    monkeypatch.setitem(client.application.config, 'MAX_CONTENT_LENGTH', 100)
+    response = client.post('/files', data={
+        'files': [(BytesIO(os.urandom(1000)), 'big.png')],
+    })
+    assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE, (
+        'Запрос больше `MAX_CONTENT_LENGTH` должен отклоняться.'
+    )
@@ -0,0 +1,33 @@
+from tests.test_upload_concurrency import upload
+from yacut.upstream import upstream
+
+
+async def test_connections_are_reused(_app, mock_server_factory, monkeypatch):
+    server, _ = mock_server_factory()
+    before = upstream.stats()
+    for _ in range(3):
+        await upload(_app, server, monkeypatch, ['a.png', 'b.png'], 1)
+    stats = upstream.stats()
+    requests = stats['requests'] - before['requests']
+    assert stats['running']
+    assert requests == 3 * 2 * 3
+    assert stats['connections_created'] - before['connections_created'] == 1, (
+        'Последовательные загрузки должны идти через одно соединение '
+        'общей сессии.'
+    )
+    assert (
+        stats['connections_reused'] - before['connections_reused']
+        == requests - 1
+    )
+
+async def test_stop_closes_session(_app, mock_server_factory, monkeypatch):
+    server, _ = mock_server_factory()
+    await upload(_app, server, monkeypatch, ['a.png'], 1)
+    session = upstream._session
+    upstream.stop()
+    assert session.closed, 'При остановке сессия должна закрываться.'
+    assert not upstream.stats()['running']
+    await upload(_app, server, monkeypatch, ['b.png'], 1)
+    assert upstream.stats()['running'], (
+        'После остановки цикл должен запускаться при следующем обращении.'
+    )
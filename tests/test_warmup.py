@@ -0,0 +1,42 @@
+from yacut import db, redirect_cache
+from yacut.models import URLClick, URLMap
+from yacut.warmup import warm_up_cache
+
+
+def create_links(count):
+    for index in range(count):
+        db.session.add(URLMap(
+            original=f'https://example.com/{index}', short=f'w{index}'
+        ))
+    db.session.commit()
+
+
+def test_warm_up_loads_recent_and_hot(_app):
+    create_links(5)
+    URLClick.add_clicks([('w0', 10)])
+    redirect_cache.clear()
+    report = warm_up_cache(limit=2, chunk_size=1, time_budget=10)
+    assert report['entries'] == 3, (
+        'Прогрев должен загрузить последние ссылки и ссылки с наибольшим '
+        'числом переходов.'
+    )
+    assert report['bytes'] > 0 and not report['timed_out']
+    db.session.expunge_all()
+    assert URLMap.find('w0').original == 'https://example.com/0'
+    assert redirect_cache.stats()['hits'] == 1
+
+
+def test_warm_up_respects_time_budget(_app):
+    create_links(3)
+    redirect_cache.clear()
+    report = warm_up_cache(limit=3, chunk_size=1, time_budget=-1)
+    assert report['timed_out'] and report['entries'] == 0, (
+        'Прогрев должен прекращаться по исчерпании лимита времени.'
+    )
+
+
+def test_warm_cache_command(_app, cli_runner):
+    create_links(2)
+    result = cli_runner.invoke(args=['warm-cache', '--limit', '10'])
+    assert result.exit_code == 0
+    assert 'загружено 2 записей' in result.output
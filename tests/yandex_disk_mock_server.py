@@ -1,11 +1,14 @@
 import aiohttp
+import asyncio
 import re
+import threading
 from contextlib import suppress
 from hashlib import md5
 from urllib.parse import unquote, quote
 
 import pytest
 from aiohttp import web
+from aiohttp.test_utils import TestServer
 
 REQUEST_UPLOAD_URL = '/v1/disk/resources/upload'
 UPLOAD_URL = '/upload-target'
@@ -22,12 +25,38 @@ COMMON_ASSERT_MSG_FOR_UPLOAD_FILES = (
 )
 
 
-@pytest.fixture
-async def mock_server(aiohttp_server):
-    """Возвращает мок-сервер для проверки работы с API Я.Диска."""
-    user_calls = set()
+class MockState:
+    """Вызовы мок-сервера и число одновременно обрабатываемых запросов."""
+
+    def __init__(self):
+        self.user_calls = set()
+        self.uploaded = []
+        self.contents = {}
+        self.active = 0
+        self.max_active = 0
+
+
+def create_mock_app(latency: float = 0, fail_names=()):
+    """Создаёт приложение мок-сервера API Я.Диска.
+
+    Каждый ответ задерживается на `latency` секунд, как у настоящего
+    API; загрузка файлов с именами из `fail_names` завершается ошибкой.
+    Возвращает приложение и его состояние `MockState`.
+    """
+    state = MockState()
+    user_calls = state.user_calls
     file_names = {}
 
+    @web.middleware
+    async def track_requests(request, handler):
+        state.active += 1
+        state.max_active = max(state.max_active, state.active)
+        try:
+            await asyncio.sleep(latency)
+            return await handler(request)
+        finally:
+            state.active -= 1
+
     async def check_headers(path, headers):
         assert 'Authorization' in headers, (
             'Убедитесь, что в запросе к эндпоинту Яндекс Диска '
@@ -84,6 +113,14 @@ async def mock_server(aiohttp_server):
             'Убедитесь, что PUT-запрос на загрузку файла на Яндекс Диск '
             'содержит загружаемые данные.'
         )
+        file_name = unquote(file_names[request.url.name])
+        # Приложение добавляет к имени файла префикс с короткой ссылкой
+        if file_name.rsplit('_', 1)[-1] in fail_names:
+            return web.json_response(
+                {'message': 'Недостаточно свободного места'}, status=507
+            )
+        state.uploaded.append(file_name.rsplit('_', 1)[-1])
+        state.contents[file_name.rsplit('_', 1)[-1]] = request_data
         location_header = '/disk/{}'.format(
             quote(file_names[request.url.name])
         )
@@ -133,16 +170,48 @@ async def mock_server(aiohttp_server):
         """Обработчик для любых других запросов."""
         raise AssertionError(COMMON_ASSERT_MSG_FOR_UPLOAD_FILES)
 
-    app = web.Application()
+    app = web.Application(middlewares=[track_requests])
     app.router.add_get(REQUEST_UPLOAD_URL, get_upload_link_handler)
     app.router.add_put(UPLOAD_URL + '/{path_hash}', mock_upload_handler)
     app.router.add_get(DOWNLOAD_LINK_URL, mock_get_download_link_handler)
 
     app.router.add_get('/v1/disk/', disk_info_handler)
     app.router.add_route('*', '/{tail:.*}', catch_all_handler)
+    return app, state
+
+
+@pytest.fixture
+def mock_server_factory():
+    """Запускает мок-сервер API Я.Диска с заданными задержкой и ошибками.
+
+    Сервер работает в отдельном потоке со своим циклом событий, поэтому
+    не зависит от цикла событий теста.
+    """
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    servers = []
+
+    def start(latency: float = 0, fail_names=()):
+        app, state = create_mock_app(latency, fail_names)
+        server = TestServer(app)
+        asyncio.run_coroutine_threadsafe(server.start_server(), loop).result()
+        servers.append(server)
+        return server, state
+
+    yield start
+    for server in servers:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
 
-    server = await aiohttp_server(app)
-    return server, user_calls
+
+@pytest.fixture
+async def mock_server(mock_server_factory):
+    """Возвращает мок-сервер для проверки работы с API Я.Диска."""
+    server, state = mock_server_factory()
+    return server, state.user_calls
 
 
 async def intercept_requests(mock_server, monkeypatch):
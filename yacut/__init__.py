@@ -3,15 +3,55 @@ from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
 from settings import Config
+from yacut import metrics
+from yacut.bloom import BloomFilter, SharedBloomFilter
+from yacut.cache import LRUCache
+from yacut.constants import MAX_SHORT_LENGTH, SHARED_CACHE_VALUE_SIZE
+from yacut.digests import DigestRequest
+from yacut.shared_cache import SharedCache
+from yacut.sharding import ShardedSession
 
 
 app = Flask(__name__)
+app.request_class = DigestRequest
 app.config.from_object(Config)
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={'class_': ShardedSession})
 migrate = Migrate(app, db)
+redirect_cache = LRUCache(
+    app.config['REDIRECT_CACHE_SIZE'],
+    app.config['REDIRECT_CACHE_TTL'],
+)
+shared_cache = SharedCache(
+    app.config['SHARED_CACHE_PATH'],
+    app.config['SHARED_CACHE_SLOTS'],
+    MAX_SHORT_LENGTH,
+    SHARED_CACHE_VALUE_SIZE,
+) if app.config['SHARED_CACHE_PATH'] else None
+short_filter = None
+if app.config['SHORT_FILTER_ENABLED']:
+    short_filter = SharedBloomFilter(
+        app.config['SHORT_FILTER_PATH'],
+        app.config['SHORT_FILTER_CAPACITY'],
+        app.config['SHORT_FILTER_ERROR_RATE'],
+    ) if app.config['SHORT_FILTER_PATH'] else BloomFilter(
+        app.config['SHORT_FILTER_CAPACITY'],
+        app.config['SHORT_FILTER_ERROR_RATE'],
+    )
+
+metrics.register('redirect_cache', redirect_cache.stats)
+if shared_cache is not None:
+    metrics.register('shared_cache', shared_cache.stats)
+if short_filter is not None:
+    metrics.register('short_filter', short_filter.stats)
 
 from yacut.api_views import api_bp  # noqa: E402
-from yacut import error_handlers, views  # noqa: F401
+from yacut import clicks, cli, error_handlers, views  # noqa: F401
+from yacut import expiry  # noqa: E402,F401
+from yacut import upload_jobs  # noqa: E402,F401
+from yacut.warmup import warm_up_on_startup  # noqa: E402
 
 
 app.register_blueprint(api_bp)
+
+if app.config['CACHE_WARMUP_ON_STARTUP']:
+    warm_up_on_startup()
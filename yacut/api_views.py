@@ -1,15 +1,54 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from hashlib import blake2b
 from http import HTTPStatus
 
-from flask import Blueprint, jsonify, request
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+    url_for,
+)
 from wtforms import ValidationError
 
+from yacut import db, metrics
+from yacut.clicks import pending_clicks
+from yacut.constants import (
+    API_MAX_PAGE_SIZE,
+    API_PAGE_SIZE,
+    REDIRECT_VIEW_NAME,
+    STATS_DEFAULT_WINDOWS,
+    STATS_PERIOD_DAY,
+    TRANSFER_CHUNK_SIZE,
+)
 from yacut.error_handlers import APIError
-from yacut.models import URLMap
+from yacut.group_commit import group_committer
+from yacut.models import (
+    INVALID_SHORT,
+    INVALID_URL_FORMAT,
+    UploadJob,
+    URLClick,
+    URLMap,
+    URLStats,
+)
 
 # Сообщения об ошибках API
 NO_REQUEST_BODY = 'Отсутствует тело запроса'
 URL_REQUIRED = '"url" является обязательным полем!'
 ID_NOT_FOUND = 'Указанный id не найден'
+INVALID_STATS_PERIOD = 'Недопустимый период статистики'
+INVALID_STATS_SINCE = 'Недопустимое начало периода статистики'
+BULK_LIST_REQUIRED = 'Тело запроса должно быть непустым списком ссылок'
+BULK_TOO_MANY_ITEMS = 'Слишком много ссылок в одном запросе: больше {limit}'
+INVALID_CURSOR = 'Недопустимый курсор'
+INVALID_EXPIRES_AT = 'Недопустимый срок действия ссылки'
+JOB_NOT_FOUND = 'Задача загрузки не найдена'
+INVALID_LIMIT = f'Размер страницы должен быть от 1 до {API_MAX_PAGE_SIZE}'
 
 # Ключи JSON-ответов
 api_bp = Blueprint('api', __name__, url_prefix='/api')
@@ -27,19 +66,238 @@ def create_url_mapping():
     if not url:
         raise APIError(URL_REQUIRED)
 
+    if (message := _field_type_error(url, data.get('custom_id'))) is not None:
+        raise APIError(message)
+
+    expires_at = None
+    if data.get('expires_at'):
+        expires_at = _parse_datetime(data['expires_at'], INVALID_EXPIRES_AT)
+
     try:
-        return jsonify({
-            'url': url,
-            'short_link': URLMap.create(
-                url, data.get('custom_id')
+        # Пачки группового коммита не переносят срок действия
+        if current_app.config['GROUP_COMMIT_ENABLED'] and not expires_at:
+            short_link = url_for(
+                REDIRECT_VIEW_NAME,
+                short=group_committer.submit((url, data.get('custom_id'))),
+                _external=True,
+            )
+        else:
+            short_link = URLMap.create(
+                url, data.get('custom_id'), expires_at=expires_at
             ).get_short_url()
-        }), HTTPStatus.CREATED
     except ValidationError as error:
         raise APIError(str(error)) from error
+    response = {'url': url, 'short_link': short_link}
+    if expires_at:
+        response['expires_at'] = expires_at.isoformat()
+    return jsonify(response), HTTPStatus.CREATED
+
+
+@api_bp.post('/ids/')
+def create_url_mappings():
+    data = request.get_json(silent=True)
+    if not isinstance(data, list) or not data:
+        raise APIError(BULK_LIST_REQUIRED)
+    limit = current_app.config['BULK_MAX_ITEMS']
+    if len(data) > limit:
+        raise APIError(BULK_TOO_MANY_ITEMS.format(limit=limit))
+
+    items, positions, results = [], [], [None] * len(data)
+    for index, item in enumerate(data):
+        if not isinstance(item, dict) or not item.get('url'):
+            results[index] = {'message': URL_REQUIRED}
+            continue
+        url, custom_id = item['url'], item.get('custom_id')
+        if (message := _field_type_error(url, custom_id)) is not None:
+            results[index] = {'url': url, 'message': message}
+            continue
+        items.append((url, custom_id))
+        positions.append(index)
+    for index, (url, _), result in zip(
+        positions, items, URLMap.create_many(items)
+    ):
+        if isinstance(result, Exception):
+            results[index] = {'url': url, 'message': str(result)}
+        else:
+            results[index] = {
+                'url': url,
+                'short_link': url_for(
+                    REDIRECT_VIEW_NAME, short=result, _external=True
+                ),
+            }
+    created = any('short_link' in result for result in results)
+    return jsonify(results), (
+        HTTPStatus.CREATED if created else HTTPStatus.BAD_REQUEST
+    )
+
+
+def _field_type_error(url, custom_id):
+    """Сообщение об ошибке, если поля ссылки пришли не строками."""
+    if not isinstance(url, str):
+        return INVALID_URL_FORMAT
+    if custom_id is not None and not isinstance(custom_id, str):
+        return INVALID_SHORT
+    return None
+
+
+def _encode_cursor(row) -> str:
+    key = json.dumps([row.timestamp.isoformat(), row.id, row.shard])
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def _decode_cursor(value: str):
+    if not value:
+        return None
+    try:
+        # Курсоры без номера шарда выданы до шардирования
+        timestamp, row_id, *shard = json.loads(
+            base64.urlsafe_b64decode(value)
+        )
+        return (
+            datetime.fromisoformat(timestamp),
+            int(row_id),
+            int(shard[0]) if shard else 0,
+        )
+    except (binascii.Error, IndexError, TypeError, ValueError) as error:
+        raise APIError(INVALID_CURSOR) from error
+
+
+def _link_record(row) -> dict:
+    return {
+        'url': row.original,
+        'short': row.short,
+        'short_link': url_for(
+            REDIRECT_VIEW_NAME, short=row.short, _external=True
+        ),
+        'timestamp': row.timestamp.isoformat(),
+    }
+
+
+@api_bp.get('/ids/')
+def list_url_mappings():
+    limit = request.args.get('limit', API_PAGE_SIZE, type=int)
+    if not 1 <= limit <= API_MAX_PAGE_SIZE:
+        raise APIError(INVALID_LIMIT)
+    after = _decode_cursor(request.args.get('cursor'))
+    # Лишняя строка показывает, есть ли следующая страница
+    rows = list(URLMap.keyset_rows(after, limit + 1))
+    page = rows[:limit]
+    return jsonify({
+        'items': [_link_record(row) for row in page],
+        'next_cursor': (
+            _encode_cursor(page[-1]) if len(rows) > limit else None
+        ),
+    }), HTTPStatus.OK
+
+
+@api_bp.get('/ids/export/')
+def export_url_mappings():
+    """Выгружает все ссылки построчно в NDJSON.
+
+    Строки читаются курсором на стороне сервера порциями и сразу
+    отправляются клиенту, поэтому память не зависит от размера таблицы.
+    """
+    after = _decode_cursor(request.args.get('cursor'))
+
+    def generate():
+        for row in URLMap.keyset_rows(
+            after, chunk_size=TRANSFER_CHUNK_SIZE
+        ):
+            yield json.dumps(_link_record(row), ensure_ascii=False) + '\n'
+
+    return Response(
+        stream_with_context(generate()), mimetype='application/x-ndjson'
+    )
+
+
+def link_etag(original: str) -> str:
+    """Строгий ETag ответа с оригинальной ссылкой."""
+    return blake2b(original.encode(), digest_size=16).hexdigest()
 
 
 @api_bp.get('/id/<string:short>/')
 def get_original_link(short):
-    if (url_map := URLMap.find(short)) is None:
+    if (original := URLMap.resolve(short)) is None:
+        raise APIError(ID_NOT_FOUND, HTTPStatus.NOT_FOUND)
+    response = jsonify({'url': original})
+    response.set_etag(link_etag(original))
+    return response.make_conditional(request)
+
+
+@api_bp.get('/id/<string:short>/clicks/')
+def get_clicks(short):
+    if URLMap.resolve(short) is None:
         raise APIError(ID_NOT_FOUND, HTTPStatus.NOT_FOUND)
-    return jsonify({'url': url_map.original}), HTTPStatus.OK
+    return jsonify({
+        'short': short,
+        'clicks': URLClick.get_clicks(short) + pending_clicks(short),
+    }), HTTPStatus.OK
+
+
+def _parse_datetime(value: str, message: str) -> datetime:
+    """Разбирает время в ISO 8601 и приводит его к UTC без пояса."""
+    try:
+        moment = datetime.fromisoformat(value)
+    except (TypeError, ValueError) as error:
+        raise APIError(message) from error
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def _parse_since(value: str, period: str) -> datetime:
+    if not value:
+        return datetime.utcnow() - STATS_DEFAULT_WINDOWS[period]
+    return _parse_datetime(value, INVALID_STATS_SINCE)
+
+
+@api_bp.get('/id/<string:short>/stats/')
+def get_stats(short):
+    if URLMap.resolve(short) is None:
+        raise APIError(ID_NOT_FOUND, HTTPStatus.NOT_FOUND)
+    period = request.args.get('period', STATS_PERIOD_DAY)
+    if period not in STATS_DEFAULT_WINDOWS:
+        raise APIError(INVALID_STATS_PERIOD)
+    since = _parse_since(request.args.get('since'), period)
+    return jsonify({
+        'short': short,
+        'period': period,
+        'total': URLClick.get_clicks(short),
+        'buckets': [
+            {'start': bucket.isoformat(), 'clicks': clicks}
+            for bucket, clicks in URLStats.get_buckets(short, period, since)
+        ],
+    }), HTTPStatus.OK
+
+
+@api_bp.get('/jobs/<string:job_id>/')
+def get_upload_job(job_id):
+    job = db.session.get(UploadJob, job_id)
+    if job is None:
+        raise APIError(JOB_NOT_FOUND, HTTPStatus.NOT_FOUND)
+    response = {
+        'id': job.id,
+        'status': job.status,
+        'files': len(job.filenames),
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at and job.started_at.isoformat(),
+        'finished_at': job.finished_at and job.finished_at.isoformat(),
+    }
+    if job.results is not None:
+        response['items'] = [
+            {
+                'filename': item['filename'],
+                'short_link': url_for(
+                    REDIRECT_VIEW_NAME, short=item['short'], _external=True
+                ),
+            }
+            for item in job.results
+        ]
+    if job.error:
+        response['message'] = job.error
+    return jsonify(response), HTTPStatus.OK
+
+
+@api_bp.get('/metrics/')
+def get_metrics():
+    return jsonify(metrics.collect()), HTTPStatus.OK
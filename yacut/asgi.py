@@ -0,0 +1,251 @@
+"""Асинхронная (ASGI) точка входа для переадресации и чтения ссылок.
+
+Обслуживает только `GET /<short>` и `GET /api/id/<short>/` поверх
+асинхронного движка SQLAlchemy и той же таблицы `url_map`. Ответы, включая
+ошибки, повторяют ответы Flask-приложения байт в байт.
+
+Запуск:
+
+    uvicorn yacut.asgi:application --workers 4
+"""
+import asyncio
+from contextlib import AsyncExitStack
+from http import HTTPStatus
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.util import greenlet_spawn
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+from werkzeug.utils import redirect
+
+from yacut import app as flask_app
+from yacut.api_views import ID_NOT_FOUND, link_etag
+from yacut.clicks import record_click
+from yacut.error_handlers import render_not_found_page
+from yacut.sharding import shard_for
+from yacut.views import make_redirect
+from yacut.models import (
+    RESOLVE_STATEMENT,
+    cache_get,
+    cache_set,
+    check_short_filter,
+    is_expired,
+    short_filter,
+    short_filter_sync,
+    sync_short_filter,
+)
+
+ALLOWED_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Ответы с этими кодами передаются без тела
+BODYLESS_STATUSES = frozenset({HTTPStatus.NO_CONTENT, HTTPStatus.NOT_MODIFIED})
+API_PREFIX = '/api/'
+API_ID_PREFIX = '/api/id/'
+# Асинхронные драйверы для синхронных схем подключения
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+}
+
+
+def to_async_database_uri(uri: str) -> str:
+    """Подставляет в URI базы данных асинхронный драйвер."""
+    scheme, separator, rest = uri.partition('://')
+    return ASYNC_DRIVERS.get(scheme, scheme) + separator + rest
+
+
+class RedirectApplication:
+    """ASGI-приложение для переадресации по коротким ссылкам."""
+
+    def __init__(self, flask_app, database_uri: str = None):
+        self.flask_app = flask_app
+        self.database_uri = database_uri or flask_app.config.get(
+            'ASYNC_DATABASE_URI'
+        ) or to_async_database_uri(
+            flask_app.config['SQLALCHEMY_DATABASE_URI']
+        )
+        config = flask_app.config
+        self.shards = config['URL_MAP_SHARDS']
+        # Ключ None — основная база, когда `url_map` не шардирована
+        self.database_uris = {
+            shard: to_async_database_uri(config['SQLALCHEMY_BINDS'][shard])
+            for shard in self.shards
+        } or {None: self.database_uri}
+        self.engines = {}
+        self._not_found_page = None
+        # Синхронизация фильтра Блума держит его блокировку потока, пока
+        # ждёт базу данных; запросы этого цикла событий ждут её по очереди
+        # на асинхронной блокировке, не останавливая поток цикла
+        self._filter_sync_lock = asyncio.Lock()
+
+    async def startup(self) -> None:
+        if not self.engines:
+            self.engines = {
+                shard: create_async_engine(uri)
+                for shard, uri in self.database_uris.items()
+            }
+        if short_filter is not None and not short_filter.loaded:
+            async with self._filter_sync_lock:
+                if not short_filter.loaded:
+                    await self._sync_short_filter(
+                        self.flask_app.config['SHORT_FILTER_CAPACITY']
+                    )
+        if self._not_found_page is None:
+            with self.flask_app.test_request_context('/'):
+                self._not_found_page = self.flask_app.make_response(
+                    (render_not_found_page(), HTTPStatus.NOT_FOUND)
+                )
+
+    async def shutdown(self) -> None:
+        engines, self.engines = self.engines, {}
+        for engine in engines.values():
+            await engine.dispose()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        await self.startup()
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            **{
+                'HTTP_' + name.decode('latin-1').upper().replace('-', '_'):
+                value.decode('latin-1')
+                for name, value in scope.get('headers', ())
+            },
+        }
+        response = await self.dispatch(environ, scope['path'])
+        await self._send(send, response, scope['method'] == 'HEAD')
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.startup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    def _match(path: str):
+        """Возвращает (short, is_api, slash_missing) для пути запроса."""
+        if not path.startswith(API_PREFIX):
+            short = path[1:]
+            return ('' if '/' in short else short), False, False
+        if not path.startswith(API_ID_PREFIX):
+            return '', True, False
+        short, slash, tail = path[len(API_ID_PREFIX):].partition('/')
+        return ('' if tail else short), True, bool(short and not slash)
+
+    async def dispatch(self, environ: dict, path: str):
+        """Сопоставляет путь с маршрутом и формирует ответ Werkzeug."""
+        method = environ['REQUEST_METHOD']
+        short, is_api, slash_missing = self._match(path)
+        if slash_missing:
+            return redirect(path + '/', HTTPStatus.PERMANENT_REDIRECT)
+        if not short:
+            return self._not_found(is_api)
+        if method == 'OPTIONS':
+            response = self.flask_app.response_class()
+            response.allow.update(ALLOWED_METHODS)
+            return response
+        if method not in ALLOWED_METHODS:
+            return MethodNotAllowed(
+                valid_methods=ALLOWED_METHODS
+            ).get_response()
+        row = await self.resolve_row(short)
+        if not is_api:
+            if row is None:
+                return self._not_found(is_api)
+            record_click(short)
+            return make_redirect(row[1], self.flask_app.config, row[4])
+        if row is None:
+            return self._json({'message': ID_NOT_FOUND}, HTTPStatus.NOT_FOUND)
+        response = self._json({'url': row[1]}, HTTPStatus.OK)
+        response.set_etag(link_etag(row[1]))
+        return response.make_conditional(environ)
+
+    async def resolve(self, short: str):
+        """Асинхронный аналог `URLMap.resolve`."""
+        row = await self.resolve_row(short)
+        return None if row is None else row[1]
+
+    async def resolve_row(self, short: str):
+        """Асинхронный аналог `URLMap.resolve_row`."""
+        if (row := cache_get(short)) is not None and not is_expired(row[4]):
+            return row
+        short_filter_sync.ensure_started()
+        interval = self.flask_app.config['SHORT_FILTER_SYNC_INTERVAL']
+        verdict = check_short_filter(short, interval)
+        if verdict is None:
+            async with self._filter_sync_lock:
+                # Пока запрос ждал, фильтр мог синхронизировать другой
+                verdict = check_short_filter(short, interval)
+                if verdict is None:
+                    await self._sync_short_filter(
+                        self.flask_app.config['SHORT_FILTER_CAPACITY']
+                    )
+                    verdict = short in short_filter
+        if not verdict:
+            return None
+        engine = self.engines[shard_for(short, self.shards)]
+        async with engine.connect() as connection:
+            found = (await connection.execute(
+                RESOLVE_STATEMENT, {'short': short}
+            )).one_or_none()
+        if found is None or is_expired(found.expires_at):
+            return None
+        row = (None, found.original, short, None, found.expires_at)
+        cache_set(short, row)
+        return row
+
+    async def _sync_short_filter(self, capacity: int) -> None:
+        """Синхронизирует фильтр Блума сразу со всеми шардами."""
+        async with AsyncExitStack() as stack:
+            connections = {
+                shard: await stack.enter_async_context(engine.connect())
+                for shard, engine in self.engines.items()
+            }
+            # Синхронный код фильтра работает с асинхронными соединениями
+            # внутри greenlet, как `AsyncConnection.run_sync`
+            await greenlet_spawn(sync_short_filter, {
+                shard: connection.sync_connection
+                for shard, connection in connections.items()
+            }, capacity)
+
+    def _json(self, payload: dict, status: int):
+        response = self.flask_app.json.response(payload)
+        response.status_code = status
+        return response
+
+    def _not_found(self, is_api: bool):
+        if is_api:
+            return self._json(
+                {'message': NotFound.description}, HTTPStatus.NOT_FOUND
+            )
+        return self._not_found_page
+
+    @staticmethod
+    async def _send(send, response, head_only: bool) -> None:
+        body = b'' if (
+            head_only or response.status_code in BODYLESS_STATUSES
+        ) else response.get_data()
+        headers = [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in response.headers.items()
+        ]
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': headers,
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': body,
+        })
+
+
+application = RedirectApplication(flask_app)
@@ -0,0 +1,174 @@
+import math
+import mmap
+import os
+import struct
+import threading
+from hashlib import blake2b
+
+from yacut.shared_cache import _FileLock
+
+# Заголовок файла общего фильтра: сигнатура, версия формата, размер
+# массива в битах и число хеш-функций
+FILE_HEADER = struct.Struct('<4sHQB')
+FILE_MAGIC = b'YCBF'
+FORMAT_VERSION = 1
+
+
+class BloomFilter:
+    """Фильтр Блума для быстрой проверки отсутствия ключа.
+
+    Размер битового массива и число хеш-функций подбираются по ожидаемому
+    количеству элементов и допустимой доле ложноположительных ответов.
+    """
+
+    # Можно ли пересоздать фильтр большего размера при переполнении
+    resizable = True
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.hits = 0
+        self.rejections = 0
+        self.reset(capacity)
+
+    def reset(self, capacity: int) -> None:
+        """Пересоздаёт пустой фильтр под заданную ёмкость."""
+        self.capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(
+            -self.capacity * math.log(self.error_rate) / math.log(2) ** 2
+        ))
+        self.num_hashes = max(
+            1, round(self.size / self.capacity * math.log(2))
+        )
+        self.bits = self._allocate()
+        self.count = 0
+        self.loaded = False
+        # Наибольший загруженный id в каждом шарде и время последней
+        # синхронизации
+        self.watermarks = {}
+        self.synced_at = None
+
+    def _allocate(self):
+        return bytearray((self.size + 7) // 8)
+
+    def clear(self) -> None:
+        """Сбрасывает фильтр, сохраняя текущую ёмкость."""
+        with self.lock:
+            self.reset(self.capacity)
+            self.hits = self.rejections = 0
+
+    def _positions(self, key: str):
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return (
+            (first + index * second) % self.size
+            for index in range(self.num_hashes)
+        )
+
+    def add(self, key: str) -> None:
+        """Добавляет ключ; `count` растёт, только если ключа не было."""
+        added = False
+        for position in self._positions(key):
+            if not self._has_bit(position):
+                self._set_bit(position)
+                added = True
+        self.count += added
+
+    def _has_bit(self, position: int) -> bool:
+        return bool(self.bits[position >> 3] & (1 << (position & 7)))
+
+    def _set_bit(self, position: int) -> None:
+        self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        present = all(
+            self._has_bit(position) for position in self._positions(key)
+        )
+        if present:
+            self.hits += 1
+        else:
+            self.rejections += 1
+        return present
+
+    def stats(self) -> dict:
+        """Возвращает параметры фильтра и счётчики проверок."""
+        return {
+            'loaded': self.loaded,
+            'capacity': self.capacity,
+            'count': self.count,
+            'watermark': max(self.watermarks.values(), default=0),
+            'bits': self.size,
+            'bytes': len(self.bits),
+            'hashes': self.num_hashes,
+            'error_rate': self.error_rate,
+            'maybe_present': self.hits,
+            'rejected': self.rejections,
+        }
+
+
+class SharedBloomFilter(BloomFilter):
+    """Фильтр Блума в отображаемом в память файле, общий для процессов хоста.
+
+    Ссылка, добавленная одним процессом, сразу видна остальным. Каждый бит
+    занимает отдельный байт: запись байта атомарна, поэтому одновременные
+    `add` из разных процессов не затирают биты друг друга и блокировка
+    не нужна. Размер массива задаётся ёмкостью при создании и не меняется:
+    при переполнении растёт только доля ложноположительных ответов.
+    Загрузка и синхронизация с базой у каждого процесса своя.
+    """
+
+    resizable = False
+
+    def __init__(self, path: str, capacity: int, error_rate: float):
+        self.path = path
+        self._map = None
+        super().__init__(capacity, error_rate)
+
+    def reset(self, capacity: int) -> None:
+        """Сбрасывает состояние процесса; биты в файле сохраняются."""
+        if self._map is None:
+            super().reset(capacity)
+            return
+        self.count = 0
+        self.loaded = False
+        self.watermarks = {}
+        self.synced_at = None
+
+    def _allocate(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        header = FILE_HEADER.pack(
+            FILE_MAGIC, FORMAT_VERSION, self.size, self.num_hashes
+        )
+        length = FILE_HEADER.size + self.size
+        try:
+            with _FileLock(fd):
+                if (
+                    os.fstat(fd).st_size != length
+                    or os.pread(fd, FILE_HEADER.size, 0) != header
+                ):
+                    # Файл другого размера или формата создаётся заново
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, length)
+                    os.pwrite(fd, header, 0)
+            self._map = mmap.mmap(fd, length)
+        finally:
+            os.close(fd)
+        return memoryview(self._map)[FILE_HEADER.size:]
+
+    def _has_bit(self, position: int) -> bool:
+        return bool(self.bits[position])
+
+    def _set_bit(self, position: int) -> None:
+        self.bits[position] = 1
+
+    def clear(self) -> None:
+        """Обнуляет биты в файле для всех процессов."""
+        with self.lock:
+            self.bits[:] = bytes(len(self.bits))
+            self.reset(self.capacity)
+            self.hits = self.rejections = 0
+
+    def stats(self) -> dict:
+        return {**super().stats(), 'path': self.path}
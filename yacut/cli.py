@@ -0,0 +1,168 @@
+from pathlib import Path
+
+import click
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+
+from yacut import app, db
+from yacut.constants import TRANSFER_CHUNK_SIZE
+from yacut.expiry import PURGE_DONE, expiry_purger
+from yacut.rebalance import rebalance_shards
+from yacut.transfer import (
+    FORMAT_CSV,
+    FORMATS,
+    detect_format,
+    export_urls,
+    import_urls,
+    read_records,
+)
+from yacut.warmup import format_report, warm_up_cache
+
+CHECKPOINT_SUFFIX = '.checkpoint'
+UNKNOWN_FORMAT = 'Не удалось определить формат файла, укажите --format.'
+RESUMING = 'Продолжение импорта с записи {number}.'
+PROGRESS = '{count} записей, {rate:.0f} записей/с'
+RECORD_ERROR = 'Запись {number}: {message}'
+IMPORT_DONE = (
+    'Импортировано {imported} записей, отклонено {rejected} '
+    'за {elapsed:.2f} с'
+)
+EXPORT_DONE = 'Выгружено {exported} записей за {elapsed:.2f} с'
+NO_SHARDS = 'Шарды не настроены: задайте URL_MAP_SHARDS.'
+REBALANCE_CONFLICT = (
+    'Ссылка {short} в своём шарде занята другой записью, оставлена на месте'
+)
+REBALANCE_DONE = (
+    'Проверено {scanned} записей, перенесено {moved}, конфликтов '
+    '{conflicts} за {elapsed:.2f} с'
+)
+
+
+@app.cli.command('warm-cache')
+@click.option('--limit', type=int, default=None,
+              help='Сколько последних и популярных ссылок загрузить.')
+@click.option('--chunk-size', type=int, default=None,
+              help='Размер порции при чтении из базы данных.')
+@click.option('--time-budget', type=float, default=None,
+              help='Лимит времени на прогрев в секундах.')
+def warm_cache_command(limit, chunk_size, time_budget):
+    """Прогревает кэш коротких ссылок."""
+    report = warm_up_cache(
+        limit or app.config['CACHE_WARMUP_LIMIT'],
+        chunk_size or app.config['CACHE_WARMUP_CHUNK_SIZE'],
+        time_budget or app.config['CACHE_WARMUP_TIME_BUDGET'],
+    )
+    click.echo(format_report(report))
+
+
+@app.cli.group('urls')
+def urls_group():
+    """Импорт и экспорт коротких ссылок."""
+
+
+def _echo_progress(count: int, elapsed: float) -> None:
+    click.echo(PROGRESS.format(
+        count=count, rate=count / elapsed if elapsed else 0
+    ), err=True)
+
+
+@urls_group.command('import')
+@click.argument('source', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(FORMATS),
+              help='Формат файла; по умолчанию определяется по расширению.')
+@click.option('--chunk-size', type=int, default=TRANSFER_CHUNK_SIZE,
+              show_default=True, help='Записей в одной транзакции.')
+@click.option('--checkpoint', type=click.Path(dir_okay=False),
+              help='Файл контрольной точки; по умолчанию рядом с SOURCE.')
+@click.option('--restart', is_flag=True,
+              help='Начать сначала, не учитывая контрольную точку.')
+def import_command(source, file_format, chunk_size, checkpoint, restart):
+    """Импортирует ссылки из CSV или NDJSON с полями original и short."""
+    file_format = file_format or detect_format(source)
+    if file_format is None:
+        raise click.UsageError(UNKNOWN_FORMAT)
+    checkpoint = Path(checkpoint or source + CHECKPOINT_SUFFIX)
+    skip = 0
+    if checkpoint.exists() and not restart:
+        skip = int(checkpoint.read_text())
+        click.echo(RESUMING.format(number=skip + 1), err=True)
+
+    def on_chunk(report):
+        # Контрольная точка обновляется только после фиксации порции
+        temporary = checkpoint.with_name(checkpoint.name + '.tmp')
+        temporary.write_text(str(report['processed']))
+        temporary.replace(checkpoint)
+        for number, message in report['errors']:
+            click.echo(
+                RECORD_ERROR.format(number=number, message=message), err=True
+            )
+        _echo_progress(report['processed'] - skip, report['elapsed'])
+
+    with open(source, newline='', encoding='utf-8') as stream:
+        report = import_urls(
+            read_records(stream, file_format), chunk_size, skip, on_chunk
+        )
+    checkpoint.unlink(missing_ok=True)
+    click.echo(IMPORT_DONE.format(**report))
+
+
+@urls_group.command('export')
+@click.argument('target', default='-')
+@click.option('--format', 'file_format', type=click.Choice(FORMATS),
+              help='Формат файла; по умолчанию по расширению или CSV.')
+@click.option('--chunk-size', type=int, default=TRANSFER_CHUNK_SIZE,
+              show_default=True, help='Записей в одном запросе к базе.')
+def export_command(target, file_format, chunk_size):
+    """Выгружает ссылки в CSV или NDJSON (в stdout, если TARGET не задан)."""
+    file_format = file_format or detect_format(target) or FORMAT_CSV
+    with click.open_file(target, 'w', encoding='utf-8') as stream:
+        report = export_urls(
+            stream, file_format, chunk_size,
+            lambda report: _echo_progress(
+                report['exported'], report['elapsed']
+            ),
+        )
+    click.echo(EXPORT_DONE.format(**report), err=True)
+
+
+@urls_group.command('purge-expired')
+def purge_expired_command():
+    """Удаляет ссылки с истёкшим сроком действия."""
+    click.echo(PURGE_DONE.format(**expiry_purger.purge()))
+
+
+@urls_group.command('rebalance')
+@click.option('--source', 'sources', multiple=True, metavar='URI',
+              help='Ещё одна база, из которой забрать ссылки: основная '
+                   'или убранный из URL_MAP_SHARDS шард.')
+@click.option('--chunk-size', type=int, default=TRANSFER_CHUNK_SIZE,
+              show_default=True, help='Записей в одном запросе к базе.')
+def rebalance_command(sources, chunk_size):
+    """Переносит ссылки в шарды, которым они принадлежат по URL_MAP_SHARDS."""
+    shards = app.config['URL_MAP_SHARDS']
+    if not shards:
+        raise click.UsageError(NO_SHARDS)
+    engines = {shard: db.engines[shard] for shard in shards}
+    shard_uris = {engine.url for engine in engines.values()}
+    # Базы вне URL_MAP_SHARDS получают ключи, не совпадающие с шардами;
+    # шард, указанный ещё и в --source, повторно не читается
+    extra = {
+        uri: create_engine(uri) for uri in sources
+        if make_url(uri) not in shard_uris
+    }
+    engines.update(extra)
+    try:
+        report = rebalance_shards(
+            engines, chunk_size,
+            lambda report: _echo_progress(
+                report['scanned'], report['elapsed']
+            ),
+        )
+    finally:
+        for engine in extra.values():
+            engine.dispose()
+    for short in report['conflicts']:
+        click.echo(REBALANCE_CONFLICT.format(short=short), err=True)
+    click.echo(REBALANCE_DONE.format(
+        **{**report, 'conflicts': len(report['conflicts'])}
+    ))
@@ -0,0 +1,174 @@
+import atexit
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+from yacut import app, db, metrics
+from yacut.constants import STATS_PERIOD_DAY, STATS_PERIOD_HOUR
+from yacut.models import URLClick, URLStats
+
+
+class WriteBehindCounter:
+    """Накопитель счётчиков в памяти с фоновым пакетным сбросом в базу.
+
+    Инкремент не обращается к базе данных. Накопленные приращения
+    периодически передаются в `apply` пачками по `batch_size` ключей.
+    При аварийном завершении процесса теряются приращения не более чем
+    за один интервал сброса.
+    """
+
+    def __init__(self, apply, interval: float, batch_size: int,
+                 max_pending: int):
+        self._apply = apply
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.flushed = 0
+        self.dropped = 0
+        self.failures = 0
+        self._stop_at_exit = False
+
+    def increment(self, key, amount: int = 1) -> bool:
+        """Увеличивает счётчик, не обращаясь к базе данных.
+
+        Если очередь переполнена, приращение для нового ключа отбрасывается.
+        """
+        with self._lock:
+            if key not in self._pending and (
+                len(self._pending) >= self.max_pending
+            ):
+                self.dropped += amount
+                self._wakeup.set()
+                return False
+            self._pending[key] += amount
+            if len(self._pending) >= self.batch_size:
+                self._wakeup.set()
+        self._ensure_started()
+        return True
+
+    def pending(self, key) -> int:
+        """Возвращает ещё не сброшенное в базу приращение."""
+        with self._lock:
+            return self._pending.get(key, 0)
+
+    def flush(self) -> int:
+        """Сбрасывает накопленные приращения и возвращает число ключей."""
+        with self._lock:
+            items = list(self._pending.items())
+            self._pending = Counter()
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            try:
+                self._apply(batch)
+            except Exception:
+                self.failures += 1
+                with self._lock:
+                    for key, amount in items[start:]:
+                        self._pending[key] += amount
+                raise
+            self.flushed += len(batch)
+        return len(items)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending.clear()
+
+    def _ensure_started(self) -> None:
+        # Остаток сбрасывается при завершении процесса и без фонового
+        # потока: при нулевом интервале это единственный сброс
+        if not self._stop_at_exit:
+            with self._lock:
+                if not self._stop_at_exit:
+                    atexit.register(self.stop)
+                    self._stop_at_exit = True
+        if self.interval <= 0:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                app.logger.exception('Не удалось сохранить счётчики')
+
+    def stop(self) -> None:
+        """Останавливает фоновый поток и сбрасывает остаток."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'pending_keys': pending,
+            'max_pending': self.max_pending,
+            'flush_interval': self.interval,
+            'batch_size': self.batch_size,
+            'flushed_keys': self.flushed,
+            'dropped': self.dropped,
+            'failures': self.failures,
+        }
+
+
+def _hour_bucket(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _apply_clicks(batch) -> None:
+    """Записывает общие, почасовые и посуточные счётчики одной транзакцией."""
+    totals, hours, days = Counter(), Counter(), Counter()
+    for (short, hour), delta in batch:
+        totals[short] += delta
+        hours[short, hour] += delta
+        days[short, hour.replace(hour=0)] += delta
+    with app.app_context():
+        URLClick.add_clicks(totals.items(), commit=False)
+        URLStats.add_clicks(STATS_PERIOD_HOUR, hours.items(), commit=False)
+        URLStats.add_clicks(STATS_PERIOD_DAY, days.items(), commit=False)
+        db.session.commit()
+
+
+click_counter = WriteBehindCounter(
+    _apply_clicks,
+    app.config['CLICK_FLUSH_INTERVAL'],
+    app.config['CLICK_FLUSH_BATCH_SIZE'],
+    app.config['CLICK_QUEUE_SIZE'],
+)
+metrics.register('clicks', click_counter.stats)
+
+
+def record_click(short: str) -> None:
+    """Учитывает переход по короткой ссылке в текущем часовом интервале."""
+    click_counter.increment((short, _hour_bucket(datetime.utcnow())))
+
+
+def pending_clicks(short: str) -> int:
+    """Возвращает переходы, ещё не сброшенные в базу данных.
+
+    Между сбросами проходят секунды, поэтому несброшенные приращения могут
+    относиться только к текущему и предыдущему часу.
+    """
+    current = _hour_bucket(datetime.utcnow())
+    return sum(
+        click_counter.pending((short, bucket))
+        for bucket in (current, current - timedelta(hours=1))
+    )
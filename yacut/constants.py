@@ -1,5 +1,6 @@
 import re
 import string
+from datetime import timedelta
 
 # Generator
 SHORT_CHARS = string.ascii_letters + string.digits
@@ -10,13 +11,56 @@ DEFAULT_SHORT_LENGTH = 6
 MAX_SHORT_LENGTH = 16
 RESERVED_SHORTS = frozenset({'files'})
 MAX_GENERATION_ATTEMPTS = 100
+SHORT_ID_MODE_RANDOM = 'random'
+SHORT_ID_MODE_SEQUENCE = 'sequence'
+# Имя счётчика, из которого выдаются идентификаторы в режиме sequence
+SHORT_SEQUENCE_NAME = 'url_map'
 MAX_URL_LENGTH = 2048
+# Длина шестнадцатеричного SHA-256 оригинальной ссылки
+ORIGINAL_HASH_LENGTH = 64
+# Сколько идентификаторов проверяется или вставляется одним запросом
+BULK_QUERY_CHUNK = 1000
+# Сколько раз пакет пересоздаётся после конфликта уникальности при вставке
+BULK_INSERT_ATTEMPTS = 3
+
+# Cache
+# Размер значения в разделяемом кэше: оригинальная ссылка и служебные поля
+SHARED_CACHE_VALUE_SIZE = MAX_URL_LENGTH + 64
+# Сколько коротких ссылок читать за раз при загрузке фильтра Блума
+SHORT_FILTER_LOAD_CHUNK = 10_000
+# Сколько последних id каждого шарда перечитывается при синхронизации
+# фильтра: id выдаются при INSERT, а не при COMMIT, и строка с меньшим id
+# может стать видна позже уже загруженной
+SHORT_FILTER_SYNC_OVERLAP = 1000
+# Размер порции импорта и экспорта по умолчанию
+TRANSFER_CHUNK_SIZE = 1000
+# Размер страницы списка ссылок в API
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+
+# Stats
+STATS_PERIOD_HOUR = 'hour'
+STATS_PERIOD_DAY = 'day'
+# Окно статистики по умолчанию для каждого периода
+STATS_DEFAULT_WINDOWS = {
+    STATS_PERIOD_HOUR: timedelta(hours=48),
+    STATS_PERIOD_DAY: timedelta(days=30),
+}
 
 # Views
 REDIRECT_VIEW_NAME = 'redirect_view'
+PERMANENT_REDIRECT_CODES = frozenset({301, 308})
 
 # File upload
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'svg', 'webp', }
+# Состояния фоновых задач загрузки
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_ID_LENGTH = 32
+# Длина шестнадцатеричного SHA-256 содержимого загруженного файла
+CONTENT_DIGEST_LENGTH = 64
 
 # Yandex Disk API
 YANDEX_API_BASE_URL = 'https://cloud-api.yandex.net'
@@ -0,0 +1,42 @@
+"""Хэширование файлов формы по мере их приёма."""
+from hashlib import sha256
+
+from flask import Request
+
+
+class DigestStream:
+    """Файл формы, считающий SHA-256 содержимого при записи.
+
+    Werkzeug записывает в него файл из тела запроса порциями, поэтому
+    хэш готов к концу разбора формы без повторного чтения файла.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._digest = sha256()
+
+    def write(self, data: bytes) -> int:
+        self._digest.update(data)
+        return self._stream.write(data)
+
+    @property
+    def content_digest(self) -> str:
+        return self._digest.hexdigest()
+
+    def __iter__(self):
+        return iter(self._stream)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class DigestRequest(Request):
+    """Запрос, файлы которого хэшируются во время разбора формы."""
+
+    def _get_file_stream(
+        self, total_content_length, content_type, filename=None,
+        content_length=None,
+    ):
+        return DigestStream(super()._get_file_stream(
+            total_content_length, content_type, filename, content_length
+        ))
@@ -1,3 +1,4 @@
+from functools import cache
 from http import HTTPStatus
 
 from flask import jsonify, render_template, request
@@ -21,16 +22,21 @@ def handle_api_error(error):
     return jsonify({'message': error.message}), error.status_code
 
 
+NOT_FOUND_MESSAGE = 'Страница не найдена.'
+
+
+@cache
+def render_not_found_page():
+    """Страница 404 не зависит от запроса, поэтому рендерится один раз."""
+    return render_template('404.html', message=NOT_FOUND_MESSAGE)
+
+
 @app.errorhandler(HTTPStatus.NOT_FOUND)
 def page_not_found(error):
-    default_message = 'Страница не найдена.'
-    message = getattr(error, 'description', default_message)
+    message = getattr(error, 'description', NOT_FOUND_MESSAGE)
     if request.path.startswith('/api/'):
         return jsonify({'message': message}), HTTPStatus.NOT_FOUND
-    return (
-        render_template('404.html', message=default_message),
-        HTTPStatus.NOT_FOUND,
-    )
+    return render_not_found_page(), HTTPStatus.NOT_FOUND
 
 
 @app.errorhandler(HTTPStatus.INTERNAL_SERVER_ERROR)
@@ -46,3 +52,17 @@ def internal_error(error):
         render_template('500.html', message=description),
         HTTPStatus.INTERNAL_SERVER_ERROR,
     )
+
+
+@app.errorhandler(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+def request_too_large(error):
+    description = 'Размер запроса превышает допустимый.'
+    if request.path.startswith('/api/'):
+        return (
+            jsonify({'message': description}),
+            HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+        )
+    return (
+        render_template('413.html', message=description),
+        HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+    )
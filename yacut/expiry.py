@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import delete, func, select
+
+from yacut import app, db, metrics
+from yacut.models import (
+    URLClick,
+    URLMap,
+    URLStats,
+    cache_invalidate,
+    shard_connection,
+    shard_connections,
+    url_map_shards,
+)
+
+PURGE_FAILED = 'Не удалось удалить истёкшие ссылки'
+PURGE_DONE = (
+    'Удалено {purged} истёкших ссылок за {elapsed:.2f} с '
+    '({rate:.0f} записей/с)'
+)
+
+
+def purge_expired_batch(batch_size: int, shard=None) -> list:
+    """Удаляет до `batch_size` истёкших ссылок шарда короткой транзакцией.
+
+    Кандидаты выбираются по индексу `expires_at`, удаление идёт по
+    первичному ключу, вместе со ссылками удаляются их счётчики переходов.
+    Возвращает удалённые короткие идентификаторы.
+    """
+    connection = shard_connection(shard)
+    rows = connection.execute(
+        select(URLMap.id, URLMap.short)
+        .where(URLMap.expires_at <= datetime.utcnow())
+        .order_by(URLMap.expires_at)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return []
+    shorts = [row.short for row in rows]
+    connection.execute(
+        delete(URLMap).where(URLMap.id.in_([row.id for row in rows]))
+    )
+    # Счётчики переходов хранятся в основной базе
+    for statement in (
+        delete(URLClick).where(URLClick.short.in_(shorts)),
+        delete(URLStats).where(URLStats.short.in_(shorts)),
+    ):
+        db.session.execute(
+            statement.execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+    for short in shorts:
+        cache_invalidate(short)
+    return shorts
+
+
+def expiry_lag() -> float:
+    """Сколько секунд назад истекла самая старая ещё не удалённая ссылка."""
+    now = datetime.utcnow()
+    query = select(func.min(URLMap.expires_at)).where(
+        URLMap.expires_at <= now
+    )
+    oldest = min((
+        moment for moment in (
+            connection.scalar(query)
+            for connection in shard_connections().values()
+        ) if moment is not None
+    ), default=None)
+    return 0.0 if oldest is None else (now - oldest).total_seconds()
+
+
+class ExpiryPurger:
+    """Фоновое удаление ссылок с истёкшим сроком действия.
+
+    Раз в `interval` секунд удаляет все истёкшие ссылки пачками по
+    `batch_size`, каждую в отдельной транзакции, чтобы не держать
+    долгих блокировок. Поток запускается первым запросом процесса,
+    а не при импорте, и заново — после fork.
+    """
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.purged = 0
+        self.batches = 0
+        self.failures = 0
+        self.lag = 0.0
+        self.rate = 0.0
+        self.last_run = None
+
+    def purge(self) -> dict:
+        """Удаляет все истёкшие на данный момент ссылки."""
+        started = time.monotonic()
+        report = {'purged': 0}
+        with app.app_context():
+            self.lag = expiry_lag()
+            for shard in url_map_shards():
+                while True:
+                    count = len(purge_expired_batch(self.batch_size, shard))
+                    report['purged'] += count
+                    self.purged += count
+                    self.batches += 1
+                    if count < self.batch_size:
+                        break
+        report['elapsed'] = time.monotonic() - started
+        report['rate'] = (
+            report['purged'] / report['elapsed'] if report['elapsed'] else 0
+        )
+        self.rate = report['rate']
+        self.last_run = datetime.utcnow()
+        return report
+
+    def start(self) -> None:
+        if self.interval <= 0:
+            return
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            # Поток родителя после fork в дочернем процессе не работает
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._stopped.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.purge()
+            except Exception:
+                self.failures += 1
+                app.logger.exception(PURGE_FAILED)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            'interval': self.interval,
+            'batch_size': self.batch_size,
+            'purged': self.purged,
+            'batches': self.batches,
+            'failures': self.failures,
+            'rate': round(self.rate, 1),
+            'lag_seconds': round(self.lag, 1),
+            'last_run': self.last_run and self.last_run.isoformat(),
+        }
+
+
+expiry_purger = ExpiryPurger(
+    app.config['EXPIRY_PURGE_INTERVAL'],
+    app.config['EXPIRY_PURGE_BATCH_SIZE'],
+)
+metrics.register('expiry', expiry_purger.stats)
+
+
+@app.before_request
+def start_expiry_purger():
+    """Запускает удаление только в процессах, обслуживающих запросы.
+
+    Команды `flask`, ASGI-приложение и мастер-процесс gunicorn
+    с `--preload` запросов Flask не обрабатывают и потока не создают.
+    """
+    expiry_purger.start()
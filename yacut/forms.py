@@ -1,6 +1,6 @@
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileAllowed, FileRequired, MultipleFileField
-from wtforms import StringField, SubmitField, URLField
+from wtforms import DateTimeLocalField, StringField, SubmitField, URLField
 from wtforms.validators import DataRequired, Length, Optional, Regexp, URL
 
 from yacut.constants import (
@@ -18,6 +18,9 @@ INVALID_SHORT_CHARS = 'Недопустимые символы в коротко
 SELECT_FILE = 'Выберите хотя бы один файл'
 INVALID_FILE_TYPE = 'Недопустимый тип файла'
 
+# Формат поля datetime-local в браузере
+EXPIRES_AT_FORMAT = '%Y-%m-%dT%H:%M'
+
 # Тексты кнопок
 SUBMIT_CREATE = 'Создать'
 SUBMIT_UPLOAD = 'Загрузить'
@@ -40,14 +43,19 @@ class URLMapForm(FlaskForm):
             Regexp(ALLOWED_SHORT_PATTERN, message=INVALID_SHORT_CHARS),
         )
     )
+    expires_at = DateTimeLocalField(
+        'Срок действия (UTC)',
+        format=EXPIRES_AT_FORMAT,
+        validators=(Optional(),),
+    )
     submit = SubmitField(SUBMIT_CREATE)
 
+    def validate_expires_at(self, field: DateTimeLocalField) -> None:
+        URLMap.validate_expires_at(field.data)
+
     def validate_custom_id(self, field: StringField) -> None:
-        field.data = URLMap.validate_short(
-            field.data,
-            require=False,
-            check_unique=True,
-        )
+        # Занятость проверяется при вставке в URLMap.create
+        field.data = URLMap.validate_short(field.data, require=False)
 
 
 class UploadFilesForm(FlaskForm):
@@ -0,0 +1,104 @@
+import threading
+from concurrent.futures import Future
+
+from yacut import app, metrics
+from yacut.models import URLMap
+
+
+class GroupCommitter:
+    """Объединяет одновременные операции записи в одну транзакцию.
+
+    Операции копятся не дольше `window` секунд или до `max_batch` штук,
+    после чего фоновый поток передаёт их в `apply` одним списком. `apply`
+    возвращает результат или исключение для каждой операции, и каждый
+    ожидающий поток получает свой.
+    """
+
+    def __init__(self, apply, window: float, max_batch: int):
+        self._apply = apply
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = []
+        self._lock = threading.Lock()
+        self._arrived = threading.Event()
+        self._full = threading.Event()
+        self._thread = None
+        self.batches = 0
+        self.committed = 0
+        self.largest_batch = 0
+
+    def submit(self, item):
+        """Ставит операцию в очередь и ждёт её результата."""
+        future = Future()
+        with self._lock:
+            self._queue.append((item, future))
+            self._arrived.set()
+            if len(self._queue) >= self.max_batch:
+                self._full.set()
+        self._ensure_started()
+        return future.result()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._arrived.wait()
+            # Окно ожидания попутчиков; полная пачка уходит сразу
+            self._full.wait(self.window)
+            with self._lock:
+                batch = self._queue[:self.max_batch]
+                del self._queue[:self.max_batch]
+                if len(self._queue) < self.max_batch:
+                    self._full.clear()
+                if not self._queue:
+                    self._arrived.clear()
+            if batch:
+                self._commit(batch)
+
+    def _commit(self, batch) -> None:
+        try:
+            results = self._apply([item for item, _ in batch])
+        except Exception as error:
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        self.batches += 1
+        self.committed += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            queued = len(self._queue)
+        return {
+            'window': self.window,
+            'max_batch': self.max_batch,
+            'queued': queued,
+            'batches': self.batches,
+            'committed': self.committed,
+            'largest_batch': self.largest_batch,
+        }
+
+
+def _create_many(items) -> list:
+    with app.app_context():
+        return URLMap.create_many(items)
+
+
+group_committer = GroupCommitter(
+    _create_many,
+    app.config['GROUP_COMMIT_WINDOW'],
+    app.config['GROUP_COMMIT_MAX_BATCH'],
+)
+metrics.register('group_commit', group_committer.stats)
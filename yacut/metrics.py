@@ -0,0 +1,11 @@
+_providers = {}
+
+
+def register(name: str, provider) -> None:
+    """Регистрирует функцию, возвращающую словарь с метриками компонента."""
+    _providers[name] = provider
+
+
+def collect() -> dict:
+    """Собирает метрики всех зарегистрированных компонентов."""
+    return {name: provider() for name, provider in _providers.items()}
@@ -1,44 +1,403 @@
+import heapq
+import os
 import random
-from datetime import datetime
+import re
+import struct
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+from itertools import islice
 from urllib.parse import urlparse
 
-from flask import url_for
-from sqlalchemy import select
+from flask import current_app, url_for
+from sqlalchemy import (
+    and_,
+    bindparam,
+    event,
+    func,
+    insert,
+    inspect,
+    literal,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
 from wtforms import ValidationError
 
-from yacut import db
+from yacut import (
+    app,
+    db,
+    metrics,
+    redirect_cache,
+    shared_cache,
+    short_filter,
+)
 from yacut.constants import (
     ALLOWED_SHORT_PATTERN,
+    BULK_INSERT_ATTEMPTS,
+    BULK_QUERY_CHUNK,
+    CONTENT_DIGEST_LENGTH,
     DEFAULT_SHORT_LENGTH,
+    JOB_ID_LENGTH,
+    JOB_QUEUED,
+    JOB_RUNNING,
     MAX_GENERATION_ATTEMPTS,
     MAX_SHORT_LENGTH,
     MAX_URL_LENGTH,
+    ORIGINAL_HASH_LENGTH,
     REDIRECT_VIEW_NAME,
     RESERVED_SHORTS,
     SHORT_CHARS,
+    SHORT_FILTER_LOAD_CHUNK,
+    SHORT_FILTER_SYNC_OVERLAP,
+    SHORT_ID_MODE_SEQUENCE,
+    SHORT_SEQUENCE_NAME,
+)
+from yacut.replicas import ReplicaRouter
+from yacut.sharding import group_by_shard, shard_for
+from yacut.short_ids import (
+    SequenceAllocator,
+    ShortPool,
+    encode_base62,
+    permute,
 )
 
 INVALID_SHORT = 'Указано недопустимое имя для короткой ссылки'
 DUPLICATE_SHORT = 'Предложенный вариант короткой ссылки уже существует.'
 URL_TOO_LONG = 'URL слишком длинный'
 INVALID_URL_FORMAT = 'Недопустимый формат URL'
+EXPIRES_IN_PAST = 'Срок действия ссылки должен быть в будущем'
+REPLICA_FAILED = 'Реплика {replica} недоступна, чтение с основной базы'
+SHORT_FILTER_SYNC_FAILED = 'Не удалось синхронизировать фильтр Блума'
 UNIQUE_SHORT_GENERATION_ERROR = (
     f'Не удалось сгенерировать уникальный идентификатор '
     f'за {MAX_GENERATION_ATTEMPTS} попыток'
 )
+BULK_INSERT_ERROR = (
+    f'Не удалось создать пакет ссылок за {BULK_INSERT_ATTEMPTS} попыток'
+)
+
+# Ограничение уникальности `url_map.short`: имя, которое PostgreSQL дал
+# безымянному UniqueConstraint, и текст ошибки SQLite и MySQL
+SHORT_UNIQUE_CONSTRAINT = 'url_map_short_key'
+SHORT_UNIQUE_VIOLATION = re.compile(
+    r"UNIQUE constraint failed: url_map\.short\b|for key '(url_map\.)?short'"
+)
+
+# Поля записи, которые хранятся в кэше коротких ссылок
+CACHED_FIELDS = ('id', 'original', 'short', 'timestamp', 'expires_at')
+# Упаковка id, времени создания и срока действия (в микросекундах)
+# для разделяемого кэша
+SHARED_ROW_HEADER = struct.Struct('<qqq')
+NO_ID = 0
+NO_TIMESTAMP = -2 ** 63
+
+
+def _to_micros(moment) -> int:
+    if moment is None:
+        return NO_TIMESTAMP
+    return int(moment.replace(tzinfo=timezone.utc).timestamp() * 1_000_000)
+
+
+def _from_micros(micros: int):
+    if micros == NO_TIMESTAMP:
+        return None
+    return datetime.fromtimestamp(
+        micros / 1_000_000, timezone.utc
+    ).replace(tzinfo=None)
+
+
+def _pack_row(row: tuple) -> bytes:
+    row_id, original, _, timestamp, expires_at = row
+    return SHARED_ROW_HEADER.pack(
+        NO_ID if row_id is None else row_id,
+        _to_micros(timestamp),
+        _to_micros(expires_at),
+    ) + original.encode()
+
+
+def _unpack_row(short: str, data: bytes) -> tuple:
+    row_id, timestamp, expires_at = SHARED_ROW_HEADER.unpack_from(data)
+    return (
+        None if row_id == NO_ID else row_id,
+        data[SHARED_ROW_HEADER.size:].decode(),
+        short,
+        _from_micros(timestamp),
+        _from_micros(expires_at),
+    )
+
+
+def is_expired(expires_at) -> bool:
+    return expires_at is not None and expires_at <= datetime.utcnow()
+
+
+def cache_get(short: str):
+    """Ищет запись в кэше процесса, затем в разделяемом кэше хоста."""
+    if (row := redirect_cache.get(short)) is not None:
+        return row
+    if shared_cache is None:
+        return None
+    if (data := shared_cache.get(short)) is None:
+        return None
+    row = _unpack_row(short, data)
+    redirect_cache.set(short, row)
+    return row
+
+
+def cache_set(short: str, row: tuple) -> None:
+    redirect_cache.set(short, row)
+    if shared_cache is not None:
+        shared_cache.set(short, _pack_row(row))
+
+
+def cache_invalidate(short: str) -> None:
+    redirect_cache.invalidate(short)
+    if shared_cache is not None:
+        shared_cache.invalidate(short)
+
+
+def url_map_shards() -> list:
+    """Ключи шардов `url_map`; [None] — ссылки хранятся в основной базе."""
+    return current_app.config['URL_MAP_SHARDS'] or [None]
+
+
+def shard_of(short: str):
+    return shard_for(short, current_app.config['URL_MAP_SHARDS'])
+
+
+def shard_connection(shard):
+    """Соединение текущей сессии с базой шарда."""
+    return db.session.connection(bind_arguments={'bind': db.engines[shard]})
+
+
+def shard_connections() -> dict:
+    return {shard: shard_connection(shard) for shard in url_map_shards()}
+
+
+def shard_groups(items, key=None) -> dict:
+    """Раскладывает короткие ссылки (или строки по `key`) по шардам."""
+    return group_by_shard(items, current_app.config['URL_MAP_SHARDS'], key)
+
+
+def _row_short(row: dict) -> str:
+    return row['short']
+
+
+def _execute_on_shard(statement, shard):
+    """Выполняет ORM-запрос к `url_map` в базе шарда."""
+    return db.session.execute(
+        statement.execution_options(identity_token=shard),
+        bind_arguments={'bind': db.engines[shard]},
+    )
+
+
+def sync_short_filter(connections: dict, capacity: int,
+                      requested_at: float = None) -> None:
+    """Догружает в фильтр Блума новые короткие ссылки из всех шардов.
+
+    `connections` — соединения с базами шардов по их ключам. При первой
+    загрузке и при переполнении фильтр перестраивается целиком. Если
+    фильтр уже синхронизировали после момента `requested_at`, например
+    пока вызывающий поток ждал блокировку, база данных не опрашивается.
+    """
+    with short_filter.lock:
+        if (
+            requested_at is not None
+            and short_filter.loaded
+            and short_filter.synced_at >= requested_at
+        ):
+            return
+        started_at = time.monotonic()
+        if not short_filter.loaded or (
+            short_filter.resizable
+            and short_filter.count > short_filter.capacity
+        ):
+            total = sum(
+                connection.scalar(
+                    select(func.count()).select_from(URLMap.__table__)
+                )
+                for connection in connections.values()
+            )
+            short_filter.reset(max(capacity, total * 2))
+        # id растут независимо в каждом шарде
+        for shard, connection in connections.items():
+            watermark = short_filter.watermarks.get(shard, 0)
+            for row_id, short in connection.execute(
+                select(URLMap.id, URLMap.short)
+                .where(URLMap.id > watermark - SHORT_FILTER_SYNC_OVERLAP)
+                .order_by(URLMap.id)
+                .execution_options(yield_per=SHORT_FILTER_LOAD_CHUNK)
+            ):
+                short_filter.add(short)
+                watermark = max(watermark, row_id)
+            short_filter.watermarks[shard] = watermark
+        short_filter.synced_at = started_at
+        short_filter.loaded = True
+
+
+def check_short_filter(short: str, sync_interval: float):
+    """Проверяет по фильтру Блума, может ли короткая ссылка существовать.
+
+    False означает, что ссылки точно нет и в базу данных можно не ходить,
+    None — что перед ответом фильтр нужно синхронизировать. Ссылки других
+    процессов хоста общий фильтр видит сразу, ссылки других хостов —
+    после синхронизации, поэтому отрицательный ответ окончателен, только
+    пока с неё прошло меньше `sync_interval` секунд.
+    """
+    if short_filter is None:
+        return True
+    if not short_filter.loaded:
+        return None
+    if short in short_filter:
+        return True
+    if time.monotonic() - short_filter.synced_at < sync_interval:
+        return False
+    return None
+
+
+def _short_may_exist(short: str) -> bool:
+    short_filter_sync.ensure_started()
+    requested_at = time.monotonic()
+    verdict = check_short_filter(
+        short, current_app.config['SHORT_FILTER_SYNC_INTERVAL']
+    )
+    if verdict is not None:
+        return verdict
+    # Потоки, ждущие синхронизацию, используют одну на всех
+    sync_short_filter(
+        shard_connections(),
+        current_app.config['SHORT_FILTER_CAPACITY'],
+        requested_at,
+    )
+    return short in short_filter
+
+
+class ShortFilterSync:
+    """Фоновая синхронизация фильтра Блума с базой данных.
+
+    Поток вызывает `sync` вдвое чаще `interval`, чтобы отрицательные
+    ответы фильтра оставались окончательными и запросам не приходилось
+    синхронизировать его самим. Запускается при первом обращении
+    к фильтру и заново — в процессе, созданном через fork.
+    """
+
+    def __init__(self, sync, interval: float, enabled: bool):
+        self._sync = sync
+        self.interval = interval
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopped = threading.Event()
+        self.runs = 0
+        self.failures = 0
+
+    def ensure_started(self) -> None:
+        if not self.enabled or self.interval <= 0:
+            return
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval / 2):
+            try:
+                self._sync()
+                self.runs += 1
+            except Exception:
+                self.failures += 1
+                app.logger.exception(SHORT_FILTER_SYNC_FAILED)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self._pid = None
+        self._stopped.clear()
+
+    def stats(self) -> dict:
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'interval': self.interval,
+            'runs': self.runs,
+            'failures': self.failures,
+        }
+
+
+def _sync_short_filter_in_background() -> None:
+    with app.app_context():
+        try:
+            sync_short_filter(
+                shard_connections(), app.config['SHORT_FILTER_CAPACITY']
+            )
+        finally:
+            db.session.remove()
+
+
+def _raise_if_duplicate_short(error: IntegrityError) -> None:
+    """Превращает нарушение уникальности `url_map.short` в ValidationError.
+
+    Драйвер psycopg сообщает имя нарушенного ограничения, для остальных
+    СУБД оно ищется в тексте ошибки. Прочие ошибки целостности, в том
+    числе с `short` в тексте, пробрасываются как есть.
+    """
+    diag = getattr(error.orig, 'diag', None)
+    constraint = getattr(diag, 'constraint_name', None)
+    if constraint is not None:
+        duplicate = constraint == SHORT_UNIQUE_CONSTRAINT
+    else:
+        duplicate = SHORT_UNIQUE_VIOLATION.search(str(error.orig))
+    if duplicate:
+        raise ValidationError(DUPLICATE_SHORT) from error
+    raise error
+
+
+def hash_url(original: str) -> str:
+    """Хэш оригинальной ссылки для поиска по индексу."""
+    return sha256(original.encode()).hexdigest()
+
+
+def _default_original_hash(context) -> str:
+    return hash_url(context.get_current_parameters()['original'])
 
 
 class URLMap(db.Model):
     """Микро-ORM для работы с короткими ссылками."""
 
+    # Колонка, по которой запись распределяется по шардам
+    __shard_key__ = 'short'
+
     id = db.Column(db.Integer, primary_key=True)
     original = db.Column(db.String(MAX_URL_LENGTH), nullable=False)
+    # Сама колонка `original` слишком длинная для индекса
+    original_hash = db.Column(
+        db.String(ORIGINAL_HASH_LENGTH),
+        nullable=False,
+        index=True,
+        default=_default_original_hash,
+    )
     short = db.Column(
         db.String(MAX_SHORT_LENGTH),
         nullable=False,
         unique=True
     )
     timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
+    # Срок действия в UTC; None — ссылка бессрочная
+    expires_at = db.Column(db.DateTime, index=True, nullable=True)
+    # SHA-256 содержимого файла, загруженного на Яндекс Диск через форму
+    content_digest = db.Column(
+        db.String(CONTENT_DIGEST_LENGTH), index=True, nullable=True
+    )
 
     @staticmethod
     def create(
@@ -46,49 +405,483 @@ class URLMap(db.Model):
         short: str = None,
         *,
         commit: bool = True,
-        validate: bool = True
+        validate: bool = True,
+        expires_at: datetime = None,
+        content_digest: str = None,
     ):
-        """Создает новую запись URL-маппинга."""
+        """Создает новую запись URL-маппинга.
+
+        Занятость идентификатора заранее не проверяется: запись сразу
+        вставляется, а нарушение уникальности `short` превращается
+        в ошибку DUPLICATE_SHORT. Для сгенерированного идентификатора
+        вставка повторяется с новым кандидатом.
+        """
         if validate:
-            if len(original) > MAX_URL_LENGTH:
-                raise ValueError(URL_TOO_LONG)
-            parsed = urlparse(original)
-            if not parsed.scheme or not parsed.netloc:
-                raise ValueError(INVALID_URL_FORMAT)
+            URLMap.validate_original(original)
             if short:
-                URLMap.validate_short(short, require=True, check_unique=True)
+                URLMap.validate_short(short, require=True)
+            URLMap.validate_expires_at(expires_at)
 
-        if not short:
-            short = URLMap.get_unique_short()
+        if short:
+            return URLMap._insert(
+                original, short, commit, expires_at, content_digest
+            )
+        # Дедупликация только для бессрочных ссылок
+        if current_app.config['DEDUPLICATE_URLS'] and expires_at is None:
+            existing = URLMap.find_by_original(original)
+            if existing is not None:
+                return existing
+        for attempt in range(MAX_GENERATION_ATTEMPTS):
+            candidate = short_pool.pop() or URLMap._generate_candidate()
+            if candidate in RESERVED_SHORTS:
+                continue
+            try:
+                return URLMap._insert(
+                    original, candidate, commit, expires_at, content_digest
+                )
+            except ValidationError:
+                continue
+        raise RuntimeError(UNIQUE_SHORT_GENERATION_ERROR)
 
-        url_map = URLMap(original=original, short=short)
+    @staticmethod
+    def _insert(
+        original: str,
+        short: str,
+        commit: bool,
+        expires_at=None,
+        content_digest=None,
+    ):
+        url_map = URLMap(
+            original=original,
+            short=short,
+            expires_at=expires_at,
+            content_digest=content_digest,
+        )
+        if not commit:
+            # Точка сохранения откатывает только эту запись, не трогая
+            # остальные изменения транзакции вызывающего кода
+            try:
+                with db.session.begin_nested():
+                    db.session.add(url_map)
+            except IntegrityError as error:
+                _raise_if_duplicate_short(error)
+            cache_invalidate(short)
+            replica_router.note_writes((short,))
+            return url_map
         db.session.add(url_map)
-        if commit:
-            db.session.commit()
-
+        try:
+            db.session.flush()
+        except IntegrityError as error:
+            db.session.rollback()
+            _raise_if_duplicate_short(error)
+        row = url_map._to_cache_row()
+        db.session.commit()
+        cache_set(short, row)
+        replica_router.note_writes((short,))
         return url_map
 
+    @staticmethod
+    def create_many(items) -> list:
+        """Создаёт записи для пар (original, short) одной транзакцией.
+
+        Пользовательские идентификаторы проверяются одним запросом,
+        недостающие генерируются пачкой, а все записи вставляются
+        многострочным INSERT. Возвращает список той же длины: короткий
+        идентификатор созданной записи или исключение с причиной отказа.
+        При DEDUPLICATE_URLS ссылка без пользовательского идентификатора
+        получает уже существующую бессрочную запись, как в `create`.
+        Конфликт уникальности при вставке повторяется не больше
+        `BULK_INSERT_ATTEMPTS` раз.
+        """
+        for attempt in range(BULK_INSERT_ATTEMPTS):
+            results, reused = URLMap._assign_shorts(items)
+            rows = [
+                {'original': original, 'original_hash': hash_url(original),
+                 'short': result}
+                for index, ((original, _), result) in enumerate(
+                    zip(items, results)
+                )
+                if isinstance(result, str) and index not in reused
+            ]
+            if not rows:
+                return results
+            try:
+                for shard, group in shard_groups(rows, _row_short).items():
+                    connection = shard_connection(shard)
+                    for start in range(0, len(group), BULK_QUERY_CHUNK):
+                        connection.execute(insert(URLMap).values(
+                            group[start:start + BULK_QUERY_CHUNK]
+                        ))
+                db.session.commit()
+            except IntegrityError:
+                # Идентификатор успели занять параллельно: проверяем заново,
+                # теперь он найдётся среди существующих
+                db.session.rollback()
+                continue
+            # Вставка через INSERT ... VALUES не вызывает событий маппера
+            if short_filter is not None:
+                for row in rows:
+                    short_filter.add(row['short'])
+            replica_router.note_writes(row['short'] for row in rows)
+            return results
+        raise RuntimeError(BULK_INSERT_ERROR)
+
+    @staticmethod
+    def _assign_shorts(items):
+        """Назначает парам пакета свободные идентификаторы.
+
+        Возвращает список той же длины (идентификатор или исключение
+        с причиной отказа) и множество позиций, которым при включённой
+        дедупликации достался уже существующий идентификатор.
+        """
+        results, custom = URLMap._check_many(items)
+        for short, index in custom.items():
+            results[index] = short
+        missing = [
+            index for index, (_, short) in enumerate(items)
+            if not short and results[index] is None
+        ]
+        reused, copies = set(), {}
+        if current_app.config['DEDUPLICATE_URLS']:
+            existing = URLMap.find_shorts_by_originals(
+                items[index][0] for index in missing
+            )
+            first = {}
+            for index in missing:
+                original = items[index][0]
+                if original in existing:
+                    results[index] = existing[original]
+                    reused.add(index)
+                elif original in first:
+                    # Повтор ссылки внутри пакета получает ту же запись
+                    copies[index] = first[original]
+                    reused.add(index)
+                else:
+                    first[original] = index
+            missing = list(first.values())
+        generated = URLMap.get_unique_shorts(len(missing), exclude=custom)
+        for index, short in zip(missing, generated):
+            results[index] = short
+        for index, source in copies.items():
+            results[index] = results[source]
+        return results, reused
+
+    @staticmethod
+    def _check_many(items):
+        """Проверяет пары пакета и занятость пользовательских идентификаторов.
+
+        Возвращает список ошибок по позициям и словарь свободных
+        пользовательских идентификаторов с их позициями.
+        """
+        results = [None] * len(items)
+        custom = {}
+        for index, (original, short) in enumerate(items):
+            try:
+                URLMap.validate_original(original)
+                if short:
+                    short = URLMap.validate_short(short, require=True)
+            # Ошибка одной пары не должна срывать весь пакет
+            except (
+                AttributeError, TypeError, ValueError, ValidationError
+            ) as error:
+                results[index] = error
+                continue
+            if not short:
+                continue
+            if short in custom:
+                results[index] = ValidationError(DUPLICATE_SHORT)
+                continue
+            custom[short] = index
+        for short in URLMap._existing_shorts(custom):
+            results[custom.pop(short)] = ValidationError(DUPLICATE_SHORT)
+        return results, custom
+
+    @staticmethod
+    def _existing_shorts(shorts) -> set:
+        """Возвращает те из `shorts`, что уже заняты в базе данных.
+
+        Каждый шард получает запросы только со своими ссылками. Фильтр
+        Блума здесь не применяется: он может не знать о ссылке, только что
+        созданной другим процессом.
+        """
+        existing = set()
+        for shard, group in shard_groups(shorts).items():
+            connection = shard_connection(shard)
+            for start in range(0, len(group), BULK_QUERY_CHUNK):
+                existing.update(connection.scalars(
+                    select(URLMap.short).where(URLMap.short.in_(
+                        group[start:start + BULK_QUERY_CHUNK]
+                    ))
+                ))
+        return existing
+
+    @staticmethod
+    def keyset_query(after: tuple = None, position: int = 0):
+        """Запрос записей шарда номер `position` после ключа `after`.
+
+        Общий порядок — (timestamp, номер шарда, id), ключ `after` —
+        (timestamp, id, номер шарда). Условие раскрыто через OR, чтобы
+        база данных шла по индексу `ix_url_map_timestamp` без OFFSET.
+        """
+        query = select(
+            URLMap.id,
+            URLMap.original,
+            URLMap.short,
+            URLMap.timestamp,
+            literal(position).label('shard'),
+        ).order_by(URLMap.timestamp, URLMap.id)
+        if after is None:
+            return query
+        timestamp, row_id, after_position = after
+        if position != after_position:
+            # В шардах после шарда ключа подходит и то же время
+            return query.where(
+                URLMap.timestamp >= timestamp
+                if position > after_position
+                else URLMap.timestamp > timestamp
+            )
+        return query.where(or_(
+            URLMap.timestamp > timestamp,
+            and_(URLMap.timestamp == timestamp, URLMap.id > row_id),
+        ))
+
+    @staticmethod
+    def keyset_rows(after: tuple = None, limit: int = None, chunk_size=None):
+        """Записи всех шардов в порядке (timestamp, шард, id) после `after`.
+
+        Шарды читаются параллельными курсорами, а строки сливаются
+        по мере чтения, поэтому память не зависит от размера таблиц.
+        """
+        streams = []
+        for position, connection in enumerate(shard_connections().values()):
+            query = URLMap.keyset_query(after, position)
+            if limit is not None:
+                query = query.limit(limit)
+            if chunk_size is not None:
+                query = query.execution_options(yield_per=chunk_size)
+            streams.append(connection.execute(query))
+        return islice(heapq.merge(
+            *streams, key=lambda row: (row.timestamp, row.shard, row.id)
+        ), limit)
+
+    @staticmethod
+    def find_by_original(original: str):
+        """Находит самую раннюю бессрочную запись с той же ссылкой.
+
+        Шарды распределены по короткой ссылке, поэтому опрашиваются все
+        по очереди до первой найденной записи.
+        """
+        query = select(URLMap).filter_by(
+            original_hash=hash_url(original),
+            original=original,
+            expires_at=None,
+        ).order_by(URLMap.id).limit(1)
+        for shard in url_map_shards():
+            url_map = _execute_on_shard(query, shard).scalar_one_or_none()
+            if url_map is not None:
+                return url_map
+        return None
+
+    @staticmethod
+    def find_shorts_by_originals(originals) -> dict:
+        """Пакетный аналог `find_by_original`.
+
+        Возвращает словарь {оригинальная ссылка: короткая ссылка} для тех
+        из `originals`, у которых есть бессрочная запись.
+        """
+        originals = set(originals)
+        hashes = sorted({hash_url(original) for original in originals})
+        found = {}
+        for shard in url_map_shards():
+            connection = shard_connection(shard)
+            for start in range(0, len(hashes), BULK_QUERY_CHUNK):
+                for original, short in connection.execute(
+                    select(URLMap.original, URLMap.short).where(
+                        URLMap.original_hash.in_(
+                            hashes[start:start + BULK_QUERY_CHUNK]
+                        ),
+                        URLMap.expires_at.is_(None),
+                    ).order_by(URLMap.id)
+                ):
+                    if original in originals:
+                        found.setdefault(original, short)
+        return found
+
+    @staticmethod
+    def find_originals_by_digest(digests) -> dict:
+        """Ссылки на уже загруженные файлы с тем же содержимым.
+
+        Возвращает словарь {хэш содержимого: оригинальная ссылка} по
+        действующим записям; при нескольких записях с одним содержимым
+        берётся самая новая.
+        """
+        digests = list(set(digests))
+        if not digests:
+            return {}
+        query = select(
+            URLMap.content_digest, URLMap.original, URLMap.timestamp
+        ).where(
+            URLMap.content_digest.in_(digests),
+            or_(
+                URLMap.expires_at.is_(None),
+                URLMap.expires_at > datetime.utcnow(),
+            ),
+        )
+        latest = {}
+        for connection in shard_connections().values():
+            for row in connection.execute(query):
+                known = latest.get(row.content_digest)
+                if known is None or row.timestamp > known.timestamp:
+                    latest[row.content_digest] = row
+        return {
+            digest: row.original for digest, row in latest.items()
+        }
+
     @staticmethod
     def find(short: str):
         """Находит запись по короткому идентификатору."""
-        return db.session.execute(
-            select(URLMap).filter_by(short=short)
+        row = cache_get(short)
+        if row is not None and row[0] is not None:
+            return URLMap._from_cache_row(row)
+        if not _short_may_exist(short):
+            return None
+        url_map = _execute_on_shard(
+            select(URLMap).filter_by(short=short), shard_of(short)
         ).scalar_one_or_none()
+        if url_map is not None:
+            cache_set(short, url_map._to_cache_row())
+        return url_map
 
     @staticmethod
-    def get_unique_short() -> str:
-        """Генерирует уникальный короткий идентификатор."""
-        for attempt in range(MAX_GENERATION_ATTEMPTS):
-            candidate = ''.join(
+    def resolve(short: str):
+        """Возвращает оригинальную ссылку по короткой или None.
+
+        В отличие от `find` читает только ссылку и срок действия и не
+        создаёт ORM-объект, поэтому используется на горячем пути
+        переадресации. Для истёкшей ссылки возвращается None.
+        """
+        row = URLMap.resolve_row(short)
+        return None if row is None else row[1]
+
+    @staticmethod
+    def resolve_row(short: str):
+        """Возвращает строку кэша действующей ссылки или None.
+
+        В кэш попадает неполная запись без id и времени создания.
+        Истёкшая запись из кэша перечитывается из базы данных: другой
+        процесс мог удалить её и создать ссылку с тем же именем заново.
+        """
+        if (row := cache_get(short)) is not None and not is_expired(row[4]):
+            return row
+        if not _short_may_exist(short):
+            return None
+        found = _read_original(short)
+        if found is None or is_expired(found.expires_at):
+            return None
+        row = (None, found.original, short, None, found.expires_at)
+        cache_set(short, row)
+        return row
+
+    @staticmethod
+    def _from_cache_row(row: tuple):
+        """Восстанавливает запись из кэша без обращения к базе данных."""
+        url_map = URLMap(**dict(zip(CACHED_FIELDS, row)))
+        inspect(url_map).identity_token = shard_of(url_map.short)
+        make_transient_to_detached(url_map)
+        return db.session.merge(url_map, load=False)
+
+    def _to_cache_row(self) -> tuple:
+        return tuple(getattr(self, field) for field in CACHED_FIELDS)
+
+    @staticmethod
+    def _generate_candidate() -> str:
+        config = current_app.config
+        if config['SHORT_ID_MODE'] != SHORT_ID_MODE_SEQUENCE:
+            return ''.join(
                 random.choices(SHORT_CHARS, k=DEFAULT_SHORT_LENGTH)
             )
-            if candidate not in RESERVED_SHORTS and not URLMap.find(candidate):
+        value = sequence_allocator.next_value(config['SHORT_ID_BLOCK_SIZE'])
+        if config['SHORT_ID_PERMUTE']:
+            key = config['SHORT_ID_KEY'] or config['SECRET_KEY']
+            value = permute(value, key.encode())
+        return encode_base62(value)
+
+    @staticmethod
+    def get_unique_short() -> str:
+        """Генерирует уникальный короткий идентификатор.
+
+        Сначала идентификатор берётся из запаса `short_pool`. Проверка
+        по базе данных нужна на случай, если его успели занять.
+        """
+        for attempt in range(MAX_GENERATION_ATTEMPTS):
+            candidate = short_pool.pop() or URLMap._generate_candidate()
+            if (
+                candidate not in RESERVED_SHORTS
+                and not URLMap._existing_shorts([candidate])
+            ):
                 return candidate
         raise RuntimeError(UNIQUE_SHORT_GENERATION_ERROR)
 
     @staticmethod
-    def validate_short(value, *, require=False, check_unique=False):
+    def take_unique_shorts(count: int) -> list:
+        """Берёт `count` свободных идентификаторов, сначала из `short_pool`.
+
+        Недостающие генерируются одной пачкой через `get_unique_shorts`.
+        """
+        shorts = []
+        while len(shorts) < count and (short := short_pool.pop()) is not None:
+            shorts.append(short)
+        return shorts + URLMap.get_unique_shorts(
+            count - len(shorts), exclude=shorts
+        )
+
+    @staticmethod
+    def get_unique_shorts(count: int, exclude=()) -> list:
+        """Генерирует `count` уникальных идентификаторов.
+
+        Кандидаты проверяются в базе данных пачкой, а не по одному.
+        """
+        shorts = []
+        seen = set(exclude)
+        for attempt in range(MAX_GENERATION_ATTEMPTS):
+            if len(shorts) == count:
+                return shorts
+            candidates = []
+            for _ in range(count - len(shorts)):
+                candidate = URLMap._generate_candidate()
+                if candidate not in RESERVED_SHORTS and candidate not in seen:
+                    seen.add(candidate)
+                    candidates.append(candidate)
+            existing = URLMap._existing_shorts(candidates)
+            shorts.extend(
+                short for short in candidates if short not in existing
+            )
+        if len(shorts) == count:
+            return shorts
+        raise RuntimeError(UNIQUE_SHORT_GENERATION_ERROR)
+
+    @staticmethod
+    def validate_original(original: str) -> None:
+        """Проверяет тип, длину и формат оригинальной ссылки."""
+        if not isinstance(original, str):
+            raise ValueError(INVALID_URL_FORMAT)
+        if len(original) > MAX_URL_LENGTH:
+            raise ValueError(URL_TOO_LONG)
+        parsed = urlparse(original)
+        if not parsed.scheme or not parsed.netloc:
+            raise ValueError(INVALID_URL_FORMAT)
+
+    @staticmethod
+    def validate_expires_at(expires_at) -> None:
+        """Срок действия новой ссылки должен быть в будущем."""
+        if is_expired(expires_at):
+            raise ValidationError(EXPIRES_IN_PAST)
+
+    @staticmethod
+    def validate_short(value, *, require=False):
         """Валидация короткого идентификатора."""
+        if value is not None and not isinstance(value, str):
+            raise ValidationError(INVALID_SHORT)
         if value is None or not value or not value.strip():
             if require:
                 raise ValidationError(INVALID_SHORT)
@@ -105,11 +898,272 @@ class URLMap(db.Model):
         if not ALLOWED_SHORT_PATTERN.fullmatch(trimmed):
             raise ValidationError(INVALID_SHORT)
 
-        if check_unique and URLMap.find(trimmed):
-            raise ValidationError(DUPLICATE_SHORT)
-
         return trimmed
 
     def get_short_url(self) -> str:
         """Возвращает полный короткий URL."""
         return url_for(REDIRECT_VIEW_NAME, short=self.short, _external=True)
+
+
+class ShortSequence(db.Model):
+    """Счётчик, из которого короткие ссылки выдаются блоками."""
+
+    name = db.Column(db.String(32), primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False)
+
+    @staticmethod
+    def allocate(name: str, size: int) -> int:
+        """Резервирует `size` номеров и возвращает первый из них.
+
+        Работает в собственной транзакции, чтобы не фиксировать изменения
+        текущей сессии и не держать блокировку строки счётчика.
+        """
+        table = ShortSequence.__table__
+        try:
+            with db.engine.begin() as connection:
+                updated = connection.execute(
+                    update(table)
+                    .where(table.c.name == name)
+                    .values(next_value=table.c.next_value + size)
+                ).rowcount
+                if updated:
+                    return connection.scalar(
+                        select(table.c.next_value)
+                        .where(table.c.name == name)
+                    ) - size
+                connection.execute(
+                    insert(table).values(name=name, next_value=size)
+                )
+                return 0
+        except IntegrityError:
+            # Счётчик одновременно создал другой процесс
+            return ShortSequence.allocate(name, size)
+
+
+class URLClick(db.Model):
+    """Накопленное число переходов по короткой ссылке."""
+
+    short = db.Column(db.String(MAX_SHORT_LENGTH), primary_key=True)
+    clicks = db.Column(db.BigInteger, nullable=False, default=0)
+
+    @staticmethod
+    def add_clicks(deltas, *, commit: bool = True) -> None:
+        """Прибавляет приращения одним многострочным upsert-запросом."""
+        rows = [{'short': short, 'clicks': delta} for short, delta in deltas]
+        if not rows:
+            return
+        db.session.execute(
+            _upsert_increment(URLClick, rows, ('short',), ('clicks',))
+        )
+        if commit:
+            db.session.commit()
+
+    @staticmethod
+    def get_clicks(short: str) -> int:
+        return db.session.scalar(
+            select(URLClick.clicks).filter_by(short=short)
+        ) or 0
+
+
+class URLStats(db.Model):
+    """Число переходов по короткой ссылке за час или сутки.
+
+    Строки обновляются инкрементально при сбросе счётчиков, поэтому чтение
+    статистики стоит O(число интервалов) и не трогает отдельные переходы.
+    """
+
+    short = db.Column(db.String(MAX_SHORT_LENGTH), primary_key=True)
+    period = db.Column(db.String(8), primary_key=True)
+    bucket = db.Column(db.DateTime, primary_key=True)
+    clicks = db.Column(db.BigInteger, nullable=False, default=0)
+
+    @staticmethod
+    def add_clicks(period: str, deltas, *, commit: bool = True) -> None:
+        """Прибавляет приращения вида ((short, bucket), clicks)."""
+        rows = [
+            {'short': short, 'period': period, 'bucket': bucket,
+             'clicks': delta}
+            for (short, bucket), delta in deltas
+        ]
+        if not rows:
+            return
+        db.session.execute(_upsert_increment(
+            URLStats, rows, ('short', 'period', 'bucket'), ('clicks',)
+        ))
+        if commit:
+            db.session.commit()
+
+    @staticmethod
+    def get_buckets(short: str, period: str, since: datetime):
+        """Возвращает интервалы с переходами начиная с `since`."""
+        return db.session.execute(
+            select(URLStats.bucket, URLStats.clicks)
+            .filter_by(short=short, period=period)
+            .where(URLStats.bucket >= since)
+            .order_by(URLStats.bucket)
+        ).all()
+
+
+class UploadJob(db.Model):
+    """Фоновая загрузка файлов формы на Яндекс Диск.
+
+    Файлы задачи лежат в каталоге `UPLOAD_SPOOL_DIR`, а результаты
+    сохраняются списком словарей с именем файла и короткой ссылкой.
+    """
+
+    id = db.Column(db.String(JOB_ID_LENGTH), primary_key=True)
+    status = db.Column(
+        db.String(16), nullable=False, default=JOB_QUEUED, index=True
+    )
+    filenames = db.Column(db.JSON, nullable=False)
+    # Хэши содержимого файлов, посчитанные при приёме формы
+    digests = db.Column(db.JSON, nullable=True)
+    results = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(
+        db.DateTime, nullable=False, default=datetime.utcnow
+    )
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    @staticmethod
+    def claim_next(timeout: float):
+        """Забирает самую старую задачу из очереди и возвращает её id.
+
+        Задача переводится в `running` условным UPDATE в отдельной
+        транзакции, поэтому её получит только один обработчик, даже если
+        очередь разбирают несколько процессов. Задачи, которые выполняются
+        дольше `timeout` секунд, считаются брошенными упавшим процессом
+        и выдаются снова. Возвращает None, если очередь пуста.
+        """
+        table = UploadJob.__table__
+        while True:
+            now = datetime.utcnow()
+            waiting = or_(
+                table.c.status == JOB_QUEUED,
+                and_(
+                    table.c.status == JOB_RUNNING,
+                    table.c.started_at < now - timedelta(seconds=timeout),
+                ),
+            )
+            with db.engine.begin() as connection:
+                found = connection.execute(
+                    select(table.c.id, table.c.status, table.c.started_at)
+                    .where(waiting)
+                    .order_by(table.c.created_at)
+                    .limit(1)
+                ).one_or_none()
+                if found is None:
+                    return None
+                claimed = connection.execute(
+                    update(table)
+                    .where(
+                        table.c.id == found.id,
+                        table.c.status == found.status,
+                        or_(
+                            table.c.started_at.is_(None),
+                            table.c.started_at == found.started_at,
+                        ),
+                    )
+                    .values(status=JOB_RUNNING, started_at=now)
+                ).rowcount
+            # Если задачу перехватил другой обработчик, берём следующую
+            if claimed:
+                return found.id
+
+
+def _read_original(short: str):
+    """Читает ссылку и срок действия с реплики или с основной базы.
+
+    Промах на реплике почти всегда означает отставание репликации:
+    несуществующие ссылки уже отсеяны фильтром Блума, поэтому запрос
+    повторяется на основной базе. Реплики используются только без
+    шардирования.
+    """
+    replica = None
+    if not current_app.config['URL_MAP_SHARDS']:
+        replica = replica_router.choose(short)
+    if replica is not None:
+        try:
+            with db.engines[replica].connect() as connection:
+                found = connection.execute(
+                    RESOLVE_STATEMENT, {'short': short}
+                ).one_or_none()
+        except DBAPIError:
+            replica_router.mark_failed(replica)
+            app.logger.warning(
+                REPLICA_FAILED.format(replica=replica), exc_info=True
+            )
+        else:
+            if found is not None:
+                return found
+            replica_router.note_fallback()
+    return shard_connection(shard_of(short)).execute(
+        RESOLVE_STATEMENT, {'short': short}
+    ).one_or_none()
+
+
+def _upsert_increment(model, rows, keys, counters):
+    """Строит INSERT, увеличивающий счётчики при конфликте по ключу."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        statement = mysql.insert(model).values(rows)
+        return statement.on_duplicate_key_update({
+            counter: getattr(model, counter) + statement.inserted[counter]
+            for counter in counters
+        })
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    statement = insert(model).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=keys,
+        set_={
+            counter: getattr(model, counter) + statement.excluded[counter]
+            for counter in counters
+        },
+    )
+
+
+sequence_allocator = SequenceAllocator(
+    lambda size: ShortSequence.allocate(SHORT_SEQUENCE_NAME, size)
+)
+metrics.register('short_sequence', sequence_allocator.stats)
+
+
+def _generate_free_shorts(count: int) -> list:
+    with app.app_context():
+        return URLMap.get_unique_shorts(count)
+
+
+replica_router = ReplicaRouter(
+    app.config['URL_MAP_REPLICAS'],
+    app.config['REPLICA_FALLBACK_WINDOW'],
+    app.config['REPLICA_RETRY_INTERVAL'],
+)
+metrics.register('replicas', replica_router.stats)
+
+short_pool = ShortPool(
+    _generate_free_shorts,
+    app.config['SHORT_POOL_SIZE'],
+    app.config['SHORT_POOL_BATCH_SIZE'],
+)
+metrics.register('short_pool', short_pool.stats)
+
+short_filter_sync = ShortFilterSync(
+    _sync_short_filter_in_background,
+    app.config['SHORT_FILTER_SYNC_INTERVAL'],
+    short_filter is not None and app.config['SHORT_FILTER_BACKGROUND_SYNC'],
+)
+if short_filter is not None:
+    metrics.register('short_filter_sync', short_filter_sync.stats)
+
+# Запрос строится один раз: SQLAlchemy переиспользует его скомпилированную
+# форму из кэша при каждом вызове `URLMap.resolve`
+RESOLVE_STATEMENT = select(URLMap.original, URLMap.expires_at).where(
+    URLMap.short == bindparam('short')
+)
+
+
+@event.listens_for(URLMap, 'after_insert')
+def _add_to_short_filter(mapper, connection, target):
+    if short_filter is not None:
+        short_filter.add(target.short)
@@ -0,0 +1,105 @@
+"""Перенос записей `url_map` в свои шарды после изменения их числа."""
+import time
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+
+from yacut import db
+from yacut.models import URLMap, cache_invalidate
+from yacut.sharding import shard_for
+
+MOVED_FIELDS = (
+    'original', 'original_hash', 'short', 'timestamp', 'expires_at',
+    'content_digest',
+)
+
+
+def _existing(engine, shorts) -> dict:
+    """Оригинальные ссылки уже занятых в базе коротких ссылок."""
+    with engine.connect() as connection:
+        return dict(connection.execute(
+            select(URLMap.short, URLMap.original)
+            .where(URLMap.short.in_(shorts))
+        ).all())
+
+
+def _move(source, target, rows, report: dict) -> None:
+    """Переносит строки одной порции из базы `source` в шард `target`.
+
+    Строка сначала фиксируется в целевом шарде и только затем удаляется
+    из исходной базы, поэтому при сбое ссылка на время окажется в двух
+    базах, но не пропадёт.
+    """
+    existing = _existing(target, [row.short for row in rows])
+    moved, fresh = [], []
+    for row in rows:
+        if row.short not in existing:
+            fresh.append(row)
+        elif existing[row.short] == row.original:
+            # Перенесена прошлым прерванным запуском
+            moved.append(row)
+        else:
+            report['conflicts'].append(row.short)
+    if fresh:
+        with target.begin() as connection:
+            connection.execute(insert(URLMap), [
+                {field: getattr(row, field) for field in MOVED_FIELDS}
+                for row in fresh
+            ])
+    moved += fresh
+    if not moved:
+        return
+    with source.begin() as connection:
+        connection.execute(
+            delete(URLMap).where(URLMap.id.in_([row.id for row in moved]))
+        )
+    for row in moved:
+        cache_invalidate(row.short)
+    report['moved'] += len(moved)
+
+
+def rebalance_shards(sources: dict, chunk_size: int, on_chunk=None) -> dict:
+    """Переносит записи из баз `sources` в шарды, которым они принадлежат.
+
+    `sources` — движки по ключам привязок: все текущие шарды и, при
+    необходимости, основная база или убранные из настройки шарды (под
+    ключом, которого нет в `URL_MAP_SHARDS`). Каждая база читается
+    порциями по id; запись, занятая в целевом шарде другой ссылкой,
+    остаётся на месте и попадает в `report['conflicts']`.
+    """
+    shards = current_app.config['URL_MAP_SHARDS']
+    started = time.monotonic()
+    report = {'scanned': 0, 'moved': 0, 'conflicts': []}
+    query = select(URLMap.id, *(
+        getattr(URLMap, field) for field in MOVED_FIELDS
+    )).order_by(URLMap.id).limit(chunk_size)
+    # Строки, перенесённые в базу во время обхода, получают id больше
+    # запомненного и повторно не читаются
+    highest = {}
+    for key, source in sources.items():
+        with source.connect() as connection:
+            highest[key] = connection.scalar(select(func.max(URLMap.id)))
+    for key, source in sources.items():
+        last_id = 0
+        while highest[key] is not None:
+            # Чтение не держит транзакцию, пока порция удаляется
+            with source.connect() as connection:
+                rows = connection.execute(query.where(
+                    URLMap.id > last_id, URLMap.id <= highest[key]
+                )).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            groups = {}
+            for row in rows:
+                target = shard_for(row.short, shards)
+                if target != key:
+                    groups.setdefault(target, []).append(row)
+            for target, group in groups.items():
+                _move(source, db.engines[target], group, report)
+            report['scanned'] += len(rows)
+            report['elapsed'] = time.monotonic() - started
+            if on_chunk is not None:
+                on_chunk(report)
+    report['elapsed'] = time.monotonic() - started
+    return report
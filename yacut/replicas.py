@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ReplicaRouter:
+    """Выбор реплики для чтения с учётом её доступности.
+
+    Реплики перебираются по кругу. Реплика, на которой запрос завершился
+    ошибкой, пропускается `retry_interval` секунд. Короткие ссылки,
+    созданные этим процессом за последние `fallback_window` секунд,
+    читаются с основной базы: реплика могла ещё не получить запись.
+    """
+
+    def __init__(
+        self, replicas, fallback_window: float, retry_interval: float
+    ):
+        self.replicas = list(replicas)
+        self.fallback_window = fallback_window
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._next = 0
+        self._down_until = {}
+        self._written = OrderedDict()
+        self.reads = {}
+        self.failures = {}
+        self.primary_reads = 0
+        self.fallbacks = 0
+
+    def note_writes(self, shorts) -> None:
+        """Запоминает только что созданные ссылки."""
+        if not self.replicas:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for short in shorts:
+                self._written[short] = now
+                self._written.move_to_end(short)
+            self._forget_old(now)
+
+    def _forget_old(self, now: float) -> None:
+        # Записи упорядочены по времени, устаревшие всегда в начале
+        while self._written:
+            short, moment = next(iter(self._written.items()))
+            if now - moment < self.fallback_window:
+                break
+            del self._written[short]
+
+    def choose(self, short: str):
+        """Ключ привязки реплики для чтения или None — читать с основной."""
+        if not self.replicas:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._forget_old(now)
+            if short in self._written:
+                self.primary_reads += 1
+                return None
+            for _ in range(len(self.replicas)):
+                replica = self.replicas[self._next % len(self.replicas)]
+                self._next += 1
+                if self._down_until.get(replica, 0) <= now:
+                    self.reads[replica] = self.reads.get(replica, 0) + 1
+                    return replica
+            # Все реплики недоступны
+            self.primary_reads += 1
+            return None
+
+    def mark_failed(self, replica) -> None:
+        with self._lock:
+            self._down_until[replica] = (
+                time.monotonic() + self.retry_interval
+            )
+            self.failures[replica] = self.failures.get(replica, 0) + 1
+
+    def note_fallback(self) -> None:
+        """Учитывает повторное чтение с основной базы после промаха."""
+        with self._lock:
+            self.fallbacks += 1
+
+    def clear(self) -> None:
+        """Сбрасывает состояние реплик и счётчики."""
+        with self._lock:
+            self._next = 0
+            self._down_until.clear()
+            self._written.clear()
+            self.reads.clear()
+            self.failures.clear()
+            self.primary_reads = self.fallbacks = 0
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'replicas': {
+                    replica: {
+                        'healthy': self._down_until.get(replica, 0) <= now,
+                        'reads': self.reads.get(replica, 0),
+                        'failures': self.failures.get(replica, 0),
+                    }
+                    for replica in self.replicas
+                },
+                'primary_reads': self.primary_reads,
+                'fallbacks': self.fallbacks,
+                'recent_writes': len(self._written),
+            }
@@ -1,7 +1,8 @@
 import asyncio
 from dataclasses import dataclass
 from http import HTTPStatus
-from typing import Iterable, List
+from hashlib import sha256
+from typing import AsyncIterator, BinaryIO, Dict, Iterable, List, Optional
 
 import aiohttp
 from aiohttp import ClientError
@@ -13,6 +14,7 @@ from yacut.constants import (
     YANDEX_UPLOAD_ENDPOINT,
 )
 from yacut.models import URLMap
+from yacut.upstream import upstream
 
 
 # Сообщения об ошибках
@@ -33,8 +35,14 @@ class YandexDiskServiceError(Exception):
 
 @dataclass
 class FileToUpload:
+    """Файл для загрузки; содержимое читается из `stream` порциями.
+
+    `digest` — SHA-256 содержимого, если он уже посчитан при приёме файла.
+    """
+
     filename: str
-    content: bytes
+    stream: BinaryIO
+    digest: Optional[str] = None
 
 
 @dataclass
@@ -42,6 +50,7 @@ class UploadedFile:
     filename: str
     short: str
     original_url: str
+    content_digest: Optional[str] = None
 
 
 async def _raise_for_status(response):
@@ -93,12 +102,25 @@ async def _request_upload_link(
     return href
 
 
+async def _read_chunks(
+    stream: BinaryIO, chunk_size: int
+) -> AsyncIterator[bytes]:
+    # Чтение временного файла с диска блокирует, поэтому идёт в пуле
+    # потоков, чтобы не задерживать остальные запросы цикла событий
+    while chunk := await asyncio.to_thread(stream.read, chunk_size):
+        yield chunk
+
+
 async def _upload_file_content(
     session: aiohttp.ClientSession,
     href: str,
-    content: bytes,
+    stream: BinaryIO,
+    chunk_size: int,
 ) -> None:
-    async with session.put(href, data=content) as response:
+    """Отправляет содержимое файла, не читая его в память целиком."""
+    async with session.put(
+        href, data=_read_chunks(stream, chunk_size)
+    ) as response:
         await _raise_for_status(response)
 
 
@@ -126,11 +148,12 @@ async def _upload_single_file(
     session: aiohttp.ClientSession,
     token: str,
     file: FileToUpload,
+    short: str,
+    chunk_size: int,
 ) -> UploadedFile:
-    short = URLMap.get_unique_short()
     path = _build_disk_path(short, file.filename)
     upload_href = await _request_upload_link(session, token, path)
-    await _upload_file_content(session, upload_href, file.content)
+    await _upload_file_content(session, upload_href, file.stream, chunk_size)
     download_href = await _request_download_link(session, token, path)
     return UploadedFile(
         filename=file.filename,
@@ -140,20 +163,78 @@ async def _upload_single_file(
 
 
 async def _upload_files_async(
+    session: aiohttp.ClientSession,
     files: List[FileToUpload],
+    shorts: List[str],
+    known: Dict[str, str],
     token: str,
+    concurrency: int,
+    chunk_size: int,
 ) -> List[UploadedFile]:
-    async with aiohttp.ClientSession() as session:
-        results: List[UploadedFile] = []
-        for file in files:
-            results.append(await _upload_single_file(session, token, file))
-        return results
+    """Загружает файлы параллельно, не больше `concurrency` одновременно.
+
+    Файлы, содержимое которых уже есть на Диске (`known` — ссылки по
+    хэшу содержимого), и повторы внутри одной формы не загружаются:
+    их новые короткие ссылки ведут на уже загруженный файл. Результаты
+    возвращаются в порядке файлов. При ошибке одного файла загрузка
+    остальных отменяется, а ошибка пробрасывается.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def upload(file: FileToUpload, short: str) -> UploadedFile:
+        async with semaphore:
+            return await _upload_single_file(
+                session, token, file, short, chunk_size
+            )
+
+    uploads = {}
+    for file, short in zip(files, shorts):
+        if file.digest not in known and file.digest not in uploads:
+            uploads[file.digest] = asyncio.create_task(upload(file, short))
+    tasks = list(uploads.values())
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    originals = dict(known)
+    for digest, task in uploads.items():
+        originals[digest] = task.result().original_url
+    return [
+        UploadedFile(
+            filename=file.filename,
+            short=short,
+            original_url=originals[file.digest],
+            content_digest=file.digest,
+        )
+        for file, short in zip(files, shorts)
+    ]
+
+
+def _stream_digest(stream: BinaryIO, chunk_size: int) -> str:
+    """SHA-256 содержимого потока; поток возвращается в начало."""
+    digest = sha256()
+    while chunk := stream.read(chunk_size):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
 
 
 def prepare_files_for_upload(file_storages):
-    """Преобразует FileStorage объекты в FileToUpload."""
+    """Преобразует FileStorage объекты в FileToUpload.
+
+    Файлы не читаются: загрузка идёт прямо из потоков FileStorage, которые
+    Werkzeug сбрасывает на диск во временные файлы, а хэш содержимого
+    посчитан при разборе формы.
+    """
     return (
-        FileToUpload(filename=storage.filename, content=storage.read())
+        FileToUpload(
+            filename=storage.filename,
+            stream=storage.stream,
+            digest=getattr(storage.stream, 'content_digest', None),
+        )
         for storage in file_storages
     )
 
@@ -167,8 +248,27 @@ def upload_files_to_yandex_disk(
         return []
     if not token:
         raise YandexDiskServiceError(TOKEN_MISSING_ERROR)
+    chunk_size = current_app.config['UPLOAD_CHUNK_SIZE']
+    for file in file_list:
+        if file.digest is None:
+            file.digest = _stream_digest(file.stream, chunk_size)
+    # База данных опрашивается до передачи работы в фоновый цикл:
+    # идентификаторы берутся из запаса, недостающие выдаются одной
+    # пачкой, а уже загруженные файлы находятся по хэшу содержимого
+    shorts = URLMap.take_unique_shorts(len(file_list))
+    known = URLMap.find_originals_by_digest(
+        file.digest for file in file_list
+    )
     try:
-        return asyncio.run(_upload_files_async(file_list, token))
+        return upstream.run(
+            _upload_files_async,
+            file_list,
+            shorts,
+            known,
+            token,
+            current_app.config['UPLOAD_CONCURRENCY'],
+            chunk_size,
+        )
     except YandexDiskServiceError:
         raise
     except (ClientError, asyncio.TimeoutError) as exc:
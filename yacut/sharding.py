@@ -0,0 +1,76 @@
+"""Горизонтальное шардирование таблицы `url_map` по ключу `short`.
+
+Шарды — это обычные привязки Flask-SQLAlchemy (`SQLALCHEMY_BINDS`),
+перечисленные в `URL_MAP_SHARDS`. Шард записи определяется только её
+короткой ссылкой, поэтому поиск, проверка занятости и вставка идут в одну
+базу, а уникальность `short` внутри шарда означает глобальную уникальность.
+При пустом `URL_MAP_SHARDS` всё хранится в основной базе, как раньше.
+"""
+from zlib import crc32
+
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, inspect
+
+
+def shard_for(short: str, shards) -> str:
+    """Ключ привязки шарда для короткой ссылки; None — основная база."""
+    if not shards:
+        return None
+    return shards[crc32(short.encode()) % len(shards)]
+
+
+def group_by_shard(items, shards, key=None) -> dict:
+    """Раскладывает элементы по шардам, сохраняя их порядок.
+
+    `key` достаёт из элемента короткую ссылку; по умолчанию элементы
+    сами являются короткими ссылками.
+    """
+    groups = {}
+    for item in items:
+        short = item if key is None else key(item)
+        groups.setdefault(shard_for(short, shards), []).append(item)
+    return groups
+
+
+class ShardedSession(Session):
+    """Сессия, которая записывает строки шардированных моделей в их шард.
+
+    Модель объявляет шардирование атрибутом `__shard_key__` с именем
+    колонки-ключа. Чтение такой модели должно явно указывать привязку
+    шарда: без неё запрос уходит в основную базу.
+    """
+
+    @property
+    def connection_callable(self):
+        # Без шардов сессия не отличается от стандартной, в том числе
+        # поддерживает bulk-вставки ORM
+        if not current_app.config['URL_MAP_SHARDS']:
+            return None
+        return self._connection_for_instance
+
+    def _connection_for_instance(self, mapper, instance):
+        key = getattr(mapper.class_, '__shard_key__', None)
+        if key is None:
+            return self.connection(bind_arguments={'mapper': mapper})
+        shard = shard_for(
+            getattr(instance, key), current_app.config['URL_MAP_SHARDS']
+        )
+        # id уникален только внутри шарда, поэтому шард входит
+        # в ключ идентичности объекта
+        inspect(instance).identity_token = shard
+        return self.connection(
+            bind_arguments={'bind': self._db.engines[shard]}
+        )
+
+
+@event.listens_for(ShardedSession, 'do_orm_execute')
+def _route_by_identity_token(orm_context):
+    """Догружает атрибуты объекта из шарда, из которого он прочитан."""
+    if not orm_context.is_select or 'bind' in orm_context.bind_arguments:
+        return
+    shard = orm_context.load_options._identity_token
+    if shard is not None:
+        orm_context.bind_arguments['bind'] = (
+            orm_context.session._db.engines[shard]
+        )
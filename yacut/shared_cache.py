@@ -0,0 +1,207 @@
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+# Заголовок файла: сигнатура, версия формата, число слотов, размер значения
+FILE_HEADER = struct.Struct('<4sHIH')
+FILE_MAGIC = b'YCSC'
+# Повышается и при смене формата строк в значениях (models._pack_row),
+# чтобы файл от предыдущей версии приложения был сброшен
+FORMAT_VERSION = 2
+# Заголовок слота: версия (seqlock), состояние, длина ключа, длина значения
+SLOT_HEADER = struct.Struct('<IBBH')
+SLOT_EMPTY, SLOT_USED, SLOT_DELETED = 0, 1, 2
+MAX_PROBES = 8
+MAX_READ_RETRIES = 3
+
+
+class SharedCache:
+    """Хеш-таблица с открытой адресацией в отображаемом в память файле.
+
+    Файл разделяется всеми процессами на хосте: чтение идёт без блокировок
+    (целостность слота проверяется через seqlock), запись сериализуется
+    через `flock`. Переполнение таблицы приводит к вытеснению записей,
+    поэтому структура годится только как кэш.
+    """
+
+    def __init__(self, path: str, slots: int, key_size: int,
+                 value_size: int):
+        self.path = path
+        self.slots = slots
+        self.key_size = key_size
+        self.value_size = value_size
+        self.slot_size = SLOT_HEADER.size + key_size + value_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = FILE_HEADER.size + slots * self.slot_size
+        with self._file_lock():
+            if not self._has_valid_header(size):
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, FILE_HEADER.pack(
+                    FILE_MAGIC, FORMAT_VERSION, slots, value_size
+                ), 0)
+        self._map = mmap.mmap(self._fd, size)
+
+    def _has_valid_header(self, size: int) -> bool:
+        if os.fstat(self._fd).st_size != size:
+            return False
+        header = os.pread(self._fd, FILE_HEADER.size, 0)
+        return header == FILE_HEADER.pack(
+            FILE_MAGIC, FORMAT_VERSION, self.slots, self.value_size
+        )
+
+    def _file_lock(self):
+        return _FileLock(self._fd)
+
+    def _offset(self, index: int) -> int:
+        return FILE_HEADER.size + index * self.slot_size
+
+    def _probe(self, key: bytes):
+        start = zlib.crc32(key) % self.slots
+        return (
+            (start + step) % self.slots
+            for step in range(min(MAX_PROBES, self.slots))
+        )
+
+    def _read_slot(self, index: int):
+        """Читает слот целиком, повторяя чтение при конкурентной записи."""
+        offset = self._offset(index)
+        for _ in range(MAX_READ_RETRIES):
+            version, state, key_len, value_len = SLOT_HEADER.unpack_from(
+                self._map, offset
+            )
+            if version % 2:
+                continue
+            data_offset = offset + SLOT_HEADER.size
+            key = self._map[data_offset:data_offset + key_len]
+            value_offset = data_offset + self.key_size
+            value = self._map[value_offset:value_offset + value_len]
+            if SLOT_HEADER.unpack_from(self._map, offset)[0] == version:
+                return state, key, value
+        return None
+
+    def _read_slot_locked(self, index: int):
+        """Читает слот под блокировкой записи.
+
+        Другие писатели ждут `flock`, поэтому нечётная версия здесь значит,
+        что процесс умер посреди записи слота. Такой слот считается
+        удалённым и перезаписывается следующей записью.
+        """
+        offset = self._offset(index)
+        version, state, key_len, value_len = SLOT_HEADER.unpack_from(
+            self._map, offset
+        )
+        if version % 2:
+            return SLOT_DELETED, b'', b''
+        data_offset = offset + SLOT_HEADER.size
+        key = self._map[data_offset:data_offset + key_len]
+        value_offset = data_offset + self.key_size
+        return state, key, self._map[value_offset:value_offset + value_len]
+
+    def _write_slot(self, index: int, state: int, key: bytes = b'',
+                    value: bytes = b'') -> None:
+        offset = self._offset(index)
+        version = SLOT_HEADER.unpack_from(self._map, offset)[0]
+        # У оборванной записи версия осталась нечётной
+        version += version % 2
+        struct.pack_into('<I', self._map, offset, version + 1)
+        data_offset = offset + SLOT_HEADER.size
+        self._map[data_offset:data_offset + len(key)] = key
+        value_offset = data_offset + self.key_size
+        self._map[value_offset:value_offset + len(value)] = value
+        SLOT_HEADER.pack_into(
+            self._map, offset, version + 2, state, len(key), len(value)
+        )
+
+    def get(self, key: str):
+        """Возвращает значение по ключу или None."""
+        encoded = key.encode()
+        for index in self._probe(encoded):
+            slot = self._read_slot(index)
+            if slot is None:
+                # Слот пишется сейчас или запись в него оборвалась
+                continue
+            if slot[0] == SLOT_EMPTY:
+                break
+            state, slot_key, value = slot
+            if state == SLOT_USED and slot_key == encoded:
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: bytes) -> bool:
+        """Сохраняет значение; слишком длинные значения не кэшируются."""
+        encoded = key.encode()
+        if len(encoded) > self.key_size or len(value) > self.value_size:
+            return False
+        with self._lock, self._file_lock():
+            target = free = None
+            for index in self._probe(encoded):
+                state, slot_key, _ = self._read_slot_locked(index)
+                if state == SLOT_USED and slot_key == encoded:
+                    target = index
+                    break
+                if state != SLOT_USED and free is None:
+                    free = index
+                if state == SLOT_EMPTY:
+                    break
+            if target is None:
+                target = free
+            if target is None:
+                target = zlib.crc32(encoded) % self.slots
+            self._write_slot(target, SLOT_USED, encoded, value)
+        return True
+
+    def invalidate(self, key: str) -> None:
+        """Помечает запись удалённой."""
+        encoded = key.encode()
+        with self._lock, self._file_lock():
+            for index in self._probe(encoded):
+                state, slot_key, _ = self._read_slot_locked(index)
+                if state == SLOT_EMPTY:
+                    return
+                if state == SLOT_USED and slot_key == encoded:
+                    self._write_slot(index, SLOT_DELETED)
+                    return
+
+    def clear(self) -> None:
+        """Очищает все слоты таблицы."""
+        with self._lock, self._file_lock():
+            for index in range(self.slots):
+                self._write_slot(index, SLOT_EMPTY)
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        """Возвращает параметры и счётчики таблицы."""
+        return {
+            'path': self.path,
+            'slots': self.slots,
+            'bytes': len(self._map) if not self._map.closed else 0,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+
+class _FileLock:
+    """Эксклюзивная межпроцессная блокировка файла."""
+
+    def __init__(self, fd: int):
+        self._fd = fd
+
+    def __enter__(self):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
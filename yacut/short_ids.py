@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+from collections import deque
+from hashlib import blake2b
+
+from yacut.constants import DEFAULT_SHORT_LENGTH, SHORT_CHARS
+
+BASE = len(SHORT_CHARS)
+# Число значений, которые кодируются строкой длины DEFAULT_SHORT_LENGTH
+PERMUTATION_DOMAIN = BASE ** DEFAULT_SHORT_LENGTH
+FEISTEL_HALF_BITS = (PERMUTATION_DOMAIN.bit_length() + 1) // 2
+FEISTEL_MASK = (1 << FEISTEL_HALF_BITS) - 1
+FEISTEL_ROUNDS = 4
+
+
+def encode_base62(value: int, length: int = DEFAULT_SHORT_LENGTH) -> str:
+    """Кодирует число алфавитом SHORT_CHARS, дополняя слева до `length`."""
+    chars = []
+    while value:
+        value, remainder = divmod(value, BASE)
+        chars.append(SHORT_CHARS[remainder])
+    chars.extend(SHORT_CHARS[0] * (length - len(chars)))
+    return ''.join(reversed(chars))
+
+
+def _feistel(value: int, key: bytes) -> int:
+    left, right = value >> FEISTEL_HALF_BITS, value & FEISTEL_MASK
+    for round_number in range(FEISTEL_ROUNDS):
+        digest = blake2b(
+            right.to_bytes(8, 'little') + bytes([round_number]),
+            key=key,
+            digest_size=8,
+        ).digest()
+        left, right = right, left ^ (
+            int.from_bytes(digest, 'little') & FEISTEL_MASK
+        )
+    return (left << FEISTEL_HALF_BITS) | right
+
+
+def permute(value: int, key: bytes) -> int:
+    """Взаимно-однозначно перемешивает значения из [0, PERMUTATION_DOMAIN).
+
+    Сеть Фейстеля переставляет чуть больший диапазон, а повторное
+    применение («cycle walking») возвращает результат в исходный. Значения
+    за пределами диапазона кодируются более длинными строками и
+    не перемешиваются.
+    """
+    if value >= PERMUTATION_DOMAIN:
+        return value
+    key = blake2b(key, digest_size=32).digest()
+    value = _feistel(value, key)
+    while value >= PERMUTATION_DOMAIN:
+        value = _feistel(value, key)
+    return value
+
+
+class SequenceAllocator:
+    """Выдаёт номера из блоков, заранее зарезервированных в базе данных.
+
+    `allocate(size)` резервирует блок и возвращает его первый номер. После
+    fork блок родителя не используется, чтобы процессы не выдали одинаковые
+    номера.
+    """
+
+    def __init__(self, allocate):
+        self._allocate = allocate
+        self._lock = threading.Lock()
+        self._next = self._end = 0
+        self._pid = None
+        self.blocks = 0
+
+    def next_value(self, block_size: int) -> int:
+        with self._lock:
+            if self._pid != os.getpid() or self._next >= self._end:
+                self._next = self._allocate(block_size)
+                self._end = self._next + block_size
+                self._pid = os.getpid()
+                self.blocks += 1
+            value = self._next
+            self._next += 1
+            return value
+
+    def reset(self) -> None:
+        """Забывает текущий блок; следующий номер возьмётся из нового."""
+        with self._lock:
+            self._next = self._end = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'blocks_allocated': self.blocks,
+                'remaining_in_block': self._end - self._next,
+            }
+
+
+class ShortPool:
+    """Запас заранее проверенных свободных коротких идентификаторов.
+
+    `generate(count)` возвращает `count` свободных идентификаторов. Фоновый
+    поток пополняет запас пачками по `batch_size`, когда в нём остаётся
+    меньше половины от `size`. После fork запас родителя сбрасывается,
+    чтобы процессы не выдали одинаковые ссылки.
+    """
+
+    def __init__(self, generate, size: int, batch_size: int):
+        self._generate = generate
+        self.size = size
+        self.batch_size = batch_size
+        self._shorts = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = os.getpid()
+        self.refills = 0
+        self.refilled = 0
+        self.refill_rate = 0.0
+        self.dry = 0
+        self.failures = 0
+
+    def pop(self):
+        """Возвращает свободный идентификатор или None, если запас пуст."""
+        if self.size <= 0:
+            return None
+        if self._pid != os.getpid():
+            self._after_fork()
+        try:
+            short = self._shorts.popleft()
+        except IndexError:
+            short = None
+            self.dry += 1
+        if len(self._shorts) < self.size // 2 + 1:
+            self._ensure_started()
+            self._wakeup.set()
+        return short
+
+    def refill(self) -> None:
+        """Пополняет запас до `size` в текущем потоке."""
+        while len(self._shorts) < self.size:
+            count = min(self.batch_size, self.size - len(self._shorts))
+            started = time.monotonic()
+            shorts = self._generate(count)
+            elapsed = time.monotonic() - started
+            self._shorts.extend(shorts)
+            self.refills += 1
+            self.refilled += len(shorts)
+            if elapsed > 0:
+                self.refill_rate = len(shorts) / elapsed
+
+    def clear(self) -> None:
+        self._shorts.clear()
+
+    def _after_fork(self) -> None:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._shorts.clear()
+                self._thread = None
+                self._pid = os.getpid()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                self.refill()
+            except Exception:
+                # Следующая попытка будет при следующем обращении к запасу
+                self.failures += 1
+
+    def stats(self) -> dict:
+        return {
+            'depth': len(self._shorts),
+            'size': self.size,
+            'batch_size': self.batch_size,
+            'refills': self.refills,
+            'refilled': self.refilled,
+            'refill_rate': round(self.refill_rate, 1),
+            'dry_pops': self.dry,
+            'failures': self.failures,
+        }
@@ -0,0 +1,200 @@
+"""Потоковый импорт и экспорт таблицы `url_map` в CSV и NDJSON."""
+import csv
+import json
+import time
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import insert, select
+from wtforms import ValidationError
+
+from yacut import db, short_filter
+from yacut.models import (
+    DUPLICATE_SHORT,
+    URLMap,
+    hash_url,
+    shard_connection,
+    shard_connections,
+    shard_groups,
+)
+
+FORMAT_CSV = 'csv'
+FORMAT_NDJSON = 'ndjson'
+FORMATS = (FORMAT_CSV, FORMAT_NDJSON)
+# Расширения файлов, по которым определяется формат
+FORMAT_EXTENSIONS = {
+    '.csv': FORMAT_CSV,
+    '.ndjson': FORMAT_NDJSON,
+    '.jsonl': FORMAT_NDJSON,
+}
+FIELDS = ('original', 'short', 'timestamp')
+
+ORIGINAL_REQUIRED = 'не указана оригинальная ссылка'
+INVALID_TIMESTAMP = 'недопустимое время создания'
+DUPLICATE_IN_FILE = 'короткая ссылка повторяется в файле'
+INVALID_RECORD = 'запись должна быть объектом'
+
+
+def detect_format(filename: str):
+    for extension, name in FORMAT_EXTENSIONS.items():
+        if filename.lower().endswith(extension):
+            return name
+    return None
+
+
+def read_records(stream, file_format: str):
+    """Читает записи из файла, не загружая его в память целиком."""
+    if file_format == FORMAT_CSV:
+        yield from csv.DictReader(stream)
+        return
+    # Строки разбираются вместе с проверкой записи, чтобы ошибка в одной
+    # строке не прерывала импорт
+    for line in stream:
+        if line.strip():
+            yield line
+
+
+def _parse_record(record) -> dict:
+    if isinstance(record, str):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError(INVALID_RECORD)
+    original = record.get('original') or record.get('url')
+    if not original:
+        raise ValueError(ORIGINAL_REQUIRED)
+    URLMap.validate_original(original)
+    row = {
+        'original': original,
+        'original_hash': hash_url(original),
+        'short': URLMap.validate_short(record.get('short'), require=False),
+    }
+    # У всех строк порции одинаковый набор полей: так они вставляются
+    # одним executemany
+    row['timestamp'] = datetime.utcnow()
+    if record.get('timestamp'):
+        try:
+            row['timestamp'] = datetime.fromisoformat(record['timestamp'])
+        except ValueError as error:
+            raise ValueError(INVALID_TIMESTAMP) from error
+    return row
+
+
+def _check_chunk(records, first_number: int, errors: list):
+    """Проверяет порцию записей и занятость пользовательских ссылок.
+
+    Возвращает подходящие строки и пользовательские ссылки из них.
+    """
+    rows, numbers = [], []
+    for number, record in enumerate(records, first_number):
+        try:
+            rows.append(_parse_record(record))
+        except (ValueError, ValidationError) as error:
+            errors.append((number, str(error)))
+            continue
+        numbers.append(number)
+    rejected, custom = set(), {}
+    for index, row in enumerate(rows):
+        if not row['short']:
+            continue
+        if row['short'] in custom:
+            rejected.add(index)
+            errors.append((numbers[index], DUPLICATE_IN_FILE))
+            continue
+        custom[row['short']] = index
+    for short in URLMap._existing_shorts(custom):
+        index = custom.pop(short)
+        rejected.add(index)
+        errors.append((numbers[index], DUPLICATE_SHORT))
+    rows = [row for index, row in enumerate(rows) if index not in rejected]
+    return rows, custom
+
+
+def _import_chunk(records, first_number: int, errors: list) -> int:
+    """Проверяет и вставляет одну порцию записей, возвращает число строк."""
+    rows, custom = _check_chunk(records, first_number, errors)
+    missing = [row for row in rows if not row['short']]
+    for row, short in zip(
+        missing, URLMap.get_unique_shorts(len(missing), exclude=custom)
+    ):
+        row['short'] = short
+    # Одна порция — по одному executemany на шард и одна фиксация
+    for shard, shard_rows in shard_groups(
+        rows, lambda row: row['short']
+    ).items():
+        shard_connection(shard).execute(insert(URLMap), shard_rows)
+    db.session.commit()
+    if short_filter is not None:
+        for row in rows:
+            short_filter.add(row['short'])
+    return len(rows)
+
+
+def import_urls(records, chunk_size: int, skip: int = 0, on_chunk=None):
+    """Импортирует записи порциями по `chunk_size`.
+
+    Первые `skip` записей пропускаются: так импорт продолжается с
+    контрольной точки. После каждой зафиксированной порции вызывается
+    `on_chunk(report)`, где `report['processed']` — число обработанных
+    записей файла, включая пропущенные.
+    """
+    records = iter(records)
+    for _ in islice(records, skip):
+        pass
+    started = time.monotonic()
+    report = {'processed': skip, 'imported': 0, 'rejected': 0, 'errors': []}
+    while chunk := list(islice(records, chunk_size)):
+        # В отчёте остаются только ошибки последней порции
+        report['errors'] = []
+        report['imported'] += _import_chunk(
+            chunk, report['processed'] + 1, report['errors']
+        )
+        report['rejected'] += len(report['errors'])
+        report['processed'] += len(chunk)
+        report['elapsed'] = time.monotonic() - started
+        if on_chunk is not None:
+            on_chunk(report)
+    report['elapsed'] = time.monotonic() - started
+    return report
+
+
+def _write_record(stream, writer, row) -> None:
+    record = {
+        'original': row.original,
+        'short': row.short,
+        'timestamp': row.timestamp and row.timestamp.isoformat(),
+    }
+    if writer is not None:
+        writer.writerow(record)
+    else:
+        stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def export_urls(stream, file_format: str, chunk_size: int, on_chunk=None):
+    """Выгружает таблицу порциями с пагинацией по id, шард за шардом.
+
+    Каждая порция читается запросом `id > последний id`, поэтому память
+    не растёт с размером таблицы, а запросы не замедляются к концу.
+    """
+    writer = None
+    if file_format == FORMAT_CSV:
+        writer = csv.DictWriter(stream, FIELDS, lineterminator='\n')
+        writer.writeheader()
+    started = time.monotonic()
+    report = {'exported': 0}
+    for connection in shard_connections().values():
+        last_id = 0
+        while rows := connection.execute(
+            select(URLMap.id, *(getattr(URLMap, field) for field in FIELDS))
+            .where(URLMap.id > last_id)
+            .order_by(URLMap.id)
+            .limit(chunk_size)
+        ).all():
+            for row in rows:
+                _write_record(stream, writer, row)
+            last_id = rows[-1].id
+            report['exported'] += len(rows)
+            report['elapsed'] = time.monotonic() - started
+            if on_chunk is not None:
+                on_chunk(report)
+    report['elapsed'] = time.monotonic() - started
+    return report
@@ -0,0 +1,211 @@
+"""Фоновые задачи загрузки файлов на Яндекс Диск."""
+import os
+import shutil
+import threading
+import uuid
+from contextlib import ExitStack
+from datetime import datetime
+
+from flask import current_app
+
+from yacut import app, db, metrics
+from yacut.constants import JOB_DONE, JOB_FAILED
+from yacut.models import UploadJob, URLMap
+from yacut.services import (
+    FileToUpload,
+    YandexDiskServiceError,
+    upload_files_to_yandex_disk,
+)
+
+JOB_FAILED_ERROR = 'Не удалось загрузить файлы.'
+JOB_RUN_FAILED = 'Ошибка фоновой задачи загрузки {job_id}'
+QUEUE_FAILED = 'Не удалось разобрать очередь задач загрузки'
+
+
+def _spool_path(job_id: str) -> str:
+    return os.path.join(current_app.config['UPLOAD_SPOOL_DIR'], job_id)
+
+
+def enqueue_upload(file_storages) -> UploadJob:
+    """Сохраняет файлы формы на диск и ставит задачу загрузки в очередь.
+
+    Файлы копируются из потоков FileStorage порциями и в память целиком
+    не читаются.
+    """
+    job_id = uuid.uuid4().hex
+    path = _spool_path(job_id)
+    os.makedirs(path)
+    filenames, digests = [], []
+    try:
+        for index, storage in enumerate(file_storages):
+            storage.save(os.path.join(path, str(index)))
+            filenames.append(storage.filename)
+            digests.append(getattr(storage.stream, 'content_digest', None))
+        job = UploadJob(id=job_id, filenames=filenames, digests=digests)
+        db.session.add(job)
+        db.session.commit()
+    except Exception:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+    upload_workers.notify()
+    return job
+
+
+def run_upload_job(job_id: str) -> None:
+    """Загружает файлы задачи и создаёт для них короткие ссылки.
+
+    Ссылки и результат задачи фиксируются одной транзакцией. Каталог
+    с файлами задачи удаляется в любом случае.
+    """
+    job = db.session.get(UploadJob, job_id)
+    path = _spool_path(job_id)
+    try:
+        with ExitStack() as stack:
+            uploaded = upload_files_to_yandex_disk(
+                FileToUpload(
+                    filename,
+                    stack.enter_context(
+                        open(os.path.join(path, str(index)), 'rb')
+                    ),
+                    digest,
+                )
+                for index, (filename, digest) in enumerate(zip(
+                    job.filenames, job.digests or [None] * len(job.filenames)
+                ))
+            )
+        for result in uploaded:
+            URLMap.create(
+                result.original_url,
+                result.short,
+                commit=False,
+                validate=False,
+                content_digest=result.content_digest,
+            )
+        job.results = [
+            {'filename': result.filename, 'short': result.short}
+            for result in uploaded
+        ]
+        job.status = JOB_DONE
+    except Exception as error:
+        db.session.rollback()
+        if not isinstance(error, YandexDiskServiceError):
+            app.logger.exception(JOB_RUN_FAILED.format(job_id=job_id))
+        job = db.session.get(UploadJob, job_id)
+        job.status = JOB_FAILED
+        job.error = (
+            str(error) if isinstance(error, YandexDiskServiceError)
+            else JOB_FAILED_ERROR
+        )
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+class UploadJobWorkers:
+    """Потоки, разбирающие очередь задач загрузки.
+
+    Задачи из этого процесса будят обработчики сразу, задачи других
+    процессов подхватываются опросом очереди раз в `poll_interval`
+    секунд. При `enabled` потоки запускаются первым запросом процесса
+    (`ensure_started`), а не при импорте, и заново — после fork.
+    """
+
+    def __init__(self, workers: int, poll_interval: float, timeout: float,
+                 enabled: bool = True):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._threads = []
+        self._pid = None
+        self.completed = 0
+        self.failed = 0
+        self.failures = 0
+
+    def run_pending(self) -> int:
+        """Выполняет задачи из очереди, пока она не опустеет."""
+        processed = 0
+        with app.app_context():
+            while (job_id := UploadJob.claim_next(self.timeout)) is not None:
+                run_upload_job(job_id)
+                status = db.session.get(UploadJob, job_id).status
+                with self._lock:
+                    if status == JOB_DONE:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+                processed += 1
+        return processed
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def ensure_started(self) -> None:
+        if self.enabled:
+            self.start()
+
+    def start(self) -> None:
+        if self.workers <= 0:
+            return
+        if self._threads and self._pid == os.getpid():
+            return
+        with self._lock:
+            # Потоки родителя после fork в дочернем процессе не работают
+            if self._threads and self._pid == os.getpid():
+                return
+            self._stopped.clear()
+            self._pid = os.getpid()
+            self._threads = [
+                threading.Thread(target=self._run, daemon=True)
+                for _ in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                self.run_pending()
+            except Exception:
+                self.failures += 1
+                app.logger.exception(QUEUE_FAILED)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def stats(self) -> dict:
+        return {
+            'workers': len(self._threads),
+            'completed': self.completed,
+            'failed': self.failed,
+            'failures': self.failures,
+        }
+
+
+upload_workers = UploadJobWorkers(
+    app.config['UPLOAD_JOB_WORKERS'],
+    app.config['UPLOAD_JOB_POLL_INTERVAL'],
+    app.config['UPLOAD_JOB_TIMEOUT'],
+    app.config['UPLOAD_JOBS_ENABLED'],
+)
+metrics.register('upload_jobs', upload_workers.stats)
+
+
+@app.before_request
+def start_upload_workers():
+    """Запускает обработчики только в процессах, обслуживающих запросы.
+
+    Команды `flask`, ASGI-приложение и мастер-процесс gunicorn
+    с `--preload` запросов Flask не обрабатывают и потоков не создают.
+    """
+    upload_workers.ensure_started()
@@ -0,0 +1,141 @@
+"""Фоновый цикл событий с общей сессией aiohttp для запросов к API Диска."""
+import asyncio
+import atexit
+import threading
+
+import aiohttp
+
+from yacut import app, metrics
+
+
+class UpstreamLoop:
+    """Долгоживущий цикл событий в отдельном потоке.
+
+    Представления передают в него корутины через `run`, и все запросы
+    процесса к внешним API идут через одну `aiohttp.ClientSession`: её
+    пул держит соединения открытыми, поэтому повторные запросы не тратят
+    время на DNS, TCP и TLS. Цикл запускается при первом обращении,
+    а при завершении процесса сессия закрывается.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        limit_per_host: int,
+        keepalive_timeout: float,
+        dns_cache_ttl: int,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._stop_at_exit = False
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.dns_cache_hits = 0
+        self.dns_cache_misses = 0
+
+    def run(self, coroutine_function, *args):
+        """Выполняет `coroutine_function(session, *args)` в фоновом цикле.
+
+        Вызывающий поток ждёт результата; исключение корутины
+        пробрасывается.
+        """
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(
+            self._call(coroutine_function, *args), loop
+        ).result()
+
+    async def _call(self, coroutine_function, *args):
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return await coroutine_function(self._session, *args)
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._on_request_start)
+        trace.on_connection_create_end.append(self._on_connection_create)
+        trace.on_connection_reuseconn.append(self._on_connection_reuse)
+        trace.on_dns_cache_hit.append(self._on_dns_cache_hit)
+        trace.on_dns_cache_miss.append(self._on_dns_cache_miss)
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl or None,
+                use_dns_cache=self.dns_cache_ttl > 0,
+            ),
+            trace_configs=[trace],
+        )
+
+    # Счётчики меняются только в потоке цикла событий
+    async def _on_request_start(self, session, context, params):
+        self.requests += 1
+
+    async def _on_connection_create(self, session, context, params):
+        self.connections_created += 1
+
+    async def _on_connection_reuse(self, session, context, params):
+        self.connections_reused += 1
+
+    async def _on_dns_cache_hit(self, session, context, params):
+        self.dns_cache_hits += 1
+
+    async def _on_dns_cache_miss(self, session, context, params):
+        self.dns_cache_misses += 1
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self._loop
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._loop.run_forever, daemon=True
+            )
+            self._thread.start()
+            if not self._stop_at_exit:
+                atexit.register(self.stop)
+                self._stop_at_exit = True
+            return self._loop
+
+    async def _close_session(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def stop(self) -> None:
+        """Закрывает сессию и останавливает фоновый цикл."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if thread is None:
+                return
+            self._loop = self._thread = None
+        asyncio.run_coroutine_threadsafe(self._close_session(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    def stats(self) -> dict:
+        return {
+            'running': self._thread is not None,
+            'requests': self.requests,
+            'connections_created': self.connections_created,
+            'connections_reused': self.connections_reused,
+            'dns_cache_hits': self.dns_cache_hits,
+            'dns_cache_misses': self.dns_cache_misses,
+        }
+
+
+upstream = UpstreamLoop(
+    app.config['UPSTREAM_CONNECTION_LIMIT'],
+    app.config['UPSTREAM_CONNECTION_LIMIT_PER_HOST'],
+    app.config['UPSTREAM_KEEPALIVE_TIMEOUT'],
+    app.config['UPSTREAM_DNS_CACHE_TTL'],
+)
+metrics.register('upstream', upstream.stats)
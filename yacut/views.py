@@ -1,12 +1,23 @@
 import contextlib
 import os
 import yaml
+from datetime import datetime
 from http import HTTPStatus
 
-from flask import abort, current_app, flash, jsonify, redirect, render_template
+from flask import (
+    abort,
+    current_app,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    url_for,
+)
 from wtforms import ValidationError
 
 from yacut import app, db
+from yacut.clicks import record_click
+from yacut.constants import PERMANENT_REDIRECT_CODES
 from yacut.forms import UploadFilesForm, URLMapForm
 from yacut.models import URLMap
 from yacut.services import (
@@ -14,6 +25,7 @@ from yacut.services import (
     prepare_files_for_upload,
     upload_files_to_yandex_disk,
 )
+from yacut.upload_jobs import enqueue_upload
 
 # Шаблоны
 TEMPLATE_INDEX = 'index.html'
@@ -30,6 +42,10 @@ FLASH_SUCCESS = 'success'
 # Сообщения для пользователя
 SHORT_LINK_CREATED = 'Короткая ссылка успешно создана!'
 FILES_UPLOADED = 'Файлы успешно загружены на Яндекс Диск.'
+UPLOAD_JOB_QUEUED = (
+    'Файлы поставлены в очередь загрузки. Результат будет доступен '
+    'по адресу {url}'
+)
 FILE_READ_ERROR = 'Ошибка при чтении файлов.'
 SHORT_LINKS_CREATION_ERROR = 'Ошибка при создании коротких ссылок'
 SHORT_LINKS_CREATION_ERROR_WITH_DETAILS = '{}: {}'
@@ -59,7 +75,8 @@ def index_view():
             short_url=URLMap.create(
                 form.original_link.data,
                 form.custom_id.data,
-                validate=False
+                validate=False,
+                expires_at=form.expires_at.data,
             ).get_short_url(),
             active_page=PAGE_INDEX,
         )
@@ -87,6 +104,17 @@ def files_view():
             active_page=PAGE_FILES,
         )
 
+    if current_app.config['UPLOAD_JOBS_ENABLED']:
+        job = enqueue_upload(form.files.data)
+        flash(UPLOAD_JOB_QUEUED.format(url=url_for(
+            'api.get_upload_job', job_id=job.id, _external=True
+        )), FLASH_SUCCESS)
+        return render_template(
+            TEMPLATE_FILES,
+            form=form,
+            active_page=PAGE_FILES,
+        ), HTTPStatus.ACCEPTED
+
     # Часть 1-2: Преобразование файлов и загрузка на Яндекс Диск
     try:
         uploaded_files = upload_files_to_yandex_disk(
@@ -113,7 +141,8 @@ def files_view():
                             result.original_url,
                             result.short,
                             commit=False,
-                            validate=False
+                            validate=False,
+                            content_digest=result.content_digest,
                         ).get_short_url(),
                     }
                     for result in uploaded_files
@@ -134,11 +163,34 @@ def files_view():
         )
 
 
+def make_redirect(original: str, config, expires_at: datetime = None):
+    """Переадресация с заголовками кэширования по настройкам приложения.
+
+    Постоянные переадресации кэшируются браузерами и CDN, поэтому повторные
+    переходы не доходят до приложения и не попадают в счётчики. Ссылку
+    со сроком действия кэш хранит не дольше, чем она действует.
+    """
+    status = config['REDIRECT_STATUS_CODE']
+    response = redirect(original, status)
+    if status in PERMANENT_REDIRECT_CODES:
+        max_age = config['REDIRECT_MAX_AGE']
+        if expires_at is not None:
+            max_age = max(0, min(max_age, int(
+                (expires_at - datetime.utcnow()).total_seconds()
+            )))
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
 @app.route('/<string:short>')
 def redirect_view(short):
-    if (url_map := URLMap.find(short)) is None:
+    if (row := URLMap.resolve_row(short)) is None:
         abort(HTTPStatus.NOT_FOUND)
-    return redirect(url_map.original)
+    record_click(short)
+    return make_redirect(row[1], current_app.config, row[4])
 
 
 @app.route('/docs/')
@@ -0,0 +1,92 @@
+import time
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from yacut import app, db
+from yacut.models import (
+    CACHED_FIELDS,
+    URLClick,
+    URLMap,
+    cache_set,
+    shard_connection,
+    shard_connections,
+    shard_groups,
+)
+
+WARMUP_DONE = (
+    'Прогрев кэша: загружено {entries} записей ({bytes} байт) '
+    'за {elapsed:.2f} с'
+)
+WARMUP_TIMED_OUT = ', прервано по лимиту времени'
+WARMUP_FAILED = 'Не удалось прогреть кэш коротких ссылок'
+
+
+def _warmup_rows(limit: int, chunk_size: int):
+    """Последние ссылки каждого шарда, затем самые популярные.
+
+    Самые популярные загружаются последними, чтобы дольше жить в LRU.
+    """
+    columns = [getattr(URLMap, field) for field in CACHED_FIELDS]
+    recent = select(*columns).order_by(URLMap.timestamp.desc()).limit(
+        limit
+    ).execution_options(yield_per=chunk_size)
+    for connection in shard_connections().values():
+        yield from connection.execute(recent)
+    # Счётчики переходов лежат в основной базе, а ссылки могут быть
+    # в шардах, поэтому популярные читаются двумя запросами без JOIN
+    hot = db.session.scalars(
+        select(URLClick.short).order_by(URLClick.clicks.desc()).limit(limit)
+    ).all()
+    for start in range(0, len(hot), chunk_size):
+        chunk = hot[start:start + chunk_size]
+        rows = {}
+        for shard, shorts in shard_groups(chunk).items():
+            rows.update(
+                (row.short, row) for row in shard_connection(shard).execute(
+                    select(*columns).where(URLMap.short.in_(shorts))
+                )
+            )
+        yield from (rows[short] for short in chunk if short in rows)
+
+
+def warm_up_cache(limit: int, chunk_size: int, time_budget: float) -> dict:
+    """Загружает в кэш последние и самые популярные короткие ссылки.
+
+    Записи читаются порциями по `chunk_size`; загрузка прекращается, как
+    только израсходован `time_budget` секунд.
+    """
+    started = time.monotonic()
+    deadline = started + time_budget
+    report = {'entries': 0, 'bytes': 0, 'timed_out': False}
+    for row in _warmup_rows(limit, chunk_size):
+        if time.monotonic() > deadline:
+            report['timed_out'] = True
+            break
+        cache_set(row.short, tuple(row))
+        report['entries'] += 1
+        report['bytes'] += len(row.original.encode()) + len(row.short)
+    report['elapsed'] = time.monotonic() - started
+    return report
+
+
+def format_report(report: dict) -> str:
+    message = WARMUP_DONE.format(**report)
+    return message + WARMUP_TIMED_OUT if report['timed_out'] else message
+
+
+def warm_up_on_startup() -> None:
+    """Прогревает кэш при запуске процесса, не прерывая запуск при ошибке."""
+    with app.app_context():
+        try:
+            report = warm_up_cache(
+                app.config['CACHE_WARMUP_LIMIT'],
+                app.config['CACHE_WARMUP_CHUNK_SIZE'],
+                app.config['CACHE_WARMUP_TIME_BUDGET'],
+            )
+        except SQLAlchemyError:
+            app.logger.exception(WARMUP_FAILED)
+            return
+        finally:
+            db.session.remove()
+    app.logger.info(format_report(report))